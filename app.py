@@ -1,15 +1,31 @@
+import io
 import os
+import atexit
+import hashlib
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date, time, timedelta
+from time import monotonic
 
 import mysql.connector
 from mysql.connector import Error
-from mysql.connector.errors import IntegrityError
-
-from flask import Flask, render_template, request, jsonify, send_from_directory
-
-from orden_docx import generar_docx_orden
+from mysql.connector.errors import IntegrityError, InterfaceError, OperationalError
+
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, g, has_app_context
+from werkzeug.datastructures import MultiDict
+
+from orden_docx import generar_docx_orden, docx_ordenes_bytes, huella_orden, huella_docx
+from orden_docx_plantilla import generar_docx_orden_rapido
+from db_pool import PoolMySQL, PoolAgotadoError
+from cola_docx import ColaRender, PENDIENTE, GENERANDO
+from eventos import Difusor
+from esquema import Esquema
+from historial import EscritorHistorial
+from propietarios import actualizar_propietarios, actualizar_propietarios_de_clientes, reconstruir_propietarios
+import json_rapido
+from normalizar import _clean_text, clean_digits, clean_email, texto_busqueda_cliente, tokens_busqueda
 import re
-import unicodedata
 
 ESTADOS_EN_PROCESO = {
     "EN REPARACION", "EN SOS", "EN WERTECH", "EN EKON",
@@ -61,21 +77,6 @@ def now_fecha_hora():
     d = datetime.now()
     return d.strftime("%Y-%m-%d"), d.strftime("%H:%M")
 
-def _clean_text(s: str) -> str:
-    if not s:
-        return ""
-    s = str(s).strip()
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(c for c in s if unicodedata.category(c) != "Mn")  # sin tildes
-    s = re.sub(r"\s+", " ", s)
-    return s
-
-def clean_digits(s: str) -> str:
-    return re.sub(r"\D", "", _clean_text(s))
-
-def clean_email(s: str) -> str:
-    return _clean_text(s).lower()
-
 def clean_serie(s: str) -> str:
     # Serie/SN: mayúsculas y sin espacios
     return re.sub(r"\s+", "", to_upper(s))
@@ -92,54 +93,270 @@ DB_CONFIG = {
     'port': 3306,
 }
 
+# ========= POOL DE CONEXIONES =========
+POOL_CONFIG = {
+    'max_size': 10,     # conexiones abiertas como máximo (ver /api/db/pool para dimensionar)
+    'timeout': 5,       # segundos esperando una conexión libre antes de devolver 503
+    'ping_idle': 30,    # si estuvo libre más de N segundos, ping antes de entregarla
+}
+
+db_pool = PoolMySQL(DB_CONFIG, **POOL_CONFIG)
+
 def get_db():
-    return mysql.connector.connect(**DB_CONFIG)
+    """
+    Entrega una conexión del pool. conn.close() la devuelve al pool.
+    Si el handler no la cierra (return temprano, excepción), se devuelve
+    sola al terminar el request (ver _devolver_conexiones).
+    """
+    conn = db_pool.get()
+    if has_app_context():
+        g.setdefault("_db_conns", []).append(conn)
+    return conn
+
+@app.teardown_appcontext
+def _devolver_conexiones(exc):
+    for conn in g.pop("_db_conns", []):
+        conn.close()
+
+@app.errorhandler(PoolAgotadoError)
+def _pool_agotado(e):
+    print("WARN pool:", e)
+    return jsonify({"ok": False, "error": "Servidor ocupado, reintentá en unos segundos"}), 503
+
+@app.route("/api/db/pool", methods=["GET"])
+def api_db_pool():
+    """Estadísticas del pool (para dimensionar max_size)."""
+    return jsonify(db_pool.stats())
+
+# ========= ESQUEMA (columnas de cada tabla) =========
+# Se lee information_schema una vez al arrancar; los chequeos de columnas y
+# las listas de columnas dinámicas usan esto y no vuelven a consultarlo.
+esquema = Esquema(get_db)
+# los procesos del zip (ProcessPoolExecutor con spawn, en Windows) vuelven a
+# importar este archivo como __mp_main__: ahí no se toca la base
+if __name__ != "__mp_main__":
+    try:
+        esquema.cargar()
+    except (Error, PoolAgotadoError) as e:
+        # sin base al arrancar: se carga en el primer uso
+        print("WARN esquema:", e)
+
+@app.route("/api/db/esquema", methods=["GET"])
+def api_db_esquema():
+    return jsonify(esquema.stats())
+
+@app.route("/api/db/esquema/refrescar", methods=["POST"])
+def api_db_esquema_refrescar():
+    """Volver a leer las columnas (después de correr una migración sin reiniciar)."""
+    esquema.refrescar()
+    return jsonify({"ok": True, **esquema.stats()})
 
 DOCX_DIR = os.path.join(os.path.dirname(__file__), "ordenes_docx")
 os.makedirs(DOCX_DIR, exist_ok=True)
 
-def generar_word_de_orden(conn, orden_id):
+# "plantilla" = orden_docx_plantilla (rápido), "python-docx" = orden_docx (arma todo cada vez)
+DOCX_MOTOR = "plantilla"
+DOCX_GENERADORES = {
+    "plantilla": generar_docx_orden_rapido,
+    "python-docx": generar_docx_orden,
+}
+
+# columnas que usa el Word (sin WHERE; se agrega según el caso)
+SQL_ORDEN_DOCX = """
+    SELECT
+        o.*,
+        c.nombre AS nombre_contacto,
+        c.telefono AS telefono_contacto,
+        e.descripcion AS equipo_texto,
+        e.serie       AS serie_texto
+    FROM ordenes o
+    LEFT JOIN clientes c ON o.cliente_id = c.id
+    LEFT JOIN equipos  e ON o.equipo_id   = e.id
+"""
+
+def generar_word_de_orden(conn, orden_id, forzar=False):
     """
     Lee la orden desde DB y genera el Word imprimible.
+    Si el .docx ya existe y se generó con los mismos datos (misma huella),
+    no se vuelve a generar. Devuelve la huella, o None si la orden no existe.
     """
     cur = conn.cursor(dictionary=True)
-    cur.execute(
-        """
-        SELECT
-            o.*,
-            c.nombre AS nombre_contacto,
-            c.telefono AS telefono_contacto,
-            e.descripcion AS equipo_texto,
-            e.serie       AS serie_texto
-        FROM ordenes o
-        LEFT JOIN clientes c ON o.cliente_id = c.id
-        LEFT JOIN equipos  e ON o.equipo_id   = e.id
-        WHERE o.id=%s
-        """,
-        (orden_id,),
-    )
+    cur.execute(SQL_ORDEN_DOCX + " WHERE o.id=%s", (orden_id,))
     orden = cur.fetchone()
     cur.close()
 
-    if orden:
-        generar_docx_orden(orden, DOCX_DIR, filename=f"Orden_{orden_id}.docx")
+    if not orden:
+        return None
+
+    huella = huella_orden(orden)
+    filename = f"Orden_{orden_id}.docx"
+    if forzar or huella_docx(os.path.join(DOCX_DIR, filename)) != huella:
+        DOCX_GENERADORES[DOCX_MOTOR](orden, DOCX_DIR, filename=filename)
+    return huella
+
+def _render_docx(orden_id):
+    conn = get_db()
+    try:
+        return generar_word_de_orden(conn, orden_id)
+    finally:
+        conn.close()
+
+# ========= WORD EN SEGUNDO PLANO =========
+DOCX_WORKERS = 2      # documentos que se generan a la vez
+DOCX_ESPERA = 5       # segundos que la descarga espera a un trabajo en curso
+
+cola_docx = ColaRender(_render_docx, max_workers=DOCX_WORKERS)
+atexit.register(cola_docx.cerrar)
+
+# ========= EVENTOS EN VIVO (SSE) =========
+# Las PCs del mostrador escuchan /api/eventos; cada cambio de una orden se
+# avisa con un evento chico {"tipo": "orden", "accion", "id", "estado"} y
+# el front trae solo esa fila (?since=, ver CAMBIOS).
+EVENTOS_KEEPALIVE = 15   # segundos entre pings si no hay eventos
+
+eventos = Difusor(keepalive=EVENTOS_KEEPALIVE)
+atexit.register(eventos.cerrar)
+
+def publicar_orden(accion, orden_id, **extra):
+    """Avisa a los navegadores conectados que cambió una orden (llamar después del commit)."""
+    eventos.publicar({"tipo": "orden", "accion": accion, "id": orden_id, **extra})
+
+@app.route("/api/eventos", methods=["GET"])
+def api_eventos():
+    resp = Response(eventos.suscribir(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"   # por si algún día va detrás de nginx
+    return resp
+
+@app.route("/api/eventos/estado", methods=["GET"])
+def api_eventos_estado():
+    return jsonify(eventos.stats())
 
 def _usuario_actual():
     return request.headers.get("X-User", "sistema")
 
-def _insert_hist(conn, orden_id, accion, nota=None):
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO orden_historial (orden_id, usuario, accion, nota)
-            VALUES (%s, %s, %s, %s)
-            """,
-            (orden_id, _usuario_actual(), accion, nota),
-        )
-        cur.close()
-    except Exception:
-        pass
+# ========= HISTORIAL DE ÓRDENES =========
+# orden_historial se escribe en segundo plano (historial.py): el request solo
+# encola la fila. Lo que falle queda en el log y en /api/historial/estado.
+HISTORIAL_LOTE = 200        # filas por INSERT
+HISTORIAL_INTERVALO = 1.0   # segundos que puede esperar una fila antes de escribirse
+
+# sin conexión (base caída, pool agotado) el lote se reintenta; no se pierde
+HISTORIAL_REINTENTABLES = (PoolAgotadoError, InterfaceError, OperationalError)
+
+historial = EscritorHistorial(
+    get_db,
+    lote=HISTORIAL_LOTE,
+    intervalo=HISTORIAL_INTERVALO,
+    reintentables=HISTORIAL_REINTENTABLES,
+    # la columna fecha llega con sql/007; sin ella el INSERT no la nombra
+    con_fecha=lambda: esquema.tiene_columna("orden_historial", "fecha"),
+)
+atexit.register(historial.cerrar)
+
+def _insert_hist(orden_id, accion, nota=None):
+    """Registra una acción en el historial (llamar después del commit)."""
+    historial.registrar(orden_id, _usuario_actual(), accion, nota)
+
+@app.route("/api/historial/estado", methods=["GET"])
+def api_historial_estado():
+    return jsonify(historial.stats())
+
+HISTORIAL_PAGE_DEFAULT = 50
+HISTORIAL_PAGE_MAX = 500
+
+def _filtros_historial(args, orden_id=None):
+    """
+    WHERE del historial a partir de los query params:
+      usuario, accion (varias separadas por coma)
+      desde / hasta   (YYYY-MM-DD, inclusive)
+      orden_id        (en /api/historial; en /api/ordenes/<id>/historial va en la URL)
+      cursor          (next_cursor de la página anterior)
+    Devuelve (sql_where, params). sql_where es "" o empieza con "WHERE".
+    """
+    conds, params = [], []
+
+    if orden_id is None:
+        v = args.get("orden_id")
+        if v not in (None, "") and str(v).isdigit():
+            orden_id = int(v)
+    if orden_id is not None:
+        conds.append("h.orden_id = %s")
+        params.append(orden_id)
+
+    usuario = (args.get("usuario") or "").strip()
+    if usuario:
+        conds.append("h.usuario = %s")
+        params.append(usuario)
+
+    acciones = sorted({to_upper(a) for v in args.getlist("accion") for a in str(v).split(",") if a.strip()})
+    if acciones:
+        conds.append("h.accion IN (" + ", ".join(["%s"] * len(acciones)) + ")")
+        params.extend(acciones)
+
+    desde = parse_fecha(args.get("desde"))
+    if desde:
+        conds.append("h.fecha >= %s")
+        params.append(desde)
+    hasta = parse_fecha(args.get("hasta"))
+    if hasta:
+        conds.append("h.fecha < %s + INTERVAL 1 DAY")
+        params.append(hasta)
+
+    cursor = _arg_int("cursor")
+    if cursor is not None:
+        conds.append("h.id < %s")
+        params.append(cursor)
+
+    return ("WHERE " + " AND ".join(conds)) if conds else "", params
+
+def _pagina_historial(orden_id=None):
+    """
+    Página del historial, de lo más nuevo a lo más viejo (keyset sobre h.id DESC).
+    Devuelve {"items": [...], "next_cursor": id o null si no hay más}.
+    Lo registrado en el último segundo puede no aparecer todavía (ver HISTORIAL_INTERVALO).
+    """
+    limit = min(max(_arg_int("limit", HISTORIAL_PAGE_DEFAULT), 1), HISTORIAL_PAGE_MAX)
+    if (request.args.get("desde") or request.args.get("hasta")) and not esquema.tiene_columna("orden_historial", "fecha"):
+        return jsonify({"ok": False, "error": "orden_historial no tiene la columna fecha (correr sql/007)"}), 400
+    where, params = _filtros_historial(request.args, orden_id)
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    # pido una fila de más para saber si hay otra página
+    cur.execute(f"""
+        SELECT h.*
+        FROM orden_historial h
+        {where}
+        ORDER BY h.id DESC
+        LIMIT %s
+    """, (*params, limit + 1))
+    rows = cur.fetchall()
+    cur.close(); conn.close()
+
+    hay_mas = len(rows) > limit
+    rows = [normalize_row(r) for r in rows[:limit]]
+    return jsonify({
+        "items": rows,
+        "next_cursor": rows[-1]["id"] if hay_mas else None,
+    })
+
+@app.route("/api/ordenes/<int:orden_id>/historial", methods=["GET"])
+def api_orden_historial(orden_id):
+    return _pagina_historial(orden_id)
+
+@app.route("/api/historial", methods=["GET"])
+def api_historial():
+    return _pagina_historial()
+
+def _estado_orden(cur, orden_id):
+    """
+    Estado actual de la orden (None si no existe). Solo se consulta cuando un
+    UPDATE con guarda de estado no tocó ninguna fila, para explicar por qué.
+    """
+    cur.execute("SELECT estado FROM ordenes WHERE id=%s", (orden_id,))
+    row = cur.fetchone()
+    return None if row is None else to_upper(row[0])
 
 def normalize_row(row: dict) -> dict:
     out = {}
@@ -161,6 +378,274 @@ def normalize_row(row: dict) -> dict:
             out[k] = v
     return out
 
+# ========= JSON DE LISTAS =========
+# Las listas grandes no pasan por normalize_row + jsonify: las filas se leen
+# como tuplas y json_rapido las serializa en una pasada (ver bench_json.py).
+GZIP_MINIMO = 1024   # bytes; lo más chico no vale la pena comprimirlo
+
+def filas_cursor(cur):
+    """fetchall() de un cursor común (tuplas) como lista de dicts, sin convertir valores."""
+    return json_rapido.filas(cur.column_names, cur.fetchall())
+
+def va_gzip(body):
+    """¿Se manda con gzip? Si el navegador lo acepta (Accept-Encoding) y el cuerpo es grande."""
+    return bool(request.accept_encodings["gzip"]) and len(body) >= GZIP_MINIMO
+
+def etag_gzip(etag):
+    # el cuerpo con gzip es otro: necesita otra ETag (si no, un caché intermedio
+    # puede revalidar una versión con la ETag de la otra)
+    return etag + "-gz"
+
+def comprimir_si_acepta(resp):
+    """gzip si el navegador lo acepta (Accept-Encoding) y la respuesta es grande."""
+    resp.vary.add("Accept-Encoding")
+    if resp.status_code != 200 or resp.direct_passthrough:
+        return resp
+    body = resp.get_data()
+    if not va_gzip(body):
+        return resp
+    resp.set_data(json_rapido.comprimir(body))
+    resp.headers["Content-Encoding"] = "gzip"
+    etag, debil = resp.get_etag()
+    if etag:
+        resp.set_etag(etag_gzip(etag), weak=debil)
+    return resp
+
+def respuesta_json(obj, version=None):
+    resp = app.response_class(json_rapido.dumps(obj), mimetype="application/json")
+    if version is not None:
+        resp.headers["X-Version"] = str(version)
+    return comprimir_si_acepta(resp)
+
+# ?stream=1: la respuesta se arma mientras se leen las filas del cursor sin
+# buffer (en memoria hay STREAM_LOTE filas a la vez, no la tabla entera).
+# La conexión queda tomada hasta que se termina de enviar.
+STREAM_LOTE = 500   # filas por fetchmany
+STREAM_MAX = 3      # descargas en streaming a la vez (cada una retiene una conexión del pool)
+
+_streams = threading.BoundedSemaphore(STREAM_MAX)
+
+def quiere_stream():
+    return request.args.get("stream") in ("1", "true")
+
+def respuesta_json_stream(conn, cur, version=None, limite=None):
+    """
+    cur: cursor sin buffer (conn.cursor(buffered=False)) con el SELECT ya ejecutado.
+    limite=None -> lista JSON.
+    limite=N    -> {"items": [...], "next_cursor"} como /api/ordenes (el SELECT trae N+1).
+    La conexión queda tomada mientras se envía (un navegador lento la retiene):
+    - como mucho STREAM_MAX a la vez; si ya están todas, la respuesta se
+      arma en memoria y la conexión se devuelve enseguida
+    - al terminar se cierran cursor y conexión; si el navegador corta, la
+      conexión se descarta (no se lee el resto del resultado)
+    """
+    columnas = cur.column_names
+    pagina = {"ultimo_id": None, "hay_mas": False}
+    pos_id = columnas.index("id") if limite is not None else None
+
+    def lotes():
+        quedan = limite
+        while quedan is None or quedan > 0:
+            tuplas = cur.fetchmany(STREAM_LOTE if quedan is None else min(STREAM_LOTE, quedan))
+            if not tuplas:
+                return
+            if quedan is not None:
+                quedan -= len(tuplas)
+                pagina["ultimo_id"] = tuplas[-1][pos_id]
+            yield tuplas
+        pagina["hay_mas"] = cur.fetchone() is not None
+
+    def json_partes():
+        if limite is None:
+            yield from json_rapido.partes_lista(columnas, lotes())
+        else:
+            yield b'{"items":'
+            yield from json_rapido.partes_lista(columnas, lotes())
+            siguiente = pagina["ultimo_id"] if pagina["hay_mas"] else None
+            yield b',"next_cursor":' + json_rapido.dumps(siguiente) + b"}"
+
+    if not _streams.acquire(blocking=False):
+        body = b"".join(json_partes())
+        cur.close(); conn.close()
+        resp = app.response_class(body, mimetype="application/json")
+        if version is not None:
+            resp.headers["X-Version"] = str(version)
+        return comprimir_si_acepta(resp)
+
+    # se sigue enviando después del request: la conexión ya no la devuelve el teardown
+    conns = g.get("_db_conns") or []
+    if conn in conns:
+        conns.remove(conn)
+
+    terminado = {"ok": False}
+
+    def generar():
+        yield from json_partes()
+        terminado["ok"] = True
+
+    interno = generar()
+    gz = bool(request.accept_encodings["gzip"])
+    partes = json_rapido.comprimir_por_partes(interno) if gz else interno
+
+    def cerrar():
+        # lo llama el servidor al terminar la respuesta, también si el navegador cortó
+        try:
+            partes.close()
+            interno.close()
+            if terminado["ok"]:
+                cur.close()
+                conn.close()
+            else:
+                conn.descartar()
+        finally:
+            _streams.release()
+
+    resp = Response(partes, mimetype="application/json")
+    resp.call_on_close(cerrar)
+    resp.vary.add("Accept-Encoding")
+    if gz:
+        resp.headers["Content-Encoding"] = "gzip"
+    if version is not None:
+        resp.headers["X-Version"] = str(version)
+    return resp
+
+
+# ========= CAMBIOS (sincronización por versión) =========
+# La tabla cambios (sql/004_cambios.sql) la llenan triggers: cada alta,
+# modificación o baja en ordenes/clientes/equipos deja una fila con una
+# versión nueva. Las listas completas mandan la versión en X-Version y
+# ?since=<versión> devuelve solo lo que cambió desde ahí:
+#   {"version": v, "items": [...], "borrados": [ids], "completo": false}
+# completo=true => hay demasiados cambios (o ya se podaron): recargar todo.
+#
+# La versión (AUTO_INCREMENT) se asigna en el INSERT pero se ve recién en el
+# COMMIT: una transacción larga (un lote del importador) puede tener la 100
+# sin commitear mientras otra ya commiteó la 101. Si al front se le diera
+# 101, la 100 no le llegaría nunca. Por eso la versión que se devuelve es la
+# "firme" (version_cambios): la última anterior al comienzo de toda
+# transacción abierta que ya escribió, y anterior a CAMBIOS_MARGEN segundos.
+# Lo que cambió después se vuelve a mandar en el próximo delta (el merge del
+# front es idempotente).
+CAMBIOS_MAX = 2000        # cambios por delta; si hay más, se pide recarga completa
+CAMBIOS_MARGEN = 5        # segundos: lo más nuevo que esto todavía no se da por firme
+CAMBIOS_TX_MAX = 120      # sin permiso PROCESS (no se ve INNODB_TRX): duración máxima de una transacción
+CAMBIOS_DIAS = 7          # purgar-cambios borra lo más viejo que esto
+
+# INNODB_TRX: transacciones abiertas (trx_rows_modified > 0 = ya escribieron,
+# o sea que pueden tener una versión sin commitear). Sus filas en cambios son
+# posteriores a trx_started.
+SQL_VERSION_FIRME = """
+    SELECT version
+    FROM cambios
+    WHERE fecha < LEAST(
+        NOW() - INTERVAL %s SECOND,
+        COALESCE((
+            SELECT MIN(trx_started)
+            FROM information_schema.INNODB_TRX
+            WHERE trx_rows_modified > 0 AND trx_mysql_thread_id <> CONNECTION_ID()
+        ), NOW())
+    )
+    ORDER BY fecha DESC, version DESC
+    LIMIT 1
+"""
+SQL_VERSION_FIRME_SIN_TRX = """
+    SELECT version
+    FROM cambios
+    WHERE fecha < NOW() - INTERVAL %s SECOND
+    ORDER BY fecha DESC, version DESC
+    LIMIT 1
+"""
+_cambios_ver_trx = True   # pasa a False si el usuario de la base no tiene PROCESS
+
+def version_cambios(cur):
+    """
+    Versión firme: toda versión <= a esta ya está commiteada (o no existe).
+    Leerla ANTES de consultar los datos, en la misma transacción.
+    """
+    global _cambios_ver_trx
+    if _cambios_ver_trx:
+        try:
+            cur.execute(SQL_VERSION_FIRME, (CAMBIOS_MARGEN,))
+        except Error as e:
+            if getattr(e, "errno", None) != 1227:   # ER_SPECIFIC_ACCESS_DENIED_ERROR
+                raise
+            _cambios_ver_trx = False
+            print(f"WARN cambios: sin permiso PROCESS, se supone que ninguna transacción dura más de {CAMBIOS_TX_MAX} s")
+    if not _cambios_ver_trx:
+        cur.execute(SQL_VERSION_FIRME_SIN_TRX, (CAMBIOS_TX_MAX,))
+    rows = cur.fetchall()
+    return int(rows[0][0]) if rows else 0
+
+def cambios_desde(cur, tabla, since):
+    """
+    Filas de `tabla` que cambiaron después de la versión `since`.
+    Devuelve (version, cambiados, borrados) o None si hay que recargar todo.
+    Trae todo lo visible después de `since`, pero la versión que devuelve es
+    la firme (version_cambios): lo que todavía no es firme vuelve a venir en
+    el próximo delta, junto con lo que se commitee tarde.
+    """
+    cur.execute("SELECT COALESCE(MIN(version), 1), COALESCE(MAX(version), 0) FROM cambios")
+    minima, maxima = (int(x) for x in cur.fetchone())
+    if since > maxima or since < minima - 1:
+        return None   # base nueva o cambios ya podados
+    # nunca para atrás: `since` ya era firme cuando se entregó
+    version = max(version_cambios(cur), since)
+
+    cur.execute(
+        """
+        SELECT fila_id, borrado
+        FROM cambios
+        WHERE tabla=%s AND version > %s
+        ORDER BY version
+        LIMIT %s
+        """,
+        (tabla, since, CAMBIOS_MAX + 1),
+    )
+    rows = cur.fetchall()
+    if len(rows) > CAMBIOS_MAX:
+        return None
+
+    ultimo = {}
+    for fila_id, borrado in rows:
+        ultimo[fila_id] = borrado   # vale el último evento de cada fila
+    cambiados = sorted(i for i, b in ultimo.items() if not b)
+    borrados = sorted(i for i, b in ultimo.items() if b)
+    return version, cambiados, borrados
+
+def _arg_since():
+    v = request.args.get("since")
+    if v in (None, ""):
+        return None
+    try:
+        return max(int(v), 0)
+    except ValueError:
+        return None
+
+def respuesta_delta(version, items, borrados):
+    return respuesta_json({"version": version, "items": items, "borrados": borrados, "completo": False})
+
+def respuesta_recarga():
+    return jsonify({"version": None, "items": [], "borrados": [], "completo": True})
+
+def _in(ids):
+    return "(" + ", ".join(["%s"] * len(ids)) + ")"
+
+@app.cli.command("purgar-cambios")
+def purgar_cambios():
+    """Borra del registro de cambios lo más viejo que CAMBIOS_DIAS días."""
+    conn = get_db()
+    cur = conn.cursor()
+    # la última fila queda siempre: de ahí sale la versión firme (version_cambios)
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM cambios")
+    ultima = cur.fetchone()[0]
+    cur.execute(
+        "DELETE FROM cambios WHERE fecha < NOW() - INTERVAL %s DAY AND version < %s",
+        (CAMBIOS_DIAS, ultima),
+    )
+    conn.commit()
+    print(f"Cambios purgados: {cur.rowcount}")
+    cur.close(); conn.close()
+
 
 # ========= PÁGINAS PRINCIPALES =========
 @app.route("/")
@@ -174,83 +659,222 @@ def ordenes():
 
 
 # ========= API CATÁLOGOS SENCILLOS (fallas / reparaciones / repuestos / accesorios) =========
-@app.route("/api/fallas", methods=["GET"])
-def api_fallas():
+# Cambian pocas veces por semana: se cachean en memoria ya serializados y se
+# sirven con ETag, así el navegador revalida y recibe 304 sin tocar la DB.
+# Los POST/DELETE de cada catálogo llaman a invalidar_catalogo().
+CATALOGOS_SQL = {
+    "fallas":       "SELECT id, descripcion FROM fallas ORDER BY descripcion",
+    "reparaciones": "SELECT id, descripcion FROM reparaciones ORDER BY descripcion",
+    # incluye costo para que el front pueda sumar
+    "repuestos":    "SELECT id, nombre, descripcion, costo FROM repuestos ORDER BY nombre",
+    "accesorios":   "SELECT id, nombre FROM accesorios ORDER BY nombre",
+}
+CATALOGOS_TTL = 300   # segundos; por si alguien escribe directo en la DB (ej: importador)
+
+_catalogos_cache = {}     # nombre -> (etag, body, cargado_en)
+_catalogos_version = {}   # nombre -> nro de invalidaciones
+_catalogos_lock = threading.Lock()
+
+def invalidar_catalogo(nombre):
+    with _catalogos_lock:
+        _catalogos_cache.pop(nombre, None)
+        _catalogos_version[nombre] = _catalogos_version.get(nombre, 0) + 1
+
+def _catalogo_cacheado(nombre):
+    with _catalogos_lock:
+        entrada = _catalogos_cache.get(nombre)
+        version = _catalogos_version.get(nombre, 0)
+    if entrada and monotonic() - entrada[2] < CATALOGOS_TTL:
+        return entrada
+
     conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT id, descripcion FROM fallas ORDER BY descripcion")
-    rows = cur.fetchall()
+    cur = conn.cursor()
+    cur.execute(CATALOGOS_SQL[nombre])
+    rows = filas_cursor(cur)
     cur.close()
     conn.close()
-    return jsonify(rows)
+
+    # json_rapido convierte DECIMAL (costo), fechas, etc.
+    body = json_rapido.dumps(rows)
+    entrada = (hashlib.sha1(body).hexdigest(), body, monotonic())
+
+    with _catalogos_lock:
+        # si lo invalidaron mientras consultaba, no guardo datos viejos
+        if _catalogos_version.get(nombre, 0) == version:
+            _catalogos_cache[nombre] = entrada
+    return entrada
+
+def _respuesta_catalogo(nombre):
+    etag, body, _ = _catalogo_cacheado(nombre)
+    # se decide antes de comparar If-None-Match: la ETag depende de si va con gzip
+    gz = va_gzip(body)
+    resp = app.response_class(body, mimetype="application/json")
+    resp.set_etag(etag_gzip(etag) if gz else etag)
+    resp.headers["Cache-Control"] = "no-cache"   # siempre revalidar (If-None-Match)
+    resp.vary.add("Accept-Encoding")
+    resp = resp.make_conditional(request)
+    if gz and resp.status_code == 200:
+        resp.set_data(json_rapido.comprimir(body))
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+@app.route("/api/fallas", methods=["GET"])
+def api_fallas():
+    return _respuesta_catalogo("fallas")
 
 
 @app.route("/api/reparaciones", methods=["GET"])
 def api_reparaciones():
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT id, descripcion FROM reparaciones ORDER BY descripcion")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return jsonify(rows)
+    return _respuesta_catalogo("reparaciones")
 
 
 @app.route("/api/repuestos", methods=["GET"])
 def api_repuestos():
     """Lista de repuestos (incluye costo para que el front pueda sumar)."""
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(
-        """
-        SELECT id, nombre, descripcion, costo
-        FROM repuestos
-        ORDER BY nombre
-        """
-    )
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    # normalizo por si algún día costo es DECIMAL, etc.
-    return jsonify([normalize_row(r) for r in rows])
+    return _respuesta_catalogo("repuestos")
 
 
 @app.route("/api/accesorios", methods=["GET"])
 def api_accesorios():
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT id, nombre FROM accesorios ORDER BY nombre")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return jsonify(rows)
+    return _respuesta_catalogo("accesorios")
 
 @app.route("/api/clientes", methods=["GET"])
 def api_clientes():
+    """
+    Todos los clientes. Con ?since=<versión>, solo los cambios (ver cambios_desde).
+    ?stream=1: ver respuesta_json_stream.
+    """
+    since = _arg_since()
     conn = get_db()
-    cur = conn.cursor(dictionary=True)
+    cur = conn.cursor(buffered=False)
+
+    if since is not None:
+        delta = cambios_desde(cur, "clientes", since)
+        if delta is None:
+            cur.close(); conn.close()
+            return respuesta_recarga()
+        version, cambiados, borrados = delta
+        rows = []
+        if cambiados:
+            cur.execute(f"SELECT * FROM clientes WHERE id IN {_in(cambiados)} ORDER BY id DESC", cambiados)
+            rows = filas_cursor(cur)
+        cur.close(); conn.close()
+        # los que ya no están (borrados entre el registro y la consulta) van como borrados
+        presentes = {r["id"] for r in rows}
+        borrados += [i for i in cambiados if i not in presentes]
+        return respuesta_delta(version, rows, borrados)
+
+    version = version_cambios(cur)
 
     # SELECT * para no romper si agregás/quitás columnas
     cur.execute("SELECT * FROM clientes ORDER BY id DESC")
+    if quiere_stream():
+        return respuesta_json_stream(conn, cur, version)
+    rows = filas_cursor(cur)
+    cur.close()
+    conn.close()
+
+    return respuesta_json(rows, version)
+
+CLIENTES_BUSCAR_DEFAULT = 20
+CLIENTES_BUSCAR_MAX = 200
+FT_MIN_TOKEN = 3   # innodb_ft_min_token_size: tokens más cortos no están en el FULLTEXT
+
+@app.route("/api/clientes/buscar", methods=["GET"])
+def api_clientes_buscar():
+    """
+    Búsqueda de clientes por nombre / teléfono / celular / CUIT / email /
+    dirección / localidad, sin tildes ni mayúsculas, sobre la columna indexada clientes.busqueda.
+    Todas las palabras tienen que aparecer (como prefijo de alguna palabra;
+    teléfono y celular también por sus últimos dígitos).
+      q     = texto a buscar (vacío = los últimos clientes cargados)
+      limit = cantidad máxima de resultados (default 20, máx 200)
+    """
+    limit = min(max(_arg_int("limit", CLIENTES_BUSCAR_DEFAULT), 1), CLIENTES_BUSCAR_MAX)
+    tokens = tokens_busqueda(request.args.get("q", ""))
+    largos = [t for t in tokens if len(t) >= FT_MIN_TOKEN]
+    cortos = [t for t in tokens if len(t) < FT_MIN_TOKEN]
+
+    conds, params, orden, orden_params = [], [], "c.id DESC", []
+
+    if largos:
+        # FULLTEXT en modo booleano: +palabra* = obligatoria, por prefijo
+        ft = " ".join(f"+{t}*" for t in largos)
+        conds.append("MATCH(c.busqueda) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(ft)
+        orden = "MATCH(c.busqueda) AGAINST (%s IN BOOLEAN MODE) DESC, c.id DESC"
+        orden_params = [ft]
+
+    for t in cortos:
+        # palabras cortas (más cortas que el token del FULLTEXT): prefijo de
+        # cualquier palabra de busqueda, no solo de la primera. Si son las únicas,
+        # MySQL recorre clientes por id DESC y corta al llegar a limit.
+        conds.append("(c.busqueda LIKE %s OR c.busqueda LIKE %s)")
+        params.extend([t + "%", "% " + t + "%"])
+
+    where = ("WHERE " + " AND ".join(conds)) if conds else ""
+
+    conn = get_db()
+    cur = conn.cursor()
+    version = version_cambios(cur)
+    cur.close()
+    cur = conn.cursor(dictionary=True)
+    cur.execute(
+        f"SELECT c.* FROM clientes c {where} ORDER BY {orden} LIMIT %s",
+        (*params, *orden_params, limit),
+    )
     rows = cur.fetchall()
     cur.close()
     conn.close()
 
     rows = [normalize_row(r) for r in rows]
-    return jsonify(rows)
+    resp = jsonify(rows)
+    resp.headers["X-Version"] = str(version)   # para seguir con /api/clientes?since=
+    return resp
 
-def _clientes_tiene_col(conn, colname: str) -> bool:
+@app.cli.command("reindexar-clientes")
+def reindexar_clientes():
+    """Recalcula clientes.busqueda para todos los clientes (flask --app app reindexar-clientes)."""
+    conn = get_db()
     cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT COUNT(*) AS c
-        FROM information_schema.COLUMNS
-        WHERE TABLE_SCHEMA = DATABASE()
-          AND TABLE_NAME = 'clientes'
-          AND COLUMN_NAME = %s
-    """, (colname,))
-    ok = (cur.fetchone() or {}).get("c", 0) > 0
-    cur.close()
-    return ok
+    cur_upd = conn.cursor()
+    ultimo, total = 0, 0
+    while True:
+        cur.execute(
+            """
+            SELECT id, nombre, telefono, cuit, email, direccion, localidad, celular
+            FROM clientes
+            WHERE id > %s
+            ORDER BY id
+            LIMIT 1000
+            """,
+            (ultimo,),
+        )
+        rows = cur.fetchall()
+        if not rows:
+            break
+        cur_upd.executemany(
+            "UPDATE clientes SET busqueda=%s WHERE id=%s",
+            [
+                (
+                    texto_busqueda_cliente(
+                        r["nombre"], r["telefono"], r["cuit"], r["email"], r["direccion"], r["localidad"],
+                        r["celular"],
+                    ),
+                    r["id"],
+                )
+                for r in rows
+            ],
+        )
+        conn.commit()
+        ultimo = rows[-1]["id"]
+        total += len(rows)
+    cur_upd.close(); cur.close(); conn.close()
+    print(f"Clientes reindexados: {total}")
+
+def _clientes_tiene_col(colname: str) -> bool:
+    return esquema.tiene_columna("clientes", colname)
+
 @app.route("/api/clientes", methods=["POST"])
 def api_clientes_crear():
     data = request.json or {}
@@ -284,6 +908,9 @@ def api_clientes_crear():
                 "id": existente["id"],
             }), 409
 
+        email = clean_email(data.get("email"))
+        cuit  = clean_digits(data.get("cuit")) or None
+
         cur = conn.cursor()
         cur.execute(
             """
@@ -291,8 +918,9 @@ def api_clientes_crear():
               (nombre, direccion, localidad, provincia, cp,
                telefono, email, cuit, contacto,
                observaciones, giro_empresa,
-               cliente_garantia, cliente_con_contrato)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+               cliente_garantia, cliente_con_contrato,
+               busqueda)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
             """,
             (
                 nombre,
@@ -301,13 +929,16 @@ def api_clientes_crear():
                 to_capitalize(data.get("provincia")) or None,
                 _clean_text(data.get("cp")) or None,
                 telefono,
-                clean_email(data.get("email")),
-                clean_digits(data.get("cuit")) or None,
+                email,
+                cuit,
                 to_capitalize(data.get("contacto")) or None,
                 to_capitalize(data.get("observaciones")) or None,
                 to_capitalize(data.get("giro_empresa")) or None,
                 data.get("cliente_garantia") or 0,
                 data.get("cliente_con_contrato") or 0,
+                texto_busqueda_cliente(
+                    nombre, telefono, cuit, email, data.get("direccion"), data.get("localidad")
+                ),
             ),
         )
         conn.commit()
@@ -358,6 +989,14 @@ def api_clientes_actualizar(cliente_id):
                 "id": duplicado["id"],
             }), 409
 
+        # el celular no se edita desde acá, pero va en busqueda
+        cur.execute("SELECT celular FROM clientes WHERE id=%s", (cliente_id,))
+        actual = cur.fetchone()
+        celular = actual["celular"] if actual else None
+
+        email = clean_email(data.get("email"))
+        cuit  = clean_digits(data.get("cuit")) or None
+
         cur = conn.cursor()
         cur.execute(
             """
@@ -374,7 +1013,8 @@ def api_clientes_actualizar(cliente_id):
                 observaciones=%s,
                 giro_empresa=%s,
                 cliente_garantia=%s,
-                cliente_con_contrato=%s
+                cliente_con_contrato=%s,
+                busqueda=%s
             WHERE id=%s
             """,
             (
@@ -384,16 +1024,22 @@ def api_clientes_actualizar(cliente_id):
                 to_capitalize(data.get("provincia")) or None,
                 _clean_text(data.get("cp")) or None,
                 telefono,
-                clean_email(data.get("email")),
-                clean_digits(data.get("cuit")) or None,
+                email,
+                cuit,
                 to_capitalize(data.get("contacto")) or None,
                 to_capitalize(data.get("observaciones")) or None,
                 to_capitalize(data.get("giro_empresa")) or None,
                 data.get("cliente_garantia") or 0,
                 data.get("cliente_con_contrato") or 0,
+                texto_busqueda_cliente(
+                    nombre, telefono, cuit, email, data.get("direccion"), data.get("localidad"),
+                    celular,
+                ),
                 cliente_id,
             ),
         )
+        # el nombre se muestra en la lista de equipos (equipo_propietario.clientes)
+        actualizar_propietarios_de_clientes(cur, [cliente_id])
         conn.commit()
         cur.close(); conn.close()
         return jsonify({"ok": True})
@@ -412,23 +1058,85 @@ def api_equipos():
     Devuelve los equipos junto con:
     - cliente_id (cliente principal propietario)
     - clientes (string con todos los clientes asociados, separador ", ")
+    Con ?since=<versión>, solo los cambios (ver cambios_desde).
+    ?stream=1 (lista completa): ver respuesta_json_stream.
     """
+    since = _arg_since()
     conn = get_db()
-    cur = conn.cursor(dictionary=True)
+    cur = conn.cursor(buffered=False)
+
+    where, params = "", []
+    if since is not None:
+        delta = cambios_desde(cur, "equipos", since)
+        cambios_cli = cambios_desde(cur, "clientes", since)
+        if delta is None or cambios_cli is None:
+            cur.close(); conn.close()
+            return respuesta_recarga()
+        version, cambiados, borrados = delta
+        # si cambió el nombre de un cliente, cambia la columna "clientes" de sus equipos
+        if cambios_cli[1]:
+            cur.execute(
+                f"SELECT equipo_id FROM equipo_propietario WHERE cliente_id IN {_in(cambios_cli[1])}",
+                cambios_cli[1],
+            )
+            cambiados = sorted(set(cambiados) | {r[0] for r in cur.fetchall()})
+        if not cambiados:
+            cur.close(); conn.close()
+            return respuesta_delta(version, [], borrados)
+        where, params = f"WHERE e.id IN {_in(cambiados)}", cambiados
+    else:
+        version = version_cambios(cur)
+
+    # propietario precalculado (equipo_propietario, ver propietarios.py): join por PK
     cur.execute(
-        """
+        f"""
         SELECT
             e.*,
-            MIN(CASE WHEN ec.activo = 1 THEN ec.cliente_id END) AS cliente_id,
-            GROUP_CONCAT(c.nombre SEPARATOR ', ') AS clientes
+            p.cliente_id,
+            p.clientes
         FROM equipos e
-        LEFT JOIN equipo_cliente ec
-               ON e.id = ec.equipo_id AND ec.activo = 1
-        LEFT JOIN clientes c
-               ON ec.cliente_id = c.id
-        GROUP BY e.id
+        LEFT JOIN equipo_propietario p ON p.equipo_id = e.id
+        {where}
         ORDER BY e.id DESC
+        """,
+        params,
+    )
+    if since is None and quiere_stream():
+        return respuesta_json_stream(conn, cur, version)
+    rows = filas_cursor(cur)
+    cur.close()
+    conn.close()
+
+    if since is not None:
+        presentes = {r["id"] for r in rows}
+        borrados += [i for i in cambiados if i not in presentes]
+        return respuesta_delta(version, rows, borrados)
+
+    return respuesta_json(rows, version)
+
+
+@app.route("/api/clientes/<int:cliente_id>/equipos", methods=["GET"])
+def api_equipos_de_cliente(cliente_id):
+    """
+    Equipos con vínculo activo al cliente (para el formulario de orden).
+    Usa idx_equipo_cliente_cliente_activo (sql/006_equipo_cliente_indice.sql).
+    Mismas columnas que /api/equipos.
+    """
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    cur.execute(
         """
+        SELECT
+            e.*,
+            ec.cliente_id,
+            p.clientes
+        FROM equipo_cliente ec
+        JOIN equipos e ON e.id = ec.equipo_id
+        LEFT JOIN equipo_propietario p ON p.equipo_id = e.id
+        WHERE ec.cliente_id = %s AND ec.activo = 1
+        ORDER BY e.id DESC
+        """,
+        (cliente_id,),
     )
     rows = cur.fetchall()
     cur.close()
@@ -552,6 +1260,7 @@ def vincular_equipo_cliente(conn, equipo_id, cliente_id, rol="propietario"):
 
     - Desactiva vínculos activos del equipo
     - Reactiva o inserta el vínculo con el cliente
+    - Actualiza equipo_propietario
     """
     cur = conn.cursor()
 
@@ -592,9 +1301,22 @@ def vincular_equipo_cliente(conn, equipo_id, cliente_id, rol="propietario"):
             (equipo_id, cliente_id, rol),
         )
 
+    # 3) propietario precalculado (lo lee /api/equipos)
+    actualizar_propietarios(cur, [equipo_id])
+
     conn.commit()
     cur.close()
 
+@app.cli.command("reconstruir-propietarios")
+def reconstruir_propietarios_cmd():
+    """Recalcula equipo_propietario completo (por si se tocó equipo_cliente a mano)."""
+    conn = get_db()
+    cur = conn.cursor()
+    reconstruir_propietarios(cur)
+    conn.commit()
+    cur.close(); conn.close()
+    print("Propietarios de equipos recalculados")
+
 # ========= API ÓRDENES =========
 
 def buscar_o_crear_cliente(conn, nombre, telefono):
@@ -616,38 +1338,408 @@ def buscar_o_crear_cliente(conn, nombre, telefono):
         return row[0]
 
     cur.execute(
-        "INSERT INTO clientes (nombre, telefono) VALUES (%s, %s)",
-        (nombre, telefono),
+        "INSERT INTO clientes (nombre, telefono, busqueda) VALUES (%s, %s, %s)",
+        (nombre, telefono, texto_busqueda_cliente(nombre, telefono)),
     )
     conn.commit()
     new_id = cur.lastrowid
     cur.close()
     return new_id
+ORDENES_PAGE_DEFAULT = 100
+ORDENES_PAGE_MAX = 500
+ORDENES_STREAM_MAX = 100000   # con ?stream=1 (no se junta la página en memoria)
+ESTADO_GRUPO_EN_PROCESO = "EN PROCESO"   # filtro: cualquiera de ESTADOS_EN_PROCESO
+
+def _arg_int(nombre, default=None):
+    v = request.args.get(nombre)
+    if v in (None, ""):
+        return default
+    try:
+        return int(v)
+    except ValueError:
+        return default
+
+def _estados_filtro(args):
+    """estado=EN SOS,TERMINADA (varios separados por coma; "EN PROCESO" = grupo) -> set."""
+    estados = set()
+    for v in args.getlist("estado"):
+        for e in str(v).split(","):
+            e = to_upper(e)
+            if not e:
+                continue
+            if e in (ESTADO_GRUPO_EN_PROCESO, "EN_PROCESO"):
+                estados |= ESTADOS_EN_PROCESO
+            else:
+                estados.add(e)
+    return estados
+
+def _filtros_ordenes(args, estados=None):
+    """
+    Arma el WHERE de la lista de órdenes a partir de los query params:
+      estado=EN SOS,TERMINADA  (ver _estados_filtro; `estados` lo reemplaza)
+      desde / hasta            (fecha de ingreso, YYYY-MM-DD, inclusive)
+      cliente_id, equipo_id
+    Devuelve (sql_where, params). sql_where es "" o empieza con "WHERE".
+    """
+    conds, params = [], []
+
+    if estados is None:
+        estados = _estados_filtro(args)
+    if estados:
+        conds.append("o.estado IN (" + ", ".join(["%s"] * len(estados)) + ")")
+        params.extend(sorted(estados))
+
+    desde = parse_fecha(args.get("desde"))
+    if desde:
+        conds.append("o.fecha >= %s")
+        params.append(desde)
+    hasta = parse_fecha(args.get("hasta"))
+    if hasta:
+        conds.append("o.fecha <= %s")
+        params.append(hasta)
+
+    for col in ("cliente_id", "equipo_id"):
+        v = args.get(col)
+        if v not in (None, "") and str(v).isdigit():
+            conds.append(f"o.{col} = %s")
+            params.append(int(v))
+
+    return ("WHERE " + " AND ".join(conds)) if conds else "", params
+
+# columnas de la lista de órdenes (sin WHERE)
+SQL_LISTA_ORDENES = """
+    SELECT
+        o.*,
+        c.nombre   AS nombre_contacto,
+        COALESCE(NULLIF(TRIM(c.telefono),''), NULLIF(TRIM(c.celular),''), '') AS telefono_contacto,
+        e.serie    AS serie_texto,
+        CONCAT_WS(' ', e.descripcion, e.marca, e.modelo) AS equipo_texto
+    FROM ordenes o
+    LEFT JOIN clientes c ON c.id = o.cliente_id
+    LEFT JOIN equipos   e ON e.id = o.equipo_id
+"""
+
+def _sql_pagina_ordenes(args, cursor, n):
+    """
+    SELECT de una página de la lista (n filas, keyset sobre o.id DESC, desde
+    `cursor`). Devuelve (sql, params).
+    Con un estado (o ninguno) el índice (estado, id) o la PK ya dan el orden y
+    la consulta corta a las n filas. Con varios (el grupo EN PROCESO), un
+    IN obliga a juntar todas las coincidencias y ordenarlas (filesort): se
+    arma un UNION ALL de una consulta por estado, cada una corta a las n por
+    su índice, y se ordena solo eso (a lo sumo n por estado).
+    Límite conocido: desde/hasta sin estado no tiene índice que dé el orden
+    por id; MySQL recorre la PK hacia atrás filtrando por fecha (rápido si el
+    rango es reciente) o usa (fecha, id) y ordena todo el rango.
+    """
+    estados = _estados_filtro(args)
+    grupos = [{e} for e in sorted(estados)] if len(estados) > 1 else [estados]
+
+    partes, params = [], []
+    for grupo in grupos:
+        where, p = _filtros_ordenes(args, grupo)
+        if cursor is not None:
+            where = (where + " AND " if where else "WHERE ") + "o.id < %s"
+            p.append(cursor)
+        partes.append(f"{SQL_LISTA_ORDENES} {where} ORDER BY o.id DESC LIMIT %s")
+        params += [*p, n]
+    if len(partes) == 1:
+        return partes[0], params
+    sql = " UNION ALL ".join(f"({x})" for x in partes) + " ORDER BY id DESC LIMIT %s"
+    return sql, [*params, n]
+
 @app.route("/api/ordenes", methods=["GET"])
 def api_ordenes():
+    """
+    Lista paginada de órdenes, de la más nueva a la más vieja.
+    Paginación keyset sobre o.id DESC (nada de OFFSET):
+      limit  = tamaño de página (default 100, máx 500; con ?stream=1 hasta ORDENES_STREAM_MAX)
+      cursor = next_cursor de la página anterior
+      stream=1 = se envía mientras se lee (ver respuesta_json_stream)
+    Filtros: ver _filtros_ordenes.
+    Devuelve {"items": [...], "next_cursor": id o null si no hay más}
+    y la versión de cambios en X-Version. ?since=<versión>: ver _delta_ordenes.
+    """
+    since = _arg_since()
+    if since is not None:
+        return _delta_ordenes(since)
+
+    stream = quiere_stream()
+    limit = min(max(_arg_int("limit", ORDENES_PAGE_DEFAULT), 1), ORDENES_STREAM_MAX if stream else ORDENES_PAGE_MAX)
+    cursor = _arg_int("cursor")
+
+    # pido una fila de más para saber si hay otra página
+    sql, params = _sql_pagina_ordenes(request.args, cursor, limit + 1)
+
     conn = get_db()
-    cur = conn.cursor(dictionary=True)
+    cur = conn.cursor(buffered=False)
+    version = version_cambios(cur)
+    cur.execute(sql, params)
+    if stream:
+        return respuesta_json_stream(conn, cur, version, limite=limit)
+    rows = filas_cursor(cur)
 
-    cur.execute("""
-        SELECT
-            o.*,
-            c.nombre   AS nombre_contacto,
-            COALESCE(NULLIF(TRIM(c.telefono),''), NULLIF(TRIM(c.celular),''), '') AS telefono_contacto,
-            e.serie    AS serie_texto,
-            CONCAT_WS(' ', e.descripcion, e.marca, e.modelo) AS equipo_texto
-        FROM ordenes o
-        LEFT JOIN clientes c ON c.id = o.cliente_id
-        LEFT JOIN equipos   e ON e.id = o.equipo_id
-        ORDER BY o.id DESC
-    """)
-    rows = cur.fetchall()
+    cur.close()
+    conn.close()
 
+    hay_mas = len(rows) > limit
+    rows = rows[:limit]
+    return respuesta_json({
+        "items": rows,
+        "next_cursor": rows[-1]["id"] if hay_mas else None,
+    }, version)
+
+def _delta_ordenes(since):
+    """
+    /api/ordenes?since=<versión> (con los mismos filtros que la lista):
+    items = órdenes que cambiaron y cumplen los filtros;
+    borrados = las que se borraron o ya no cumplen los filtros (sacarlas de la lista).
+    También vuelven las órdenes cuyo cliente o equipo cambió (nombre, serie...).
+    """
+    conn = get_db()
+    cur = conn.cursor()
+
+    delta = cambios_desde(cur, "ordenes", since)
+    cambios_cli = cambios_desde(cur, "clientes", since)
+    cambios_eq = cambios_desde(cur, "equipos", since)
+    if delta is None or cambios_cli is None or cambios_eq is None:
+        cur.close(); conn.close()
+        return respuesta_recarga()
+
+    version, cambiados, borrados = delta
+    ids = set(cambiados)
+    for col, (_, relacionados, _) in (("cliente_id", cambios_cli), ("equipo_id", cambios_eq)):
+        if relacionados:
+            cur.execute(f"SELECT id FROM ordenes WHERE {col} IN {_in(relacionados)}", relacionados)
+            ids.update(r[0] for r in cur.fetchall())
     cur.close()
+
+    if len(ids) > CAMBIOS_MAX:
+        conn.close()
+        return respuesta_recarga()
+
+    rows = []
+    if ids:
+        ids = sorted(ids)
+        where, params = _filtros_ordenes(request.args)
+        where = (where + " AND " if where else "WHERE ") + f"o.id IN {_in(ids)}"
+        cur = conn.cursor()
+        cur.execute(f"{SQL_LISTA_ORDENES} {where} ORDER BY o.id DESC", (*params, *ids))
+        rows = filas_cursor(cur)
+        cur.close()
     conn.close()
 
-    rows = [normalize_row(r) for r in rows]
-    return jsonify(rows)
+    presentes = {r["id"] for r in rows}
+    borrados += [i for i in ids if i not in presentes]
+    return respuesta_delta(version, rows, borrados)
+
+# ========= RESUMEN (tablero) =========
+# Totales calculados en la DB con GROUP BY; el tablero de la pared lo pide
+# cada pocos segundos, así que se guarda RESUMEN_TTL segundos ya serializado.
+RESUMEN_TTL = 5            # segundos
+RESUMEN_DIAS = 90          # ventana para las demoras promedio (órdenes ingresadas en los últimos N días)
+RESUMEN_TRAMOS = [(7, "0-7"), (15, "8-15"), (30, "16-30"), (60, "31-60")]   # días desde el ingreso
+RESUMEN_TRAMO_ULTIMO = "+60"
+
+_resumen_cache = {}              # dias -> (body, calculado_en)
+_resumen_calculando = {}         # dias -> Lock: uno solo recalcula cada ventana
+_resumen_lock = threading.Lock() # protege los dos dict (no se tiene durante la consulta)
+
+_SQL_TRAMO = "CASE " + " ".join(
+    f"WHEN DATEDIFF(CURDATE(), fecha) <= {hasta} THEN '{nombre}'" for hasta, nombre in RESUMEN_TRAMOS
+) + f" ELSE '{RESUMEN_TRAMO_ULTIMO}' END"
+
+def _promedio(v):
+    return None if v is None else round(float(v), 1)
+
+def _calcular_resumen(dias):
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+
+    cur.execute("SELECT estado, COUNT(*) AS n FROM ordenes GROUP BY estado")
+    por_estado = {to_upper(r["estado"]): int(r["n"]) for r in cur.fetchall()}
+
+    # AVG ignora los NULL: cada promedio usa las órdenes que tienen las dos fechas
+    cur.execute(
+        """
+        SELECT
+            AVG(DATEDIFF(fecha_salida, fecha))        AS ingreso_a_salida,
+            AVG(DATEDIFF(fecha_retiro, fecha_salida)) AS salida_a_retiro,
+            AVG(DATEDIFF(fecha_retiro, fecha))        AS ingreso_a_retiro,
+            COUNT(*) AS ordenes
+        FROM ordenes
+        WHERE fecha >= CURDATE() - INTERVAL %s DAY
+        """,
+        (dias,),
+    )
+    d = cur.fetchone() or {}
+
+    # antigüedad de lo que todavía está en el taller (o esperando que lo retiren)
+    cur.execute(
+        f"""
+        SELECT estado, {_SQL_TRAMO} AS tramo, COUNT(*) AS n
+        FROM ordenes
+        WHERE estado <> 'RETIRADA'
+        GROUP BY estado, tramo
+        """
+    )
+    tramos = [nombre for _, nombre in RESUMEN_TRAMOS] + [RESUMEN_TRAMO_ULTIMO]
+    antiguedad = {}
+    for r in cur.fetchall():
+        fila = antiguedad.setdefault(to_upper(r["estado"]), dict.fromkeys(tramos, 0))
+        fila[r["tramo"]] = int(r["n"])
+
+    cur.close(); conn.close()
+
+    resumen = {
+        "por_estado": por_estado,
+        "total": sum(por_estado.values()),
+        "en_proceso": sum(n for e, n in por_estado.items() if e in ESTADOS_EN_PROCESO),
+        "demora_dias": {
+            "dias": dias,
+            "ordenes": int(d.get("ordenes") or 0),
+            "ingreso_a_salida": _promedio(d.get("ingreso_a_salida")),
+            "salida_a_retiro": _promedio(d.get("salida_a_retiro")),
+            "ingreso_a_retiro": _promedio(d.get("ingreso_a_retiro")),
+        },
+        "antiguedad": antiguedad,
+        "generado": datetime.now().isoformat(timespec="seconds"),
+    }
+    return app.json.dumps(resumen).encode("utf-8")
+
+@app.route("/api/ordenes/resumen", methods=["GET"])
+def api_ordenes_resumen():
+    """
+    Cantidades por estado, demora promedio en días (ingreso -> salida -> retiro)
+    y antigüedad por tramos de lo que no se retiró.
+    ?dias=N cambia la ventana de las demoras (default RESUMEN_DIAS).
+    """
+    dias = min(max(_arg_int("dias", RESUMEN_DIAS), 1), 3650)
+    with _resumen_lock:
+        entrada = _resumen_cache.get(dias)
+        calculando = _resumen_calculando.setdefault(dias, threading.Lock())
+
+    # vencido: recalcula uno solo por ventana y los demás usan el anterior
+    # mientras tanto (nadie espera al pool ni a otro request). Sin anterior
+    # (primer pedido de esa ventana) se calcula sin esperar a nadie.
+    if not entrada or monotonic() - entrada[1] >= RESUMEN_TTL:
+        propio = calculando.acquire(blocking=False)
+        if propio or not entrada:
+            try:
+                entrada = (_calcular_resumen(dias), monotonic())
+            finally:
+                if propio:
+                    calculando.release()
+            with _resumen_lock:
+                if len(_resumen_cache) > 20:
+                    _resumen_cache.clear()
+                _resumen_cache[dias] = entrada
+
+    resp = app.response_class(entrada[0], mimetype="application/json")
+    resp.headers["Cache-Control"] = f"max-age={RESUMEN_TTL}"
+    return resp
+
+# ========= ESTADÍSTICAS DIARIAS (reportes) =========
+# estadisticas_diarias (sql/008_estadisticas_diarias.sql) tiene por día y
+# estado: recibidas, terminadas (salida), retiradas e importe de lo retirado.
+# La mantienen al día triggers sobre ordenes, dentro de la misma transacción
+# de crear/actualizar/transiciones; los reportes leen solo esa tabla.
+
+# una sola pasada por ordenes: cada orden sale tres veces (ingreso, salida, retiro)
+SQL_RECONSTRUIR_ESTADISTICAS = """
+    INSERT INTO estadisticas_diarias (dia, estado, recibidas, terminadas, retiradas, importe_retiradas)
+    SELECT
+        CASE t.k WHEN 1 THEN o.fecha WHEN 2 THEN o.fecha_salida ELSE o.fecha_retiro END AS dia,
+        COALESCE(o.estado, '') AS estado,
+        SUM(t.k = 1), SUM(t.k = 2), SUM(t.k = 3),
+        SUM(IF(t.k = 3, COALESCE(o.importe, 0), 0))
+    FROM ordenes o
+    JOIN (SELECT 1 AS k UNION ALL SELECT 2 UNION ALL SELECT 3) t
+    WHERE CASE t.k WHEN 1 THEN o.fecha WHEN 2 THEN o.fecha_salida ELSE o.fecha_retiro END IS NOT NULL
+    GROUP BY 1, 2   -- por posición: "estado" también es columna de ordenes
+"""
+
+@app.cli.command("reconstruir-estadisticas")
+def reconstruir_estadisticas_cmd():
+    """Recalcula estadisticas_diarias completa desde ordenes (por si se desfasó)."""
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM estadisticas_diarias")
+    cur.execute(SQL_RECONSTRUIR_ESTADISTICAS)
+    filas = cur.rowcount
+    conn.commit()
+    cur.close(); conn.close()
+    print(f"Estadísticas diarias recalculadas: {filas} filas")
+
+_ESTADISTICAS_PERIODOS = {
+    "dia": "DATE_FORMAT(dia, '%%Y-%%m-%%d')",
+    "mes": "DATE_FORMAT(dia, '%%Y-%%m')",
+    "anio": "DATE_FORMAT(dia, '%%Y')",
+}
+
+_SQL_SUMAS_ESTADISTICAS = """
+    SUM(recibidas) AS recibidas,
+    SUM(terminadas) AS terminadas,
+    SUM(retiradas) AS retiradas,
+    SUM(importe_retiradas) AS importe_retiradas
+"""
+
+def _sumas_estadisticas(r):
+    return {
+        "recibidas": int(r["recibidas"] or 0),
+        "terminadas": int(r["terminadas"] or 0),
+        "retiradas": int(r["retiradas"] or 0),
+        "importe_retiradas": float(r["importe_retiradas"] or 0),
+    }
+
+@app.route("/api/estadisticas", methods=["GET"])
+def api_estadisticas():
+    """
+    Reporte entre desde y hasta (YYYY-MM-DD, inclusive; default: el mes actual).
+    ?por=dia|mes|anio agrupa la serie (default mes).
+    Devuelve totales, por_estado (estado actual de esas órdenes) y la serie por período.
+    """
+    hoy = date.today()
+    desde = parse_fecha(request.args.get("desde")) or hoy.replace(day=1).isoformat()
+    hasta = parse_fecha(request.args.get("hasta")) or hoy.isoformat()
+    por = request.args.get("por") or "mes"
+    if por not in _ESTADISTICAS_PERIODOS:
+        return jsonify({"ok": False, "error": "por debe ser dia, mes o anio"}), 400
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    cur.execute(
+        f"""
+        SELECT estado, {_SQL_SUMAS_ESTADISTICAS}
+        FROM estadisticas_diarias
+        WHERE dia BETWEEN %s AND %s
+        GROUP BY estado
+        """,
+        (desde, hasta),
+    )
+    por_estado = {to_upper(r["estado"]): _sumas_estadisticas(r) for r in cur.fetchall()}
+
+    cur.execute(
+        f"""
+        SELECT {_ESTADISTICAS_PERIODOS[por]} AS periodo, {_SQL_SUMAS_ESTADISTICAS}
+        FROM estadisticas_diarias
+        WHERE dia BETWEEN %s AND %s
+        GROUP BY periodo
+        ORDER BY periodo
+        """,
+        (desde, hasta),
+    )
+    serie = [{"periodo": r["periodo"], **_sumas_estadisticas(r)} for r in cur.fetchall()]
+    cur.close(); conn.close()
 
+    totales = {k: sum(e[k] for e in por_estado.values()) for k in ("recibidas", "terminadas", "retiradas", "importe_retiradas")}
+    return jsonify({
+        "desde": desde,
+        "hasta": hasta,
+        "totales": totales,
+        "por_estado": por_estado,
+        "serie": serie,
+    })
 
 
 def normalizar_orden(data: dict) -> dict:
@@ -682,6 +1774,7 @@ def api_crear_falla():
     try:
         cur.execute("INSERT INTO fallas (descripcion) VALUES (%s)", (desc,))
         conn.commit()
+        invalidar_catalogo("fallas")
         new_id = cur.lastrowid
     except IntegrityError:
         # clave única duplicada
@@ -713,6 +1806,7 @@ def api_crear_reparacion():
     try:
         cur.execute("INSERT INTO reparaciones (descripcion) VALUES (%s)", (desc,))
         conn.commit()
+        invalidar_catalogo("reparaciones")
         new_id = cur.lastrowid
     except IntegrityError:
         return (
@@ -753,6 +1847,7 @@ def api_crear_repuesto():
         (nombre, descripcion, costo)
     )
     conn.commit()
+    invalidar_catalogo("repuestos")
     cur.close()
     conn.close()
     return jsonify({"ok": True})
@@ -766,6 +1861,7 @@ def api_borrar_falla(falla_id):
     try:
         cur.execute("DELETE FROM fallas WHERE id=%s", (falla_id,))
         conn.commit()
+        invalidar_catalogo("fallas")
 
         if cur.rowcount == 0:
             return jsonify({"ok": False, "error": "Falla no encontrada"}), 404
@@ -790,6 +1886,7 @@ def api_borrar_reparacion(reparacion_id):
     try:
         cur.execute("DELETE FROM reparaciones WHERE id=%s", (reparacion_id,))
         conn.commit()
+        invalidar_catalogo("reparaciones")
 
         if cur.rowcount == 0:
             return jsonify({"ok": False, "error": "Reparación no encontrada"}), 404
@@ -814,6 +1911,7 @@ def api_borrar_repuesto(repuesto_id):
     try:
         cur.execute("DELETE FROM repuestos WHERE id=%s", (repuesto_id,))
         conn.commit()
+        invalidar_catalogo("repuestos")
 
         if cur.rowcount == 0:
             return jsonify({"ok": False, "error": "Repuesto no encontrado"}), 404
@@ -829,35 +1927,166 @@ def api_borrar_repuesto(repuesto_id):
 
 @app.route("/api/ordenes/<int:orden_id>/docx", methods=["GET"])
 def descargar_docx_orden(orden_id):
+    """
+    Descarga el Word de la orden.
+    Si se está generando en segundo plano, espera hasta DOCX_ESPERA segundos.
+    Si falta o quedó viejo (la huella no coincide con la orden), lo genera en
+    el momento. ETag = huella de la orden, así las descargas repetidas son 304.
+    """
     filename = f"Orden_{orden_id}.docx"
-    return send_from_directory(DOCX_DIR, filename, as_attachment=True)
+
+    estado = cola_docx.esperar(orden_id, DOCX_ESPERA)
+    if estado in (PENDIENTE, GENERANDO):
+        return jsonify({"ok": False, "error": "El Word todavía se está generando, reintentá en unos segundos"}), 503
+
+    try:
+        huella = _render_docx(orden_id)
+    except PoolAgotadoError:
+        raise   # 503 (ver _pool_agotado)
+    except Exception as e:
+        print(f"Error generando Word de la orden {orden_id}:", e)
+        return jsonify({"ok": False, "error": "No se pudo generar el Word de la orden"}), 500
+    if huella is None:
+        return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
+
+    return send_from_directory(DOCX_DIR, filename, as_attachment=True, etag=huella)
+
+# ========= EXPORTACIÓN MASIVA (ZIP) =========
+DOCX_ZIP_MAX = 1000        # órdenes por zip como máximo
+DOCX_ZIP_PROCESOS = None   # None = uno por CPU
+DOCX_ZIP_TANDA = 4         # órdenes por trabajo del pool
+
+_procesos_docx = None
+_procesos_docx_lock = threading.Lock()
+
+def _pool_procesos_docx():
+    global _procesos_docx
+    with _procesos_docx_lock:
+        if _procesos_docx is None:
+            _procesos_docx = ProcessPoolExecutor(max_workers=DOCX_ZIP_PROCESOS)
+            atexit.register(_procesos_docx.shutdown)
+    return _procesos_docx
+
+class _SalidaZip(io.RawIOBase):
+    """Destino del ZipFile que no guarda el archivo: se va vaciando a medida que se escribe."""
+    def __init__(self):
+        self._buf = bytearray()
+    def writable(self):
+        return True
+    def write(self, b):
+        self._buf += b
+        return len(b)
+    def vaciar(self):
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+@app.route("/api/ordenes/docx/zip", methods=["GET", "POST"])
+def exportar_docx_zip():
+    """
+    Descarga un ZIP con el Word de muchas órdenes.
+    Se elige por ids (ids=1,2,3 o JSON {"ids": [...]}) o por los mismos filtros
+    de /api/ordenes (desde, hasta, estado, cliente_id, equipo_id).
+    Los documentos se generan en paralelo en un pool de procesos y el zip se
+    manda a medida que salen, sin armarlo en memoria.
+    """
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        args = MultiDict()
+        for k, v in data.items():
+            if k == "ids":
+                continue
+            if isinstance(v, list):
+                # varios estados como en ?estado=A,B; el resto es un solo valor
+                if k != "estado":
+                    return jsonify({"ok": False, "error": f"{k}: se esperaba un solo valor"}), 400
+                v = ",".join(str(x) for x in v)
+            args[k] = v
+        ids = data.get("ids") or []
+    else:
+        args = request.args
+        ids = [x for x in (args.get("ids") or "").split(",") if x.strip()]
+
+    try:
+        ids = sorted({int(x) for x in ids})
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "ids inválidos"}), 400
+
+    if ids:
+        where = "WHERE o.id IN (" + ", ".join(["%s"] * len(ids)) + ")"
+        params = ids
+    else:
+        where, params = _filtros_ordenes(args)
+        if not where:
+            return jsonify({"ok": False, "error": "Indicá ids o algún filtro (fechas, estado, cliente)"}), 400
+
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    cur.execute(f"{SQL_ORDEN_DOCX} {where} ORDER BY o.id LIMIT %s", (*params, DOCX_ZIP_MAX + 1))
+    ordenes = cur.fetchall()
+    cur.close()
+    conn.close()
+
+    if not ordenes:
+        return jsonify({"ok": False, "error": "No hay órdenes para exportar"}), 404
+    if len(ordenes) > DOCX_ZIP_MAX:
+        return jsonify({"ok": False, "error": f"Son más de {DOCX_ZIP_MAX} órdenes, acotá el filtro"}), 400
+
+    pool = _pool_procesos_docx()
+
+    def generar():
+        # de a DOCX_ZIP_TANDA órdenes por trabajo; todos encolados, se leen en orden
+        tandas = [ordenes[i:i + DOCX_ZIP_TANDA] for i in range(0, len(ordenes), DOCX_ZIP_TANDA)]
+        futuros = [pool.submit(docx_ordenes_bytes, t) for t in tandas]
+        try:
+            salida = _SalidaZip()
+            with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as z:
+                for tanda, futuro in zip(tandas, futuros):
+                    for orden, data in zip(tanda, futuro.result()):
+                        z.writestr(f"Orden_{orden['id']}.docx", data)
+                    yield salida.vaciar()
+            yield salida.vaciar()   # directorio central del zip
+        finally:
+            # el cliente cortó la descarga (o falló un documento): lo que no empezó no se genera
+            for futuro in futuros:
+                futuro.cancel()
+
+    nombre = f"ordenes_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+    return Response(
+        generar(),
+        mimetype="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
+
+@app.route("/api/ordenes/<int:orden_id>/docx/estado", methods=["GET"])
+def estado_docx_orden(orden_id):
+    """Estado del Word de la orden: pendiente / generando / listo / error / sin_trabajo."""
+    info = cola_docx.estado(orden_id) or {"estado": "sin_trabajo", "error": None}
+    info["existe"] = os.path.exists(os.path.join(DOCX_DIR, f"Orden_{orden_id}.docx"))
+    return jsonify({"ok": True, "id": orden_id, **info})
 @app.route("/api/ordenes/<int:orden_id>/reabrir", methods=["POST"])
 def reabrir_orden(orden_id):
     motivo = (request.json or {}).get("motivo", "").strip()
 
     conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT estado FROM ordenes WHERE id=%s", (orden_id,))
-    o = cur.fetchone()
-    if not o:
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
-
-    if o["estado"] not in ("TERMINADA", "RETIRADA"):
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE ordenes SET estado='EN REPARACION' WHERE id=%s AND estado IN ('TERMINADA', 'RETIRADA')",
+        (orden_id,)
+    )
+    if cur.rowcount == 0:
+        estado = _estado_orden(cur, orden_id)
+        conn.rollback()
         cur.close(); conn.close()
+        if estado is None:
+            return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
         return jsonify({"ok": False, "error": "Estado no permite reapertura"}), 400
 
-    cur2 = conn.cursor()
-    cur2.execute(
-        "UPDATE ordenes SET estado=%s WHERE id=%s",
-        ("EN REPARACION", orden_id)
-    )
     conn.commit()
+    _insert_hist(orden_id, "REOPEN", motivo or "Reapertura")
+    publicar_orden("reabierta", orden_id, estado="EN REPARACION")
 
-    _insert_hist(conn, orden_id, "REOPEN", motivo or "Reapertura")
-    conn.commit()
-
-    cur2.close(); cur.close(); conn.close()
+    cur.close(); conn.close()
     return jsonify({"ok": True})
 @app.route("/api/ordenes/<int:orden_id>/suspender", methods=["POST"])
 def suspender_orden(orden_id):
@@ -866,67 +2095,60 @@ def suspender_orden(orden_id):
         return jsonify({"ok": False, "error": "Motivo requerido"}), 400
 
     conn = get_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT estado FROM ordenes WHERE id=%s", (orden_id,))
-    o = cur.fetchone()
-    if not o:
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
-
-    if o["estado"] == "RETIRADA":
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "No se puede suspender una orden retirada"}), 400
-
-    cur2 = conn.cursor()
-    cur2.execute(
-        "UPDATE ordenes SET estado=%s WHERE id=%s",
-        ("SUSPENDIDA", orden_id)
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE ordenes SET estado='SUSPENDIDA' WHERE id=%s AND estado <> 'RETIRADA'",
+        (orden_id,)
     )
-    conn.commit()
+    if cur.rowcount == 0:
+        # 0 filas también si ya estaba SUSPENDIDA: eso sigue valiendo (queda el motivo nuevo)
+        estado = _estado_orden(cur, orden_id)
+        if estado is None or estado == ESTADO_RETIRADA:
+            conn.rollback()
+            cur.close(); conn.close()
+            if estado is None:
+                return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
+            return jsonify({"ok": False, "error": "No se puede suspender una orden retirada"}), 400
 
-    _insert_hist(conn, orden_id, "SUSPEND", motivo)
     conn.commit()
+    _insert_hist(orden_id, "SUSPEND", motivo)
+    publicar_orden("suspendida", orden_id, estado="SUSPENDIDA")
 
-    cur2.close(); cur.close(); conn.close()
+    cur.close(); conn.close()
     return jsonify({"ok": True})
 
-
 @app.route("/api/ordenes/<int:orden_id>/duplicar", methods=["POST"])
 def duplicar_orden(orden_id):
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("SELECT * FROM ordenes WHERE id=%s", (orden_id,))
-    o = cur.fetchone()
-    if not o:
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
-
-    copia = dict(o)
-    copia.pop("id", None)
-
-    copia["estado"] = "EN REPARACION"
-    copia["fecha_salida"] = None
-    copia["hora_salida"] = None
-    copia["fecha_regreso"] = None
-    copia["hora_regreso"] = None
-
-    cols = list(copia.keys())
-    placeholders = ", ".join(["%s"] * len(cols))
+    # la copia vuelve a EN REPARACION y sin salida/regreso; el resto se copia igual
+    cambios = {
+        "estado": "'EN REPARACION'",
+        "fecha_salida": "NULL",
+        "hora_salida": "NULL",
+        "fecha_regreso": "NULL",
+        "hora_regreso": "NULL",
+    }
+    # columnas de ordenes según el esquema cargado (sin traer la fila a Python)
+    cols = [c for c in esquema.columnas("ordenes") if c != "id"]
     colnames = ", ".join(cols)
+    valores = ", ".join(cambios.get(c, c) for c in cols)
 
-    cur2 = conn.cursor()
-    cur2.execute(
-        f"INSERT INTO ordenes ({colnames}) VALUES ({placeholders})",
-        [copia[c] for c in cols]
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute(
+        f"INSERT INTO ordenes ({colnames}) SELECT {valores} FROM ordenes WHERE id=%s",
+        (orden_id,)
     )
-    new_id = cur2.lastrowid
-    conn.commit()
+    if cur.rowcount == 0:
+        conn.rollback()
+        cur.close(); conn.close()
+        return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
+    new_id = cur.lastrowid
 
-    _insert_hist(conn, new_id, "DUPLICATE", f"Duplicada desde orden #{orden_id}")
     conn.commit()
+    _insert_hist(new_id, "DUPLICATE", f"Duplicada desde orden #{orden_id}")
+    publicar_orden("duplicada", new_id, estado="EN REPARACION", origen=orden_id)
 
-    cur2.close(); cur.close(); conn.close()
+    cur.close(); conn.close()
     return jsonify({"ok": True, "id": new_id})
 
 # ========= API ÓRDENES =========
@@ -1015,13 +2237,13 @@ def crear_orden():
     # importe
     try:
         importe = float(str(data.get("importe") or 0).replace(",", "."))
-    except:
+    except ValueError:
         importe = 0.0
 
+    # la conexión vuelve al pool al terminar el request (_devolver_conexiones)
+    conn = get_db()
+    cur = conn.cursor()
     try:
-        conn = get_db()
-        cur = conn.cursor()
-
         cur.execute(
             """
             INSERT INTO ordenes (
@@ -1058,23 +2280,20 @@ def crear_orden():
                 estado,
             )
         )
-
         conn.commit()
-        orden_id = cur.lastrowid
+    except Error:
+        app.logger.exception("Error crear_orden")
+        conn.rollback()
+        return jsonify({"ok": False, "error": "Error al crear orden"}), 500
 
-        # si tenés word:
-        try:
-            generar_word_de_orden(conn, orden_id)
-        except Exception as e:
-            print("WARN word:", e)
+    orden_id = cur.lastrowid
+    cur.close()
 
-        cur.close()
-        conn.close()
-        return jsonify({"ok": True, "id": orden_id})
+    # el Word se genera en segundo plano (ver cola_docx)
+    cola_docx.encolar(orden_id)
+    publicar_orden("creada", orden_id, estado=estado)
 
-    except Exception as e:
-        print("Error crear_orden:", e)
-        return jsonify({"ok": False, "error": "Error al crear orden"}), 500
+    return jsonify({"ok": True, "id": orden_id})
 
 
 # =========================
@@ -1084,10 +2303,10 @@ def crear_orden():
 def actualizar_orden(orden_id):
     data = request.get_json(silent=True) or {}
 
+    # la conexión vuelve al pool al terminar el request (_devolver_conexiones)
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
     try:
-        conn = get_db()
-        cur = conn.cursor(dictionary=True)
-
         # Traer estado actual
         cur.execute("""
             SELECT id, cliente_id, equipo_id, estado,
@@ -1100,7 +2319,6 @@ def actualizar_orden(orden_id):
         actual = cur.fetchone()
 
         if not actual:
-            cur.close(); conn.close()
             return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
 
         # mantener si no mandan
@@ -1109,7 +2327,6 @@ def actualizar_orden(orden_id):
 
         # bloquear cambio de equipo SOLO si el front lo manda distinto
         if data.get("equipo_id") and str(data.get("equipo_id")) != str(actual["equipo_id"]):
-            cur.close(); conn.close()
             return jsonify({"ok": False, "error": "No se puede cambiar el equipo de la orden"}), 409
 
         estado_actual = to_upper(actual.get("estado") or "EN REPARACION")
@@ -1125,7 +2342,7 @@ def actualizar_orden(orden_id):
         # importe
         try:
             importe = float(str(data.get("importe") or 0).replace(",", "."))
-        except:
+        except ValueError:
             importe = 0.0
 
         # tomar timestamps que vengan, o conservar DB
@@ -1151,13 +2368,11 @@ def actualizar_orden(orden_id):
         # -> RETIRADA (solo si venía TERMINADA)
         if estado_nuevo == ESTADO_RETIRADA:
             if estado_actual != ESTADO_TERMINADA:
-                cur.close(); conn.close()
                 return jsonify({"ok": False, "error": "Para retirar, la orden debe estar TERMINADA"}), 400
             if not fecha_retiro:
                 fecha_retiro, hora_retiro = now_fecha_hora()
 
-        cur2 = conn.cursor()
-        cur2.execute("""
+        cur.execute("""
             UPDATE ordenes
             SET cliente_id=%s,
                 equipo_id=%s,
@@ -1193,24 +2408,19 @@ def actualizar_orden(orden_id):
             hora_retiro,
             orden_id
         ))
-
         conn.commit()
+    except Error:
+        app.logger.exception("Error actualizar_orden %s", orden_id)
+        conn.rollback()
+        return jsonify({"ok": False, "error": "Error al actualizar orden"}), 500
 
-        # opcional: regenerar Word
-        try:
-            generar_word_de_orden(conn, orden_id)
-        except Exception as e:
-            print("WARN word:", e)
-
-        cur2.close()
-        cur.close()
-        conn.close()
+    cur.close()
 
-        return jsonify({"ok": True})
+    # regenerar Word en segundo plano
+    cola_docx.encolar(orden_id)
+    publicar_orden("modificada", orden_id, estado=estado_nuevo)
 
-    except Exception as e:
-        print("Error actualizar_orden:", e)
-        return jsonify({"ok": False, "error": "Error al actualizar orden"}), 500
+    return jsonify({"ok": True})
 
 @app.route("/api/ordenes/<int:orden_id>", methods=["GET"])
 def api_orden_por_id(orden_id):
@@ -1242,32 +2452,27 @@ def api_orden_por_id(orden_id):
     return jsonify(row)
 @app.route("/api/ordenes/<int:orden_id>/retirar", methods=["POST"])
 def orden_retirar(orden_id):
-    conn = get_db()
-    cur = conn.cursor(dictionary=True)
+    f, h = now_fecha_hora()
 
-    cur.execute("SELECT id, estado, fecha_retiro, hora_retiro FROM ordenes WHERE id=%s", (orden_id,))
-    o = cur.fetchone()
-    if not o:
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
-
-    if o["estado"] != "TERMINADA":
+    conn = get_db()
+    cur = conn.cursor()
+    # hora antes que fecha: en SET, MySQL ya ve la fecha nueva a la derecha
+    cur.execute("""
+        UPDATE ordenes
+        SET hora_retiro  = IF(fecha_retiro IS NULL, %s, hora_retiro),
+            fecha_retiro = IF(fecha_retiro IS NULL, %s, fecha_retiro),
+            estado = 'RETIRADA'
+        WHERE id=%s AND estado='TERMINADA'
+    """, (h, f, orden_id))
+    if cur.rowcount == 0:
+        estado = _estado_orden(cur, orden_id)
+        conn.rollback()
         cur.close(); conn.close()
+        if estado is None:
+            return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
         return jsonify({"ok": False, "error": "Para retirar, la orden debe estar TERMINADA"}), 400
-
-    if not o["fecha_retiro"]:
-        f, h = now_fecha_hora()
-    else:
-        f, h = o["fecha_retiro"], o["hora_retiro"]
-
-    cur2 = conn.cursor()
-    cur2.execute("""
-        UPDATE ordenes
-        SET estado='RETIRADA', fecha_retiro=%s, hora_retiro=%s
-        WHERE id=%s
-    """, (f, h, orden_id))
     conn.commit()
-    cur2.close()
+    publicar_orden("retirada", orden_id, estado="RETIRADA")
 
     cur.close(); conn.close()
     return jsonify({"ok": True})
@@ -1275,28 +2480,26 @@ def orden_retirar(orden_id):
 @app.route("/api/ordenes/<int:orden_id>/terminar", methods=["POST"])
 def orden_terminar(orden_id):
     conn = get_db()
-    cur = conn.cursor(dictionary=True)
-
-    cur.execute("SELECT id, estado, fecha_salida, hora_salida FROM ordenes WHERE id=%s", (orden_id,))
-    o = cur.fetchone()
-    if not o:
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
-
-    if o["estado"] == "RETIRADA":
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "La orden ya está retirada"}), 400
-
-    # opcional: si querés setear salida automática al terminar, descomentá:
-    # if not o["fecha_salida"]:
-    #     f, h = now_fecha_hora()
-    # else:
-    #     f, h = o["fecha_salida"], o["hora_salida"]
+    cur = conn.cursor()
 
-    cur2 = conn.cursor()
-    cur2.execute("UPDATE ordenes SET estado='TERMINADA' WHERE id=%s", (orden_id,))
+    # opcional: si querés setear salida automática al terminar, sumá al SET:
+    #   hora_salida  = IF(fecha_salida IS NULL, %s, hora_salida),
+    #   fecha_salida = IF(fecha_salida IS NULL, %s, fecha_salida),
+    cur.execute(
+        "UPDATE ordenes SET estado='TERMINADA' WHERE id=%s AND estado <> 'RETIRADA'",
+        (orden_id,)
+    )
+    if cur.rowcount == 0:
+        # 0 filas también si ya estaba TERMINADA
+        estado = _estado_orden(cur, orden_id)
+        if estado is None or estado == ESTADO_RETIRADA:
+            conn.rollback()
+            cur.close(); conn.close()
+            if estado is None:
+                return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
+            return jsonify({"ok": False, "error": "La orden ya está retirada"}), 400
     conn.commit()
-    cur2.close()
+    publicar_orden("terminada", orden_id, estado="TERMINADA")
 
     cur.close(); conn.close()
     return jsonify({"ok": True})
@@ -1304,31 +2507,146 @@ def orden_terminar(orden_id):
 
 @app.route("/api/ordenes/<int:orden_id>/salida", methods=["POST"])
 def orden_registrar_salida(orden_id):
+    f, h = now_fecha_hora()
+
     conn = get_db()
-    cur = conn.cursor(dictionary=True)
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE ordenes SET fecha_salida=%s, hora_salida=%s
+        WHERE id=%s AND estado <> 'RETIRADA' AND fecha_salida IS NULL
+    """, (f, h, orden_id))
+    if cur.rowcount:
+        conn.commit()
+        publicar_orden("modificada", orden_id)
+    else:
+        # 0 filas: no existe, está retirada o ya tenía salida (eso no es error)
+        estado = _estado_orden(cur, orden_id)
+        conn.rollback()
+        if estado is None or estado == ESTADO_RETIRADA:
+            cur.close(); conn.close()
+            if estado is None:
+                return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
+            return jsonify({"ok": False, "error": "La orden ya está retirada"}), 400
 
-    cur.execute("SELECT id, estado, fecha_salida, hora_salida FROM ordenes WHERE id=%s", (orden_id,))
-    o = cur.fetchone()
-    if not o:
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "Orden no encontrada"}), 404
+    cur.close(); conn.close()
+    return jsonify({"ok": True})
 
-    if o["estado"] == "RETIRADA":
-        cur.close(); conn.close()
-        return jsonify({"ok": False, "error": "La orden ya está retirada"}), 400
+# ========= TRANSICIONES EN LOTE =========
+# Para cuando vuelve una caja del service externo: se marcan muchas órdenes
+# de una vez. Mismas reglas que actualizar_orden, con un UPDATE condicional
+# por lote y un solo commit.
+LOTE_MAX = 200   # órdenes por pedido
+
+_EN_PROCESO_SQL = ", ".join(f"%(ep{i})s" for i in range(len(ESTADOS_EN_PROCESO)))
+
+# En SET, MySQL usa los valores ya asignados a la izquierda: hora antes que
+# fecha y estado al final, para que las condiciones vean la fila original.
+TRANSICIONES_LOTE = {
+    # EN PROCESO -> TERMINADA setea la salida si no tenía
+    "terminar": {
+        "estado": ESTADO_TERMINADA,
+        "permitido": lambda estado: estado != ESTADO_RETIRADA,
+        "error": "La orden ya está retirada",
+        "evento": "terminada",
+        "sql": f"""
+            UPDATE ordenes
+            SET hora_salida  = IF(estado IN ({_EN_PROCESO_SQL}) AND fecha_salida IS NULL, %(hora)s, hora_salida),
+                fecha_salida = IF(estado IN ({_EN_PROCESO_SQL}) AND fecha_salida IS NULL, %(fecha)s, fecha_salida),
+                estado = 'TERMINADA'
+            WHERE id IN {{ids}} AND estado <> 'RETIRADA'
+        """,
+    },
+    # -> RETIRADA solo si venía TERMINADA
+    "retirar": {
+        "estado": ESTADO_RETIRADA,
+        "permitido": lambda estado: estado == ESTADO_TERMINADA,
+        "error": "Para retirar, la orden debe estar TERMINADA",
+        "evento": "retirada",
+        "sql": """
+            UPDATE ordenes
+            SET hora_retiro  = IF(fecha_retiro IS NULL, %(hora)s, hora_retiro),
+                fecha_retiro = IF(fecha_retiro IS NULL, %(fecha)s, fecha_retiro),
+                estado = 'RETIRADA'
+            WHERE id IN {ids} AND estado = 'TERMINADA'
+        """,
+    },
+    # registra la salida sin cambiar el estado; si ya tenía, no la pisa
+    "salida": {
+        "estado": None,
+        "permitido": lambda estado: estado != ESTADO_RETIRADA,
+        "error": "La orden ya está retirada",
+        "evento": "modificada",
+        "sql": """
+            UPDATE ordenes
+            SET hora_salida  = IF(fecha_salida IS NULL, %(hora)s, hora_salida),
+                fecha_salida = IF(fecha_salida IS NULL, %(fecha)s, fecha_salida)
+            WHERE id IN {ids} AND estado <> 'RETIRADA'
+        """,
+    },
+}
 
-    if not o["fecha_salida"]:
-        f, h = now_fecha_hora()
-        cur2 = conn.cursor()
-        cur2.execute("""
-            UPDATE ordenes SET fecha_salida=%s, hora_salida=%s
-            WHERE id=%s
-        """, (f, h, orden_id))
-        conn.commit()
-        cur2.close()
+@app.route("/api/ordenes/lote/<accion>", methods=["POST"])
+def ordenes_transicion_lote(accion):
+    """
+    Body: {"ids": [..]}. accion: terminar | retirar | salida.
+    Devuelve un resultado por id: {"id", "ok", "estado"} o {"id", "ok": False, "error"}.
+    """
+    if accion not in TRANSICIONES_LOTE:
+        return jsonify({"ok": False, "error": "Acción desconocida"}), 400
+
+    ids = (request.get_json(silent=True) or {}).get("ids") or []
+    # un string o un dict también se iteran: "123" serían las órdenes 1, 2 y 3
+    if not isinstance(ids, list):
+        return jsonify({"ok": False, "error": "ids debe ser una lista de números de orden"}), 400
+    if not ids:
+        return jsonify({"ok": False, "error": "No se indicaron órdenes"}), 400
+    if len(ids) > LOTE_MAX:
+        return jsonify({"ok": False, "error": f"Máximo {LOTE_MAX} órdenes por vez"}), 400
+    try:
+        ids = list(dict.fromkeys(int(x) for x in ids))
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "ids debe ser una lista de números de orden"}), 400
+
+    t = TRANSICIONES_LOTE[accion]
+    fecha, hora = now_fecha_hora()
+    params = {"fecha": fecha, "hora": hora}
+    params.update({f"ep{i}": v for i, v in enumerate(sorted(ESTADOS_EN_PROCESO))})
+    params.update({f"id{i}": v for i, v in enumerate(ids)})
+    marcas = "(" + ", ".join(f"%(id{i})s" for i in range(len(ids))) + ")"
 
+    conn = get_db()
+    cur = conn.cursor(dictionary=True)
+    try:
+        # bloquea las filas: el UPDATE ve los mismos estados que se informan
+        cur.execute(f"SELECT id, estado FROM ordenes WHERE id IN {_in(ids)} FOR UPDATE", ids)
+        estados = {r["id"]: to_upper(r["estado"]) for r in cur.fetchall()}
+        cur.execute(t["sql"].format(ids=marcas), params)
+        conn.commit()
+    except Error as e:
+        conn.rollback()
+        cur.close(); conn.close()
+        print("Error transicion lote:", e)
+        return jsonify({"ok": False, "error": "Error al actualizar las órdenes"}), 500
     cur.close(); conn.close()
-    return jsonify({"ok": True})
+
+    resultados = []
+    for orden_id in ids:
+        estado = estados.get(orden_id)
+        if estado is None:
+            resultados.append({"id": orden_id, "ok": False, "error": "Orden no encontrada"})
+        elif not t["permitido"](estado):
+            resultados.append({"id": orden_id, "ok": False, "error": t["error"]})
+        else:
+            estado = t["estado"] or estado
+            resultados.append({"id": orden_id, "ok": True, "estado": estado})
+            cola_docx.encolar(orden_id)
+            publicar_orden(t["evento"], orden_id, estado=estado)
+
+    return jsonify({
+        "ok": True,
+        "aplicadas": sum(1 for r in resultados if r["ok"]),
+        "resultados": resultados,
+    })
 
 if __name__ == "__main__":
     # host 0.0.0.0 para que lo vean otras PCs de la red
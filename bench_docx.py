@@ -0,0 +1,57 @@
+# bench_docx.py
+"""
+Microbenchmark: Word de una orden con python-docx vs. con plantilla.
+
+    python bench_docx.py            # 200 órdenes por motor
+    python bench_docx.py 1000
+"""
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from orden_docx import generar_docx_orden
+from orden_docx_plantilla import generar_docx_orden_rapido
+
+
+def _orden(i):
+    return {
+        "id": i,
+        "estado": "EN REPARACION",
+        "fecha": date(2024, 1, 1) + timedelta(days=i % 365),
+        "hora_ingreso": timedelta(hours=9, minutes=i % 60),
+        "nombre_contacto": f"Cliente de prueba {i}",
+        "telefono_contacto": "3415551234",
+        "equipo_texto": "Impresora Epson L3150",
+        "serie_texto": f"X5NZ{i:06d}",
+        "importe": 15000.5,
+        "accesorios": "Cable usb + fuente",
+        "falla": "No toma papel - hace ruido al encender",
+        "reparacion": "Limpieza + cambio de rodillo",
+        "repuestos": "Rodillo pick up",
+        "observaciones": "Cliente pide presupuesto antes de reparar",
+        "fecha_retiro": date(2024, 2, 1) if i % 2 else None,
+        "hora_retiro": "10:15" if i % 2 else None,
+    }
+
+
+def _medir(nombre, fn, n, carpeta):
+    fn(_orden(0), carpeta, filename="calentar.docx")  # carga plantilla / imports
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(_orden(i), carpeta, filename=f"{nombre}_{i}.docx")
+    dt = time.perf_counter() - t0
+    print(f"{nombre:12s} {n} órdenes en {dt:.3f}s  ->  {dt / n * 1000:.2f} ms/orden")
+    return dt
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as carpeta:
+        lento = _medir("python-docx", generar_docx_orden, n, carpeta)
+        rapido = _medir("plantilla", generar_docx_orden_rapido, n, carpeta)
+    print(f"plantilla es {lento / rapido:.1f}x más rápida")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# bench_json.py
+"""
+Microbenchmark: JSON de la lista de órdenes con normalize_row + jsonify
+(como era antes) vs. json_rapido (tuplas -> bytes), y el tamaño con gzip.
+
+    python bench_json.py            # 50000 órdenes
+    python bench_json.py 10000
+"""
+import json
+import sys
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from decimal import Decimal
+
+from flask import Flask, jsonify
+
+import json_rapido
+
+# columnas de SQL_LISTA_ORDENES (o.* + las del JOIN)
+COLUMNAS = (
+    "id", "fecha", "hora_ingreso", "cliente_id", "equipo_id", "estado",
+    "falla", "observaciones", "accesorios", "reparacion", "repuestos", "importe",
+    "fecha_salida", "hora_salida", "fecha_regreso", "hora_regreso",
+    "fecha_retiro", "hora_retiro",
+    "nombre_contacto", "telefono_contacto", "serie_texto", "equipo_texto",
+)
+
+
+def normalize_row(row: dict) -> dict:
+    # copia de app.normalize_row (importar app abre el pool y los hilos)
+    out = {}
+    for k, v in row.items():
+        if isinstance(v, (date, datetime)):
+            out[k] = v.isoformat()
+        elif isinstance(v, dtime):
+            out[k] = v.strftime("%H:%M:%S")
+        elif isinstance(v, timedelta):
+            total = int(v.total_seconds())
+            h = total // 3600
+            m = (total % 3600) // 60
+            s = total % 60
+            out[k] = f"{h:02d}:{m:02d}:{s:02d}"
+        else:
+            out[k] = v
+    return out
+
+
+def _fila(i):
+    # tipos como los entrega mysql-connector: DATE, TIME (timedelta), DECIMAL
+    retirada = i % 3 == 0
+    return (
+        100000 - i,
+        date(2024, 1, 1) + timedelta(days=i % 365),
+        timedelta(hours=9, minutes=i % 60),
+        i % 5000,
+        i,
+        "RETIRADA" if retirada else "EN REPARACION",
+        "No toma papel - hace ruido al encender",
+        "Cliente pide presupuesto antes de reparar",
+        "Cable usb + fuente",
+        "Limpieza + cambio de rodillo",
+        "Rodillo pick up",
+        Decimal("15000.50") + i,
+        date(2024, 2, 1) if retirada else None,
+        timedelta(hours=11) if retirada else None,
+        None,
+        None,
+        date(2024, 2, 3) if retirada else None,
+        timedelta(hours=10, minutes=15) if retirada else None,
+        f"Cliente de prueba {i % 5000}",
+        "3415551234",
+        f"X5NZ{i:06d}",
+        "Impresora Epson L3150",
+    )
+
+
+def _medir(nombre, fn, repeticiones=3):
+    fn()  # calentar
+    mejor = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        body = fn()
+        dt = time.perf_counter() - t0
+        mejor = dt if mejor is None else min(mejor, dt)
+    print(f"{nombre:28s} {mejor * 1000:8.1f} ms  {len(body) / 1e6:6.2f} MB")
+    return mejor, body
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    tuplas = [_fila(i) for i in range(n)]
+    print(f"{n} órdenes, {len(COLUMNAS)} columnas (orjson: {'sí' if json_rapido.orjson else 'no'})")
+
+    app = Flask(__name__)
+
+    def antes():
+        # cursor(dictionary=True) + normalize_row + jsonify
+        filas = [dict(zip(COLUMNAS, t)) for t in tuplas]
+        with app.app_context():
+            return jsonify({"items": [normalize_row(r) for r in filas], "next_cursor": None}).get_data()
+
+    def ahora():
+        return json_rapido.dumps({"items": json_rapido.filas(COLUMNAS, tuplas), "next_cursor": None})
+
+    def ahora_gzip():
+        return json_rapido.comprimir(ahora())
+
+    lento, body_antes = _medir("normalize_row + jsonify", antes)
+    rapido, body_ahora = _medir("json_rapido", ahora)
+    con_gzip, _ = _medir("json_rapido + gzip", ahora_gzip)
+
+    assert json.loads(body_antes) == json.loads(body_ahora), "el JSON no coincide"
+    print(f"json_rapido es {lento / rapido:.1f}x más rápido (con gzip: {lento / con_gzip:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# cola_docx.py
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+PENDIENTE = "pendiente"
+GENERANDO = "generando"
+LISTO = "listo"
+ERROR = "error"
+
+
+class _Trabajo:
+    def __init__(self, orden_id: int):
+        self.orden_id = orden_id
+        self.estado = PENDIENTE
+        self.repetir = False          # la orden cambió mientras se generaba
+        self.error: Optional[str] = None
+        self.encolado = datetime.now()
+        self.terminado: Optional[datetime] = None
+        self.evento = threading.Event()
+
+
+class ColaRender:
+    """
+    Genera los Word de las órdenes en segundo plano.
+    - render(orden_id) hace el trabajo (lee la orden de la DB y escribe el .docx)
+    - max_workers: cuántos documentos se generan a la vez
+    - si se encola una orden que ya está pendiente, no se duplica el trabajo;
+      si se está generando, se vuelve a generar al terminar (con los datos nuevos)
+    """
+
+    def __init__(self, render: Callable[[int], Any], max_workers: int = 2, historial: int = 1000):
+        self._render = render
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="docx")
+        self._lock = threading.Lock()
+        self._trabajos: "OrderedDict[int, _Trabajo]" = OrderedDict()
+        self._historial = historial
+
+    def encolar(self, orden_id: int):
+        with self._lock:
+            t = self._trabajos.get(orden_id)
+            if t and t.estado == PENDIENTE:
+                return
+            if t and t.estado == GENERANDO:
+                t.repetir = True
+                return
+            t = _Trabajo(orden_id)
+            self._trabajos[orden_id] = t
+            self._trabajos.move_to_end(orden_id)
+            self._podar()
+        self._pool.submit(self._correr, t)
+
+    def _correr(self, t: _Trabajo):
+        while True:
+            with self._lock:
+                t.estado = GENERANDO
+                t.repetir = False
+            error = None
+            try:
+                self._render(t.orden_id)
+            except Exception as e:
+                error = str(e)
+                print(f"WARN word orden {t.orden_id}:", e)
+            with self._lock:
+                if t.repetir:
+                    continue
+                t.estado = ERROR if error else LISTO
+                t.error = error
+                t.terminado = datetime.now()
+                t.evento.set()
+                return
+
+    def _podar(self):
+        # solo se olvidan trabajos terminados, los más viejos primero
+        while len(self._trabajos) > self._historial:
+            for oid, t in self._trabajos.items():
+                if t.evento.is_set():
+                    del self._trabajos[oid]
+                    break
+            else:
+                return
+
+    def estado(self, orden_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            t = self._trabajos.get(orden_id)
+            if not t:
+                return None
+            return {
+                "estado": t.estado,
+                "error": t.error,
+                "encolado": t.encolado.isoformat(timespec="seconds"),
+                "terminado": t.terminado.isoformat(timespec="seconds") if t.terminado else None,
+            }
+
+    def esperar(self, orden_id: int, timeout: float) -> Optional[str]:
+        """Espera hasta timeout segundos a que termine; devuelve el estado (o None si no hay trabajo)."""
+        with self._lock:
+            t = self._trabajos.get(orden_id)
+        if not t:
+            return None
+        t.evento.wait(timeout)
+        with self._lock:
+            return t.estado
+
+    def cerrar(self):
+        self._pool.shutdown(wait=True)
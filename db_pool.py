@@ -0,0 +1,198 @@
+# db_pool.py
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Dict
+
+import mysql.connector
+from mysql.connector import Error
+
+
+class PoolAgotadoError(Exception):
+    """No se pudo obtener una conexión libre dentro del timeout."""
+
+
+class ConexionPool:
+    """
+    Envoltorio de una conexión del pool.
+    Se usa igual que la conexión de mysql.connector (cursor, commit, rollback...),
+    pero close() la devuelve al pool en vez de cerrarla.
+    """
+
+    def __init__(self, pool: "PoolMySQL", raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        return getattr(raw, name)
+
+    @property
+    def devuelta(self) -> bool:
+        return self._raw is None
+
+    def close(self):
+        # idempotente: los handlers a veces cierran dos veces
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._devolver(raw)
+
+    def descartar(self):
+        """
+        Cierra la conexión en vez de devolverla (libera el cupo igual).
+        Para un resultado sin buffer a medio leer: devolverla obligaría a
+        leer todas las filas que faltan.
+        """
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._devolver(raw, descartar=True)
+
+
+class PoolMySQL:
+    """
+    Pool de conexiones MySQL.
+    - max_size: conexiones abiertas como máximo (en uso + libres)
+    - timeout: segundos que se espera por una conexión libre antes de fallar
+    - ping_idle: si una conexión estuvo libre más de estos segundos, se verifica
+      que siga viva antes de entregarla (0 = verificar siempre)
+    """
+
+    def __init__(
+        self,
+        db_config: Dict[str, Any],
+        max_size: int = 10,
+        timeout: float = 5.0,
+        ping_idle: float = 0.0,
+    ):
+        self.db_config = dict(db_config)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_idle = ping_idle
+
+        self._libres: "queue.LifoQueue" = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "creadas": 0,
+            "reutilizadas": 0,
+            "descartadas": 0,
+            "pedidos": 0,
+            "esperas": 0,
+            "timeouts": 0,
+            "en_uso": 0,
+            "pico_en_uso": 0,
+            "espera_total_ms": 0.0,
+            "espera_max_ms": 0.0,
+        }
+
+    # ---------- checkout ----------
+    def get(self) -> ConexionPool:
+        t0 = time.monotonic()
+
+        if not self._cupos.acquire(blocking=False):
+            self._sumar("esperas")
+            if not self._cupos.acquire(timeout=self.timeout):
+                self._sumar("timeouts")
+                raise PoolAgotadoError(
+                    f"Sin conexiones libres después de {self.timeout}s (max_size={self.max_size})"
+                )
+
+        try:
+            raw = self._tomar_libre() or self._nueva()
+        except Exception:
+            self._cupos.release()
+            raise
+
+        espera_ms = (time.monotonic() - t0) * 1000
+        with self._lock:
+            st = self._stats
+            st["pedidos"] += 1
+            st["en_uso"] += 1
+            st["pico_en_uso"] = max(st["pico_en_uso"], st["en_uso"])
+            st["espera_total_ms"] += espera_ms
+            st["espera_max_ms"] = max(st["espera_max_ms"], espera_ms)
+
+        return ConexionPool(self, raw)
+
+    def _tomar_libre(self):
+        while True:
+            try:
+                raw, devuelta_en = self._libres.get_nowait()
+            except queue.Empty:
+                return None
+
+            if time.monotonic() - devuelta_en >= self.ping_idle:
+                try:
+                    vivo = raw.is_connected()  # hace ping al server
+                except Exception:
+                    vivo = False
+                if not vivo:
+                    self._descartar(raw)
+                    continue
+
+            self._sumar("reutilizadas")
+            return raw
+
+    def _nueva(self):
+        raw = mysql.connector.connect(**self.db_config)
+        self._sumar("creadas")
+        return raw
+
+    # ---------- devolución ----------
+    def _devolver(self, raw, descartar: bool = False):
+        try:
+            if descartar:
+                self._descartar(raw)
+                return
+            # cierra la transacción/snapshot que haya quedado abierta
+            # (un SELECT sin commit deja leyendo datos viejos en REPEATABLE READ)
+            if raw.unread_result:
+                raw.consume_results()
+            raw.rollback()
+            self._libres.put((raw, time.monotonic()))
+        except Exception:
+            self._descartar(raw)
+        finally:
+            with self._lock:
+                self._stats["en_uso"] -= 1
+            self._cupos.release()
+
+    def _descartar(self, raw):
+        self._sumar("descartadas")
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    # ---------- utilidades ----------
+    def _sumar(self, clave: str, n: int = 1):
+        with self._lock:
+            self._stats[clave] += n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+        out["max_size"] = self.max_size
+        out["timeout"] = self.timeout
+        out["libres"] = self._libres.qsize()
+        out["espera_prom_ms"] = round(out["espera_total_ms"] / out["pedidos"], 3) if out["pedidos"] else 0.0
+        out["espera_total_ms"] = round(out["espera_total_ms"], 3)
+        out["espera_max_ms"] = round(out["espera_max_ms"], 3)
+        return out
+
+    def cerrar_todo(self):
+        """Cierra las conexiones libres (las que están en uso se cierran al devolverse)."""
+        while True:
+            try:
+                raw, _ = self._libres.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                raw.close()
+            except Exception:
+                pass
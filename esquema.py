@@ -0,0 +1,75 @@
+# esquema.py
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Tuple
+
+SQL_COLUMNAS = """
+    SELECT TABLE_NAME, COLUMN_NAME
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+
+class Esquema:
+    """
+    Tablas y columnas de la base, leídas una sola vez de information_schema
+    (que en MySQL es lento) y guardadas en memoria.
+    - cargar() hace la lectura; columnas()/tiene_columna() cargan solas si
+      todavía no se pudo (p. ej. la base no estaba levantada al arrancar)
+    - refrescar() vuelve a leer: llamarlo después de correr un sql/NNN_*.sql
+      con el servidor andando
+    obtener_conexion: función sin argumentos que devuelve una conexión
+    (get_db de app.py); se le hace close() al terminar.
+    """
+
+    def __init__(self, obtener_conexion: Callable):
+        self._obtener_conexion = obtener_conexion
+        self._lock = threading.Lock()
+        self._tablas: "Dict[str, Tuple[str, ...]] | None" = None
+        self._stats = {"cargas": 0}
+
+    def cargar(self):
+        conn = self._obtener_conexion()
+        try:
+            cur = conn.cursor()
+            cur.execute(SQL_COLUMNAS)
+            filas = cur.fetchall()
+            cur.close()
+        finally:
+            conn.close()
+
+        tablas: Dict[str, list] = {}
+        for tabla, columna in filas:
+            tablas.setdefault(tabla, []).append(columna)
+        with self._lock:
+            self._tablas = {t: tuple(cols) for t, cols in tablas.items()}
+            self._stats["cargas"] += 1
+
+    refrescar = cargar
+
+    def _cargado(self) -> Dict[str, Tuple[str, ...]]:
+        tablas = self._tablas
+        if tablas is None:
+            self.cargar()
+            tablas = self._tablas
+        return tablas
+
+    def tablas(self) -> Tuple[str, ...]:
+        return tuple(self._cargado())
+
+    def columnas(self, tabla: str) -> Tuple[str, ...]:
+        """Columnas de la tabla en el orden de la definición (vacío si no existe)."""
+        return self._cargado().get(tabla, ())
+
+    def tiene_columna(self, tabla: str, columna: str) -> bool:
+        return columna in self.columnas(tabla)
+
+    def stats(self):
+        with self._lock:
+            tablas = self._tablas or {}
+            return {
+                **self._stats,
+                "tablas": {t: len(cols) for t, cols in sorted(tablas.items())},
+            }
@@ -0,0 +1,89 @@
+# eventos.py
+from __future__ import annotations
+
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterator
+
+FIN = None   # marca para cortar un stream
+
+
+class Difusor:
+    """
+    Reparte eventos a los navegadores conectados por Server-Sent Events.
+    - publicar(evento) lo encola para cada suscriptor (no bloquea nunca)
+    - suscribir() es un generador de texto SSE para usar en un Response
+    - max_pendientes: si un navegador no lee (PC colgada, red lenta), al
+      llenarse su cola se lo desconecta; al reconectar, el front sincroniza
+      por versión y no pierde nada
+    Funciona dentro de un proceso (el servidor Flask de app.py).
+    """
+
+    def __init__(self, max_pendientes: int = 100, keepalive: float = 15.0):
+        self.max_pendientes = max_pendientes
+        self.keepalive = keepalive
+        self._lock = threading.Lock()
+        self._colas: "set[queue.Queue]" = set()
+        self._seq = 0
+        self._stats = {"publicados": 0, "descartados": 0}
+
+    def publicar(self, evento: Dict[str, Any]):
+        with self._lock:
+            self._seq += 1
+            data = f"id: {self._seq}\nevent: {evento.get('tipo', 'message')}\ndata: {json.dumps(evento, ensure_ascii=False, default=str)}\n\n"
+            colas = list(self._colas)
+            self._stats["publicados"] += 1
+        for q in colas:
+            try:
+                q.put_nowait(data)
+            except queue.Full:
+                # cliente que no lee: se lo corta (reconecta solo)
+                self._quitar(q)
+                with self._lock:
+                    self._stats["descartados"] += 1
+
+    def _quitar(self, q: "queue.Queue"):
+        with self._lock:
+            self._colas.discard(q)
+        # le hago lugar a la marca de fin para que su generador termine
+        while True:
+            try:
+                q.put_nowait(FIN)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def suscribir(self) -> Iterator[str]:
+        q: "queue.Queue" = queue.Queue(maxsize=self.max_pendientes)
+        with self._lock:
+            self._colas.add(q)
+        try:
+            # el navegador reintenta a los 3s si se corta
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    data = q.get(timeout=self.keepalive)
+                except queue.Empty:
+                    # comentario SSE: mantiene viva la conexión (proxies, NAT)
+                    yield ": ping\n\n"
+                    continue
+                if data is FIN:
+                    return
+                yield data
+        finally:
+            with self._lock:
+                self._colas.discard(q)
+
+    def cerrar(self):
+        with self._lock:
+            colas = list(self._colas)
+        for q in colas:
+            self._quitar(q)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "conectados": len(self._colas)}
@@ -0,0 +1,240 @@
+# historial.py
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+SQL_INSERT = """
+    INSERT INTO orden_historial ({columnas})
+    VALUES {valores}
+"""
+COLUMNAS = ("orden_id", "usuario", "accion", "nota")   # + fecha si la tabla la tiene
+
+_FIN = object()   # marca para que el hilo termine (después de vaciar la cola)
+
+Fila = Tuple[int, str, str, Optional[str], datetime]
+
+
+class EscritorHistorial:
+    """
+    Escribe orden_historial en segundo plano, así el request no espera el INSERT.
+    - registrar(...) encola la fila con la hora del evento y vuelve enseguida
+      (no bloquea nunca)
+    - un hilo junta hasta `lote` filas, o lo que haya a los `intervalo`
+      segundos, y las escribe con un INSERT multi-fila
+    - si no hay conexión (base caída, pool agotado: errores de `reintentables`)
+      el lote se guarda y se reintenta esperando cada vez más (de espera_min
+      a espera_max segundos); mientras tanto lo nuevo queda en la cola
+    - si un lote falla por otra cosa se reintenta fila por fila (una fila mala
+      no se lleva al resto); lo que no se pudo escribir queda en el log y en stats()
+    - max_pendientes acota la memoria si la base no responde: al llenarse, lo
+      nuevo se descarta (y se cuenta)
+    - cerrar() escribe lo pendiente y termina el hilo (si la base sigue caída,
+      lo que queda se da por perdido)
+    - el hilo arranca con el primer registrar(): los procesos del zip, que en
+      Windows vuelven a importar app.py (spawn), no lo arrancan
+    obtener_conexion: función sin argumentos que devuelve una conexión
+    (get_db de app.py); se le hace close() al terminar cada lote.
+    con_fecha: función sin argumentos, True si orden_historial tiene la
+    columna fecha (sql/007); si no, se escribe sin ella (queda la hora del INSERT).
+    """
+
+    def __init__(
+        self,
+        obtener_conexion: Callable,
+        lote: int = 200,
+        intervalo: float = 1.0,
+        max_pendientes: int = 10000,
+        reintentables: Tuple[Type[BaseException], ...] = (),
+        espera_min: float = 0.5,
+        espera_max: float = 30.0,
+        con_fecha: Callable[[], bool] = lambda: True,
+    ):
+        self._obtener_conexion = obtener_conexion
+        self._con_fecha = con_fecha
+        self.lote = lote
+        self.intervalo = intervalo
+        self.reintentables = reintentables
+        self.espera_min = espera_min
+        self.espera_max = espera_max
+        self._cola: "queue.Queue" = queue.Queue(maxsize=max_pendientes)
+        self._cerrando = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = {
+            "encolados": 0,
+            "escritos": 0,
+            "lotes": 0,
+            "errores": 0,      # lotes o filas que fallaron al escribir
+            "reintentos": 0,   # lotes guardados para reintentar (sin conexión)
+            "perdidos": 0,     # filas que no se pudieron escribir
+            "descartados": 0,  # filas que no entraron en la cola (llena)
+            "ultimo_error": None,
+        }
+        self._hilo = threading.Thread(target=self._correr, name="historial", daemon=True)
+
+    def _arrancar(self):
+        if self._hilo.ident is None:
+            with self._lock:
+                if self._hilo.ident is None:
+                    self._hilo.start()
+
+    def registrar(self, orden_id: int, usuario: str, accion: str, nota: Optional[str] = None,
+                  fecha: Optional[datetime] = None):
+        self._arrancar()
+        try:
+            self._cola.put_nowait((orden_id, usuario, accion, nota, fecha or datetime.now()))
+        except queue.Full:
+            with self._lock:
+                self._stats["descartados"] += 1
+            print(f"WARN historial: cola llena, se descarta {accion} de la orden {orden_id}")
+            return
+        with self._lock:
+            self._stats["encolados"] += 1
+
+    def _juntar(self) -> Tuple[List[Fila], bool]:
+        """Hasta `lote` filas de la cola (espera la primera). Devuelve (filas, fin)."""
+        filas: List[Fila] = []
+        item = self._cola.get()
+        limite = time.monotonic() + self.intervalo
+        while True:
+            if item is _FIN:
+                return filas, True
+            filas.append(item)
+            if len(filas) >= self.lote:
+                return filas, False
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return filas, False
+            try:
+                item = self._cola.get(timeout=restante)
+            except queue.Empty:
+                return filas, False
+
+    def _correr(self):
+        fin = False
+        while not fin:
+            filas, fin = self._juntar()
+            espera = self.espera_min
+            # sin conexión: el mismo lote se reintenta hasta que entre (o se cierre)
+            while filas:
+                filas = self._escribir(filas)
+                if not filas:
+                    break
+                if self._cerrando.wait(espera):
+                    self._perder_todo(filas)
+                    return
+                espera = min(espera * 2, self.espera_max)
+
+    def _perder_todo(self, filas: List[Fila]):
+        # cerrando con la base caída: lo retenido y lo que quedó en la cola
+        while True:
+            try:
+                item = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _FIN:
+                filas.append(item)
+        self._fallo(RuntimeError("sin conexión al cerrar"), filas)
+
+    def _escribir(self, filas: List[Fila]) -> List[Fila]:
+        """Escribe el lote. Devuelve lo que quedó sin escribir por falta de conexión."""
+        try:
+            con_fecha = self._con_fecha()
+            conn = self._obtener_conexion()
+        except self.reintentables as e:
+            self._reintento(e)
+            return filas
+        except Exception as e:
+            self._fallo(e, filas)
+            return []
+        try:
+            cur = conn.cursor()
+            try:
+                self._insertar(cur, filas, con_fecha)
+                conn.commit()
+                self._ok(len(filas))
+                return []
+            except self.reintentables as e:
+                self._reintento(e)
+                return filas
+            except Exception as e:
+                # el lote falló entero: se reintenta de a una para salvar el resto
+                self._deshacer(conn)
+                self._error(e)
+                for i, fila in enumerate(filas):
+                    try:
+                        self._insertar(cur, [fila], con_fecha)
+                        conn.commit()
+                        self._ok(1)
+                    except self.reintentables as e2:
+                        self._reintento(e2)
+                        return filas[i:]
+                    except Exception as e2:
+                        self._deshacer(conn)
+                        self._fallo(e2, [fila])
+                return []
+            finally:
+                try:
+                    cur.close()
+                except Exception:
+                    pass
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _deshacer(conn):
+        try:
+            conn.rollback()
+        except Exception:
+            pass   # conexión rota: el pool la descarta al devolverla
+
+    @staticmethod
+    def _insertar(cur, filas: List[Fila], con_fecha: bool):
+        columnas = COLUMNAS + ("fecha",) if con_fecha else COLUMNAS
+        n = len(columnas)
+        fila_sql = "(" + ", ".join(["%s"] * n) + ")"
+        cur.execute(
+            SQL_INSERT.format(columnas=", ".join(columnas), valores=", ".join([fila_sql] * len(filas))),
+            [v for fila in filas for v in fila[:n]],
+        )
+
+    def _ok(self, n: int):
+        with self._lock:
+            self._stats["escritos"] += n
+            self._stats["lotes"] += 1
+
+    def _error(self, e: Exception):
+        with self._lock:
+            self._stats["errores"] += 1
+            self._stats["ultimo_error"] = str(e)
+
+    def _reintento(self, e: Exception):
+        self._error(e)
+        with self._lock:
+            self._stats["reintentos"] += 1
+
+    def _fallo(self, e: Exception, filas: List[Fila]):
+        self._error(e)
+        with self._lock:
+            self._stats["perdidos"] += len(filas)
+        for fila in filas:
+            print("ERROR historial (no se guardó):", fila, e)
+
+    def cerrar(self, timeout: float = 10.0):
+        if not self._hilo.is_alive():
+            return
+        self._cerrando.set()   # corta la espera entre reintentos
+        # la marca va al final: antes se escribe todo lo encolado
+        try:
+            self._cola.put(_FIN, timeout=timeout)
+        except queue.Full:
+            print("WARN historial: no se pudo vaciar la cola al cerrar")
+            return
+        self._hilo.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "pendientes": self._cola.qsize()}
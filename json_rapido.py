@@ -0,0 +1,95 @@
+# json_rapido.py
+"""
+JSON de las listas grandes (órdenes, clientes, equipos, repuestos) directo a bytes.
+
+Las filas vienen como tuplas del cursor (sin dictionary=True) y se arman los
+dict con zip, sin pasar cada valor por normalize_row. orjson convierte solo
+date/datetime/time; lo que no conoce (TIME de MySQL = timedelta, DECIMAL)
+pasa por _convertir, una vez por valor. El resultado es el mismo JSON que
+daba normalize_row + jsonify (DECIMAL como texto, igual que Flask).
+Si orjson no está instalado se usa json de la biblioteca estándar.
+
+Medición: python bench_json.py
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import zlib
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Sequence
+
+# nivel 1: en la red del local la diferencia de tamaño con el 5 es poca y
+# comprime en menos de la mitad del tiempo (ver bench_json.py)
+GZIP_NIVEL = 1
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def _convertir(v: Any):
+    # TIME de MySQL viene como timedelta: "HH:MM:SS" (igual que normalize_row)
+    if isinstance(v, timedelta):
+        total = int(v.total_seconds())
+        return f"{total // 3600:02d}:{(total % 3600) // 60:02d}:{total % 60:02d}"
+    if isinstance(v, Decimal):
+        return str(v)
+    # solo llegan acá sin orjson (él ya los convierte)
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, time):
+        return v.strftime("%H:%M:%S")
+    if isinstance(v, (bytes, bytearray)):
+        return bytes(v).decode("utf-8", "replace")
+    raise TypeError(f"No se puede pasar a JSON: {type(v).__name__}")
+
+
+def filas(columnas: Sequence[str], tuplas: Iterable[Sequence[Any]]) -> List[dict]:
+    """Tuplas del cursor -> dicts {columna: valor} (columnas = cur.column_names)."""
+    columnas = tuple(columnas)
+    return [dict(zip(columnas, t)) for t in tuplas]
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_convertir, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_convertir, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def comprimir(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=GZIP_NIVEL)
+
+
+def partes_lista(columnas: Sequence[str], lotes: Iterable[Sequence[Sequence[Any]]]) -> Iterator[bytes]:
+    """
+    JSON de una lista de filas, de a partes: `lotes` son listas de tuplas
+    (cur.fetchmany); cada lote sale como un pedazo del array.
+    """
+    columnas = tuple(columnas)
+    yield b"["
+    separador = b""
+    for tuplas in lotes:
+        if not tuplas:
+            continue
+        yield separador + dumps(filas(columnas, tuplas))[1:-1]
+        separador = b","
+    yield b"]"
+
+
+def comprimir_por_partes(partes: Iterable[bytes]) -> Iterator[bytes]:
+    """gzip de una respuesta que se va generando (memoria acotada, sin juntar todo)."""
+    z = zlib.compressobj(GZIP_NIVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)   # 16+: formato gzip
+    try:
+        for parte in partes:
+            out = z.compress(parte)
+            if out:
+                yield out
+        yield z.flush()
+    finally:
+        # si se corta, cerrar también el generador de adentro (no esperar al GC)
+        cerrar = getattr(partes, "close", None)
+        if cerrar is not None:
+            cerrar()
@@ -0,0 +1,78 @@
+# normalizar.py
+# Normalización de textos compartida entre app.py y los scripts de setup_import/.
+import re
+import unicodedata
+
+
+def _clean_text(s: str) -> str:
+    if not s:
+        return ""
+    s = str(s).strip()
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(c for c in s if unicodedata.category(c) != "Mn")  # sin tildes
+    s = re.sub(r"\s+", " ", s)
+    return s
+
+def clean_digits(s: str) -> str:
+    return re.sub(r"\D", "", _clean_text(s))
+
+def clean_email(s: str) -> str:
+    return _clean_text(s).lower()
+
+
+# ========= BÚSQUEDA DE CLIENTES =========
+# clientes.busqueda guarda esta forma normalizada (minúsculas, sin tildes,
+# solo letras/dígitos) y tiene índice FULLTEXT; ver sql/002_clientes_busqueda.sql
+
+def _palabras(s) -> str:
+    return re.sub(r"[^0-9a-z]+", " ", _clean_text(s).lower()).strip()
+
+# el FULLTEXT busca por prefijo de palabra: para encontrar un teléfono por
+# sus últimos dígitos se guardan también sus terminaciones (desde 4 dígitos)
+SUFIJO_TELEFONO_MIN = 4
+
+def _sufijos_telefono(digitos: str) -> str:
+    return " ".join(digitos[i:] for i in range(1, len(digitos) - SUFIJO_TELEFONO_MIN + 1))
+
+def texto_busqueda_cliente(nombre=None, telefono=None, cuit=None, email=None,
+                           direccion=None, localidad=None, celular=None) -> str:
+    """
+    Texto para clientes.busqueda. El nombre va primero (el índice de prefijo
+    sirve para búsquedas cortas por nombre); teléfono, celular y CUIT quedan
+    como un solo token de dígitos cada uno. Las terminaciones de teléfono y
+    celular van al final.
+    """
+    tel = clean_digits(telefono)
+    cel = clean_digits(celular)
+    if cel == tel:
+        cel = ""
+    partes = [
+        _palabras(nombre),
+        tel,
+        cel,
+        clean_digits(cuit),
+        _palabras(email),
+        _palabras(direccion),
+        _palabras(localidad),
+        _sufijos_telefono(tel),
+        _sufijos_telefono(cel),
+    ]
+    return " ".join(p for p in partes if p)[:512]
+
+def tokens_busqueda(q) -> list:
+    """
+    Parte lo que escribe el usuario en tokens normalizados igual que
+    texto_busqueda_cliente: "11-4444 5555" -> ["114444", "5555"],
+    "José Pérez" -> ["jose", "perez"].
+    """
+    out = []
+    for t in _clean_text(q).split(" "):
+        if not t:
+            continue
+        if not re.search(r"[A-Za-z]", t):
+            d = clean_digits(t)
+            if d:
+                out.append(d)
+            continue
+        out.extend(p for p in _palabras(t).split(" ") if p)
+    return out
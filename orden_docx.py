@@ -1,10 +1,15 @@
 # orden_docx.py
 from __future__ import annotations
 
+import hashlib
+import io
+import json
 import os
 import re
+import tempfile
+import zipfile
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
 
 from docx import Document
 from docx.shared import Pt
@@ -19,6 +24,24 @@ def _safe_filename(s: str) -> str:
     return s[:120] if s else "orden"
 
 
+def _escribir_atomico(path: str, escribir: Callable[[IO[bytes]], None]):
+    """
+    Escribe `path` sin que una descarga vea un archivo a medio escribir:
+    primero a un temporal en la misma carpeta y después os.replace.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            escribir(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
 def _fmt_date(val: Any) -> str:
     if not val:
         return ""
@@ -66,6 +89,71 @@ def _set_default_styles(doc: Document):
     section.right_margin = Pt(57)
 
 
+def campos_impresos(orden: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Valores (ya formateados) que se imprimen en el Word.
+    generar_docx_orden usa solo esto, así huella_orden cambia si y solo si
+    cambia algo del documento.
+    """
+    return {
+        "id": str(orden.get("id") or orden.get("nro") or ""),
+        "estado": str(orden.get("estado") or ""),
+        "fecha": _fmt_date(orden.get("fecha")),
+        "hora_ingreso": _fmt_time(orden.get("hora_ingreso")),
+        "cliente": str(orden.get("nombre_contacto") or orden.get("cliente_nombre") or orden.get("cliente") or ""),
+        "telefono": str(orden.get("telefono_contacto") or orden.get("telefono") or ""),
+        "equipo": str(orden.get("equipo_texto") or orden.get("equipo") or orden.get("equipo_descripcion") or ""),
+        "serie": str(orden.get("serie_texto") or orden.get("serie") or ""),
+        "fecha_salida": _fmt_date(orden.get("fecha_salida")),
+        "hora_salida": _fmt_time(orden.get("hora_salida")),
+        "fecha_regreso": _fmt_date(orden.get("fecha_regreso")),
+        "hora_regreso": _fmt_time(orden.get("hora_regreso")),
+        "importe": str(orden.get("importe") or ""),
+        "accesorios": str(orden.get("accesorios") or ""),
+        "falla": str(orden.get("falla") or ""),
+        "reparacion": str(orden.get("reparacion") or ""),
+        "repuestos": str(orden.get("repuestos") or ""),
+        "observaciones": str(orden.get("observaciones") or ""),
+        "fecha_retiro": _fmt_date(orden.get("fecha_retiro")),
+        "hora_retiro": _fmt_time(orden.get("hora_retiro")),
+    }
+
+
+def huella_orden(orden: Dict[str, Any]) -> str:
+    """Hash de lo que imprime el Word (sin el pie 'Generado: ...')."""
+    data = json.dumps(campos_impresos(orden), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+_huellas_cache: Dict[str, Tuple[int, Optional[str]]] = {}   # path -> (mtime_ns, huella)
+
+
+def huella_docx(path: str) -> Optional[str]:
+    """
+    Huella con la que se generó el .docx (queda en core_properties.identifier).
+    None si el archivo no existe o es de antes de guardar huellas.
+    Se cachea por mtime, así no se abre el zip en cada consulta.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    hit = _huellas_cache.get(path)
+    if hit and hit[0] == mtime:
+        return hit[1]
+
+    huella = None
+    try:
+        with zipfile.ZipFile(path) as z:
+            core = z.read("docProps/core.xml").decode("utf-8", "replace")
+        m = re.search(r"<dc:identifier>([0-9a-f]{40})</dc:identifier>", core)
+        huella = m.group(1) if m else None
+    except (KeyError, zipfile.BadZipFile, OSError):
+        pass
+    _huellas_cache[path] = (mtime, huella)
+    return huella
+
+
 def generar_docx_orden(
     orden: Dict[str, Any],
     output_dir: str,
@@ -79,18 +167,46 @@ def generar_docx_orden(
     """
     os.makedirs(output_dir, exist_ok=True)
 
-    oid = orden.get("id") or orden.get("nro") or ""
-    cliente = orden.get("nombre_contacto") or orden.get("cliente_nombre") or orden.get("cliente") or ""
-    equipo = orden.get("equipo_texto") or orden.get("equipo") or orden.get("equipo_descripcion") or ""
+    campos = campos_impresos(orden)
 
     if not filename:
-        base = f"Orden_{oid}_{_safe_filename(cliente)}_{_safe_filename(equipo)}"
+        base = f"Orden_{campos['id']}_{_safe_filename(campos['cliente'])}_{_safe_filename(campos['equipo'])}"
         filename = base + ".docx"
 
     path = os.path.join(output_dir, filename)
 
+    generado = datetime.now().strftime('%Y-%m-%d %H:%M')
+    doc = armar_documento(campos, huella_orden(orden), generado)
+    _escribir_atomico(path, doc.save)
+    return path
+
+
+def docx_orden_bytes(orden: Dict[str, Any]) -> bytes:
+    """Como generar_docx_orden pero devuelve el .docx en memoria (para el zip masivo)."""
+    generado = datetime.now().strftime('%Y-%m-%d %H:%M')
+    doc = armar_documento(campos_impresos(orden), huella_orden(orden), generado)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def docx_ordenes_bytes(ordenes: List[Dict[str, Any]]) -> List[bytes]:
+    """
+    docx_orden_bytes de varias órdenes: es el trabajo de los procesos del zip
+    masivo (app.exportar_docx_zip). Está acá y no en app.py para que los
+    procesos no necesiten nada de la app.
+    """
+    return [docx_orden_bytes(o) for o in ordenes]
+
+
+def armar_documento(campos: Dict[str, str], huella: str, generado: str) -> Document:
+    """
+    Arma el documento con python-docx a partir de campos_impresos().
+    También lo usa orden_docx_plantilla para construir su plantilla.
+    """
     doc = Document()
     _set_default_styles(doc)
+    doc.core_properties.identifier = huella
 
     # Encabezado
     p = doc.add_paragraph()
@@ -118,13 +234,13 @@ def generar_docx_orden(
         row[0].paragraphs[0].runs[0].bold = True
         row[2].paragraphs[0].runs[0].bold = True
 
-    add_row("N°", oid, "Estado", orden.get("estado", ""))
-    add_row("Fecha ingreso", _fmt_date(orden.get("fecha")), "Hora ingreso", _fmt_time(orden.get("hora_ingreso")))
-    add_row("Cliente / Contacto", cliente, "Teléfono", orden.get("telefono_contacto") or orden.get("telefono") or "")
-    add_row("Equipo", equipo, "S/N", orden.get("serie_texto") or orden.get("serie") or "")
-    add_row("Fecha salida", _fmt_date(orden.get("fecha_salida")), "Hora salida", _fmt_time(orden.get("hora_salida")))
-    add_row("Fecha regreso", _fmt_date(orden.get("fecha_regreso")), "Hora regreso", _fmt_time(orden.get("hora_regreso")))
-    add_row("Importe", orden.get("importe", ""), "Accesorios", orden.get("accesorios", ""))
+    add_row("N°", campos["id"], "Estado", campos["estado"])
+    add_row("Fecha ingreso", campos["fecha"], "Hora ingreso", campos["hora_ingreso"])
+    add_row("Cliente / Contacto", campos["cliente"], "Teléfono", campos["telefono"])
+    add_row("Equipo", campos["equipo"], "S/N", campos["serie"])
+    add_row("Fecha salida", campos["fecha_salida"], "Hora salida", campos["hora_salida"])
+    add_row("Fecha regreso", campos["fecha_regreso"], "Hora regreso", campos["hora_regreso"])
+    add_row("Importe", campos["importe"], "Accesorios", campos["accesorios"])
 
     doc.add_paragraph()  # espacio
 
@@ -136,14 +252,14 @@ def generar_docx_orden(
         r.font.size = Pt(12)
         doc.add_paragraph(str(content or ""))
 
-    section("Falla", orden.get("falla"))
-    section("Reparación", orden.get("reparacion"))
-    section("Repuestos", orden.get("repuestos"))
-    section("Observaciones", orden.get("observaciones"))
+    section("Falla", campos["falla"])
+    section("Reparación", campos["reparacion"])
+    section("Repuestos", campos["repuestos"])
+    section("Observaciones", campos["observaciones"])
 
     # Retiro (si existe)
-    fr = _fmt_date(orden.get("fecha_retiro"))
-    hr = _fmt_time(orden.get("hora_retiro"))
+    fr = campos["fecha_retiro"]
+    hr = campos["hora_retiro"]
     if fr or hr:
         section("Retiro", f"{fr} {hr}".strip())
 
@@ -153,10 +269,9 @@ def generar_docx_orden(
 
     # Pie con timestamp de generación
     doc.add_paragraph()
-    pie = doc.add_paragraph(f"Generado: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    pie = doc.add_paragraph(f"Generado: {generado}")
     pie.alignment = WD_ALIGN_PARAGRAPH.RIGHT
     pie.runs[0].italic = True
     pie.runs[0].font.size = Pt(9)
 
-    doc.save(path)
-    return path
+    return doc
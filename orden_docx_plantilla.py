@@ -0,0 +1,181 @@
+# orden_docx_plantilla.py
+"""
+Motor rápido para el Word de las órdenes.
+
+En vez de armar el documento con python-docx cada vez, carga una plantilla
+.docx una sola vez por proceso (guardando en memoria el contenido de cada
+parte del zip) y para cada orden reemplaza los marcadores {{campo}} en el
+XML y escribe el zip. El resultado es el mismo documento que arma
+orden_docx.generar_docx_orden.
+
+La plantilla se construye en memoria con orden_docx.armar_documento (así el
+diseño es uno solo); el repo no trae plantillas/orden.docx. Para retocarla en
+Word, guardar_plantilla() la escribe en PLANTILLA_PATH y desde ahí se usa ese
+archivo; ojo: cada marcador tiene que quedar entero dentro de un mismo run, y
+los cambios a armar_documento ya no se ven hasta borrarlo.
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import threading
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from orden_docx import _escribir_atomico, _safe_filename, armar_documento, campos_impresos, huella_orden
+
+PLANTILLA_PATH = os.path.join(os.path.dirname(__file__), "plantillas", "orden.docx")
+
+# partes del zip donde hay marcadores
+_PARTES_CON_MARCAS = ("word/document.xml", "docProps/core.xml")
+
+_CAMPOS = (
+    "id", "estado", "fecha", "hora_ingreso", "cliente", "telefono", "equipo", "serie",
+    "fecha_salida", "hora_salida", "fecha_regreso", "hora_regreso", "importe",
+    "accesorios", "falla", "reparacion", "repuestos", "observaciones",
+)
+
+
+def _marca(nombre: str) -> str:
+    return "{{" + nombre + "}}"
+
+
+class _Plantilla:
+    """
+    Partes del .docx ya leídas. Las partes con marcadores se guardan
+    partidas en trozos fijos y nombres de campo, así reemplazar es un join.
+    document.xml se guarda en dos versiones: con y sin la sección Retiro.
+    """
+
+    def __init__(self, data: bytes):
+        self.partes: List[Tuple[zipfile.ZipInfo, bytes]] = []
+        self.marcadas: Dict[Tuple[str, bool], List[str]] = {}
+        with zipfile.ZipFile(io.BytesIO(data)) as z:
+            for info in z.infolist():
+                contenido = z.read(info.filename)
+                if info.filename in _PARTES_CON_MARCAS:
+                    xml = contenido.decode("utf-8")
+                    # un <w:t> con marcador puede recibir espacios al principio/fin
+                    xml = xml.replace("<w:t>{{", '<w:t xml:space="preserve">{{')
+                    self.marcadas[(info.filename, True)] = _partir(xml)
+                    self.marcadas[(info.filename, False)] = _partir(_sin_retiro(xml))
+                self.partes.append((info, contenido))
+
+    def render(self, valores: Dict[str, str], con_retiro: bool) -> bytes:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+            for info, contenido in self.partes:
+                trozos = self.marcadas.get((info.filename, con_retiro))
+                if trozos is not None:
+                    contenido = _unir(trozos, valores).encode("utf-8")
+                z.writestr(info.filename, contenido)
+        return buf.getvalue()
+
+
+_INICIO_PARRAFO = re.compile(r"<w:p[ >]")
+
+
+def _sin_retiro(xml: str) -> str:
+    # saca el párrafo con {{retiro}} y el anterior (el título "Retiro")
+    i = xml.find(_marca("retiro"))
+    if i < 0:
+        return xml
+    inicios = [m.start() for m in _INICIO_PARRAFO.finditer(xml, 0, i)]
+    if len(inicios) < 2:
+        return xml
+    fin = xml.find("</w:p>", i) + len("</w:p>")
+    return xml[:inicios[-2]] + xml[fin:]
+
+
+def _partir(xml: str) -> List[str]:
+    # "a{{x}}b{{y}}c" -> ["a", "x", "b", "y", "c"] (posiciones impares = campo)
+    out, pos = [], 0
+    while True:
+        i = xml.find("{{", pos)
+        if i < 0:
+            out.append(xml[pos:])
+            return out
+        j = xml.find("}}", i)
+        out.append(xml[pos:i])
+        out.append(xml[i + 2:j])
+        pos = j + 2
+
+
+def _unir(trozos: List[str], valores: Dict[str, str]) -> str:
+    out = list(trozos)
+    for i in range(1, len(out), 2):
+        out[i] = valores.get(out[i], "")
+    return "".join(out)
+
+
+def _xml_texto(v: Any) -> str:
+    # igual que python-docx: \n -> salto de línea, \t -> tabulación
+    t = escape(str(v or ""))
+    if "\n" in t or "\t" in t:
+        t = (t.replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">')
+              .replace("\n", '</w:t><w:br/><w:t xml:space="preserve">'))
+    return t
+
+
+def _construir() -> bytes:
+    campos = {c: _marca(c) for c in _CAMPOS}
+    campos["fecha_retiro"] = _marca("retiro")
+    campos["hora_retiro"] = ""
+    doc = armar_documento(campos, _marca("huella"), _marca("generado"))
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+_plantilla_cache: Optional[_Plantilla] = None
+_lock = threading.Lock()
+
+
+def _plantilla() -> _Plantilla:
+    global _plantilla_cache
+    if _plantilla_cache is None:
+        with _lock:
+            if _plantilla_cache is None:
+                if os.path.exists(PLANTILLA_PATH):
+                    with open(PLANTILLA_PATH, "rb") as f:
+                        data = f.read()
+                else:
+                    data = _construir()
+                _plantilla_cache = _Plantilla(data)
+    return _plantilla_cache
+
+
+def guardar_plantilla(path: str = PLANTILLA_PATH) -> str:
+    """Escribe la plantilla en PLANTILLA_PATH para poder retocarla en Word."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_construir())
+    return path
+
+
+def generar_docx_orden_rapido(
+    orden: Dict[str, Any],
+    output_dir: str,
+    filename: Optional[str] = None,
+) -> str:
+    """Misma firma y mismo resultado que orden_docx.generar_docx_orden."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    campos = campos_impresos(orden)
+    if not filename:
+        base = f"Orden_{campos['id']}_{_safe_filename(campos['cliente'])}_{_safe_filename(campos['equipo'])}"
+        filename = base + ".docx"
+    path = os.path.join(output_dir, filename)
+
+    retiro = f"{campos['fecha_retiro']} {campos['hora_retiro']}".strip()
+    valores = {c: _xml_texto(campos[c]) for c in _CAMPOS}
+    valores["retiro"] = _xml_texto(retiro)
+    valores["huella"] = huella_orden(orden)
+    valores["generado"] = datetime.now().strftime('%Y-%m-%d %H:%M')
+
+    data = _plantilla().render(valores, con_retiro=bool(retiro))
+    _escribir_atomico(path, lambda f: f.write(data))
+    return path
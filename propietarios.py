@@ -0,0 +1,54 @@
+# propietarios.py
+# Proyección equipo -> propietario actual (tabla equipo_propietario,
+# ver sql/005_equipo_propietario.sql). La usan app.py y setup_import/.
+# Las funciones reciben un cursor y no hacen commit: van en la misma
+# transacción que el cambio que las motiva.
+
+_SQL_RECALCULAR = """
+    INSERT INTO equipo_propietario (equipo_id, cliente_id, clientes)
+    SELECT
+        e.id,
+        MIN(ec.cliente_id),
+        GROUP_CONCAT(c.nombre SEPARATOR ', ')
+    FROM equipos e
+    LEFT JOIN equipo_cliente ec ON ec.equipo_id = e.id AND ec.activo = 1
+    LEFT JOIN clientes c ON c.id = ec.cliente_id
+    {where}
+    GROUP BY e.id
+    ON DUPLICATE KEY UPDATE
+        cliente_id = VALUES(cliente_id),
+        clientes = VALUES(clientes)
+"""
+
+
+def _marcas(ids) -> str:
+    return "(" + ", ".join(["%s"] * len(ids)) + ")"
+
+
+def actualizar_propietarios(cur, equipo_ids):
+    """Recalcula el propietario de esos equipos (después de cambiar sus vínculos)."""
+    ids = sorted({int(i) for i in equipo_ids})
+    if not ids:
+        return
+    cur.execute(_SQL_RECALCULAR.format(where=f"WHERE e.id IN {_marcas(ids)}"), ids)
+
+
+def actualizar_propietarios_de_clientes(cur, cliente_ids):
+    """Recalcula los equipos vinculados a esos clientes (después de cambiarles el nombre)."""
+    ids = sorted({int(i) for i in cliente_ids})
+    if not ids:
+        return
+    cur.execute(
+        _SQL_RECALCULAR.format(
+            where=f"WHERE e.id IN (SELECT equipo_id FROM equipo_cliente WHERE activo = 1 AND cliente_id IN {_marcas(ids)})"
+        ),
+        ids,
+    )
+
+
+def reconstruir_propietarios(cur):
+    """Recalcula todos (y borra los de equipos que ya no existen)."""
+    cur.execute(_SQL_RECALCULAR.format(where=""))
+    cur.execute(
+        "DELETE p FROM equipo_propietario p LEFT JOIN equipos e ON e.id = p.equipo_id WHERE e.id IS NULL"
+    )
@@ -1,5 +1,10 @@
 
 
+import hashlib
+import json
+import sys
+import time
+
 import pandas as pd
 import mysql.connector
 from pathlib import Path
@@ -17,10 +22,50 @@ DB_CONFIG = {
 # Carpeta donde está ESTE archivo .py
 BASE_DIR = Path(__file__).resolve().parent
 
+# normalizar.py y propietarios.py están en la carpeta del proyecto (la misma que usa app.py)
+sys.path.insert(0, str(BASE_DIR.parent))
+from normalizar import texto_busqueda_cliente  # noqa: E402
+from propietarios import actualizar_propietarios_de_clientes  # noqa: E402
+from lector_excel import en_segundo_plano, leer_excel_cacheado, leer_excel_por_bloques  # noqa: E402
+
 # Nombre del archivo Excel a importar (en la misma carpeta que el .py)
 EXCEL_FILE = BASE_DIR / "clientes otro.xlsx"
 SHEET_NAME = 0  # primera hoja
 
+# Filas por INSERT multi-fila
+TAMANO_LOTE = 500
+
+# Clave en import_huellas para este importador
+ORIGEN = "clientes"
+
+# Columnas del Excel, en el orden exacto que nos diste (no tiene encabezados)
+COLUMNAS = [
+    "CODIGO",
+    "R_SOC",
+    "CATEGORIA",
+    "DIRE",
+    "NRO_CASA",
+    "LOCALIDAD",
+    "COD_POS",
+    "PROVINCIA",
+    "CUIT",
+    "COD_IVA",
+    "COD_TASA",
+    "ING_BRU",
+    "TELEFONO",
+    "DOCUMENTO",
+    "OBSERVA",
+    "FEC_NAC",
+    "E_MAIL",
+]
+
+# Campos de la tabla clientes que escribe el importador (id primero)
+CAMPOS = (
+    "id", "nombre", "telefono", "direccion", "localidad", "provincia", "cp",
+    "email", "cuit", "contacto", "observaciones", "giro_empresa",
+    "cliente_garantia", "cliente_con_contrato", "busqueda",
+)
+
 
 # -------------------------
 # FUNCIONES AUXILIARES
@@ -46,152 +91,260 @@ def s_int(val):
             return None
 
 
+# -------------------------
+# MAPEO FILA EXCEL -> CLIENTE
+# -------------------------
+def cliente_desde_fila(row) -> tuple:
+    """Valores para CAMPOS a partir de una fila del Excel (ValueError si no se importa)."""
+    codigo = s_int(row["CODIGO"])        # id
+    nombre = s(row["R_SOC"])             # razón social / nombre
+    telefono = s(row["TELEFONO"])
+
+    # Dirección = calle + número
+    dire = s(row["DIRE"])
+    nro_casa = s(row["NRO_CASA"])
+    if dire and nro_casa:
+        direccion = f"{dire} {nro_casa}"
+    else:
+        direccion = dire or nro_casa
+
+    localidad = s(row["LOCALIDAD"])
+    provincia = s(row["PROVINCIA"])
+    cp = s(row["COD_POS"])
+    email = s(row["E_MAIL"])
+    cuit = s(row["CUIT"])
+    contacto = s(row["DOCUMENTO"])       # podés cambiar esto después si querés
+
+    # Armar un campo de observaciones más completo
+    obs_partes = []
+    cat = s(row["CATEGORIA"])
+    if cat:
+        obs_partes.append(f"Categoría: {cat}")
+    cod_iva = s(row["COD_IVA"])
+    if cod_iva:
+        obs_partes.append(f"IVA: {cod_iva}")
+    cod_tasa = s(row["COD_TASA"])
+    if cod_tasa:
+        obs_partes.append(f"Tasa: {cod_tasa}")
+    ing_bru = s(row["ING_BRU"])
+    if ing_bru:
+        obs_partes.append(f"Ingresos Brutos: {ing_bru}")
+    obs_excel = s(row["OBSERVA"])
+    if obs_excel:
+        obs_partes.append(f"Obs: {obs_excel}")
+    fec_nac = s(row["FEC_NAC"])
+    if fec_nac:
+        obs_partes.append(f"Fec. Nac: {fec_nac}")
+
+    observaciones = " | ".join(obs_partes) if obs_partes else None
+
+    # Podés usar CATEGORIA como giro_empresa si querés
+    giro_empresa = cat
+
+    # Flags por ahora en 0 (podés ajustarlos a mano después)
+    cliente_garantia = 0
+    cliente_con_contrato = 0
+
+    # Si no hay código, no tiene sentido insertarlo
+    if codigo is None:
+        raise ValueError("Cliente sin CODIGO, se omite.")
+
+    return (
+        codigo,
+        nombre,
+        telefono,
+        direccion,
+        localidad,
+        provincia,
+        cp,
+        email,
+        cuit,
+        contacto,
+        observaciones,
+        giro_empresa,
+        cliente_garantia,
+        cliente_con_contrato,
+        texto_busqueda_cliente(nombre, telefono, cuit, email, direccion, localidad),
+    )
+
+
+def huella_cliente(valores: tuple) -> str:
+    """sha1 de lo que se escribe en clientes para esa fila."""
+    data = json.dumps(list(valores), ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+# -------------------------
+# ESCRITURA POR LOTES
+# -------------------------
+SQL_UPSERT = """
+    INSERT INTO clientes ({campos}) VALUES {valores}
+    ON DUPLICATE KEY UPDATE
+        {actualizar}
+""".format(
+    campos=", ".join(CAMPOS),
+    valores="{valores}",
+    actualizar=",\n        ".join(f"{c} = VALUES({c})" for c in CAMPOS[1:]),
+)
+
+SQL_HUELLAS = """
+    INSERT INTO import_huellas (origen, codigo, huella) VALUES {valores}
+    ON DUPLICATE KEY UPDATE huella = VALUES(huella)
+"""
+
+
+def _escribir_lote(cur, lote):
+    """lote: [(valores, huella)]. Escribe clientes, huellas y propietarios de equipos (mismo commit)."""
+    marcas = "(" + ",".join(["%s"] * len(CAMPOS)) + ")"
+    cur.execute(
+        SQL_UPSERT.format(valores=", ".join([marcas] * len(lote))),
+        [v for valores, _ in lote for v in valores],
+    )
+    cur.execute(
+        SQL_HUELLAS.format(valores=", ".join(["(%s, %s, %s)"] * len(lote))),
+        [v for valores, huella in lote for v in (ORIGEN, valores[0], huella)],
+    )
+    ids = [valores[0] for valores, _ in lote]
+    _busqueda_con_celular(cur, ids)
+    # si cambió un nombre, cambia en la lista de equipos (equipo_propietario)
+    actualizar_propietarios_de_clientes(cur, ids)
+
+
+def _busqueda_con_celular(cur, ids):
+    """
+    El Excel no trae celular: a los clientes que ya tenían uno cargado se les
+    rearma busqueda con él (el upsert la pisó sin celular).
+    """
+    marcas = "(" + ",".join(["%s"] * len(ids)) + ")"
+    cur.execute(
+        "SELECT id, nombre, telefono, cuit, email, direccion, localidad, celular "
+        f"FROM clientes WHERE id IN {marcas} AND celular IS NOT NULL AND celular <> ''",
+        ids,
+    )
+    filas = cur.fetchall()
+    if filas:
+        cur.executemany(
+            "UPDATE clientes SET busqueda=%s WHERE id=%s",
+            [(texto_busqueda_cliente(*f[1:]), f[0]) for f in filas],
+        )
+
+
 # -------------------------
 # IMPORTAR CLIENTES
 # -------------------------
-def importar_clientes_desde_excel(ruta_excel: str):
+def _escribir_pendientes(conn, cur, filas, tamano_lote: int):
+    """filas: [(valores, huella, fila excel)]. Devuelve (escritas, con error)."""
+    escritas = []
+    filas_err = 0
+    for desde in range(0, len(filas), tamano_lote):
+        lote = filas[desde:desde + tamano_lote]
+        try:
+            _escribir_lote(cur, [(v, h) for v, h, _ in lote])
+            conn.commit()
+            escritas.extend(lote)
+        except mysql.connector.Error as e:
+            # el lote falló entero: se reintenta fila por fila para saber cuál es
+            conn.rollback()
+            print(f"Lote con error ({e}), reintentando de a una...")
+            for v, h, idx in lote:
+                try:
+                    _escribir_lote(cur, [(v, h)])
+                    conn.commit()
+                    escritas.append((v, h, idx))
+                except mysql.connector.Error as e2:
+                    conn.rollback()
+                    filas_err += 1
+                    print(f"[Fila {idx + 1}] Error importando cliente: {e2}")
+    return escritas, filas_err
+
+
+def importar_clientes_desde_excel(
+    ruta_excel: str,
+    tamano_lote: int = TAMANO_LOTE,
+    completo: bool = False,
+    streaming: bool = False,
+    usar_cache: bool = True,
+):
+    """
+    Importa solo lo que cambió desde la corrida anterior: cada fila se compara
+    con la huella guardada en import_huellas (sql/003_import_huellas.sql).
+    completo=True ignora las huellas y vuelve a escribir todo.
+    streaming=True lee el Excel de a bloques (lector_excel) y escribe cada
+    bloque mientras se lee el siguiente, con memoria acotada.
+    usar_cache=False vuelve a parsear el Excel aunque no haya cambiado.
+    """
     print(f"Leyendo archivo Excel: {ruta_excel} ...")
+    t0 = time.perf_counter()
 
-    # El Excel NO tiene encabezados -> header=None
-    df = pd.read_excel(ruta_excel, sheet_name=SHEET_NAME, header=None)
-
-    # Asignar nombres de columna manualmente, en el orden exacto que nos diste
-    df.columns = [
-        "CODIGO",
-        "R_SOC",
-        "CATEGORIA",
-        "DIRE",
-        "NRO_CASA",
-        "LOCALIDAD",
-        "COD_POS",
-        "PROVINCIA",
-        "CUIT",
-        "COD_IVA",
-        "COD_TASA",
-        "ING_BRU",
-        "TELEFONO",
-        "DOCUMENTO",
-        "OBSERVA",
-        "FEC_NAC",
-        "E_MAIL",
-    ]
+    if streaming:
+        bloques = en_segundo_plano(leer_excel_por_bloques(ruta_excel, COLUMNAS, hoja=SHEET_NAME))
+    else:
+        # El Excel NO tiene encabezados -> header=None; columnas en el orden exacto que nos diste.
+        # Si el archivo no cambió desde la última corrida se lee del cache (sin parsear el Excel).
+        df = leer_excel_cacheado(ruta_excel, COLUMNAS, hoja=SHEET_NAME, usar_cache=usar_cache)
+        bloques = [df]
 
     print("Columnas asignadas al DataFrame:")
-    print(list(df.columns))
+    print(COLUMNAS)
 
     conn = mysql.connector.connect(**DB_CONFIG)
     cur = conn.cursor()
 
-    filas_ok = 0
+    # estado de la corrida anterior
+    cur.execute("SELECT codigo, huella FROM import_huellas WHERE origen = %s", (ORIGEN,))
+    huellas = {} if completo else dict(cur.fetchall())
+    cur.execute("SELECT id FROM clientes")
+    existentes = {r[0] for r in cur.fetchall()}
+
     filas_err = 0
+    insertadas = actualizadas = 0
+    sin_cambios = set()
 
-    for idx, row in df.iterrows():
-        try:
-            # ----- Mapear columnas del Excel a los campos de la tabla clientes -----
-            codigo = s_int(row["CODIGO"])        # id
-            nombre = s(row["R_SOC"])             # razón social / nombre
-            telefono = s(row["TELEFONO"])
-
-            # Dirección = calle + número
-            dire = s(row["DIRE"])
-            nro_casa = s(row["NRO_CASA"])
-            if dire and nro_casa:
-                direccion = f"{dire} {nro_casa}"
+    for df in bloques:
+        pendientes = {}      # codigo -> (valores, huella, fila excel); si un CODIGO se repite gana el último
+        for idx, row in df.iterrows():
+            try:
+                valores = cliente_desde_fila(row)
+            except Exception as e:
+                filas_err += 1
+                print(f"[Fila {idx + 1}] Error importando cliente: {e}")
+                continue
+
+            codigo = valores[0]
+            huella = huella_cliente(valores)
+            # si el cliente se borró de la tabla se vuelve a insertar aunque la huella coincida
+            if huellas.get(codigo) == huella and codigo in existentes:
+                sin_cambios.add(codigo)
+                pendientes.pop(codigo, None)
+            else:
+                sin_cambios.discard(codigo)
+                pendientes[codigo] = (valores, huella, idx)
+
+        escritas, err = _escribir_pendientes(conn, cur, list(pendientes.values()), tamano_lote)
+        filas_err += err
+        for v, h, _ in escritas:
+            if v[0] in existentes:
+                actualizadas += 1
             else:
-                direccion = dire or nro_casa
-
-            localidad = s(row["LOCALIDAD"])
-            provincia = s(row["PROVINCIA"])
-            cp = s(row["COD_POS"])
-            email = s(row["E_MAIL"])
-            cuit = s(row["CUIT"])
-            contacto = s(row["DOCUMENTO"])       # podés cambiar esto después si querés
-
-            # Armar un campo de observaciones más completo
-            obs_partes = []
-            cat = s(row["CATEGORIA"])
-            if cat:
-                obs_partes.append(f"Categoría: {cat}")
-            cod_iva = s(row["COD_IVA"])
-            if cod_iva:
-                obs_partes.append(f"IVA: {cod_iva}")
-            cod_tasa = s(row["COD_TASA"])
-            if cod_tasa:
-                obs_partes.append(f"Tasa: {cod_tasa}")
-            ing_bru = s(row["ING_BRU"])
-            if ing_bru:
-                obs_partes.append(f"Ingresos Brutos: {ing_bru}")
-            obs_excel = s(row["OBSERVA"])
-            if obs_excel:
-                obs_partes.append(f"Obs: {obs_excel}")
-            fec_nac = s(row["FEC_NAC"])
-            if fec_nac:
-                obs_partes.append(f"Fec. Nac: {fec_nac}")
-
-            observaciones = " | ".join(obs_partes) if obs_partes else None
-
-            # Podés usar CATEGORIA como giro_empresa si querés
-            giro_empresa = cat
-
-            # Flags por ahora en 0 (podés ajustarlos a mano después)
-            cliente_garantia = 0
-            cliente_con_contrato = 0
-
-            # Si no hay código, no tiene sentido insertarlo
-            if codigo is None:
-                raise ValueError("Cliente sin CODIGO, se omite.")
-
-            # ----- INSERT / UPDATE en la tabla clientes -----
-            cur.execute(
-                """
-                INSERT INTO clientes (
-                    id, nombre, telefono, direccion, localidad, provincia, cp,
-                    email, cuit, contacto, observaciones, giro_empresa,
-                    cliente_garantia, cliente_con_contrato
-                ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON DUPLICATE KEY UPDATE
-                    nombre = VALUES(nombre),
-                    telefono = VALUES(telefono),
-                    direccion = VALUES(direccion),
-                    localidad = VALUES(localidad),
-                    provincia = VALUES(provincia),
-                    cp = VALUES(cp),
-                    email = VALUES(email),
-                    cuit = VALUES(cuit),
-                    contacto = VALUES(contacto),
-                    observaciones = VALUES(observaciones),
-                    giro_empresa = VALUES(giro_empresa),
-                    cliente_garantia = VALUES(cliente_garantia),
-                    cliente_con_contrato = VALUES(cliente_con_contrato)
-                """,
-                (
-                    codigo,
-                    nombre,
-                    telefono,
-                    direccion,
-                    localidad,
-                    provincia,
-                    cp,
-                    email,
-                    cuit,
-                    contacto,
-                    observaciones,
-                    giro_empresa,
-                    cliente_garantia,
-                    cliente_con_contrato,
-                ),
-            )
-            filas_ok += 1
-        except Exception as e:
-            filas_err += 1
-            print(f"[Fila {idx + 1}] Error importando cliente: {e}")
-
-    conn.commit()
+                insertadas += 1
+                existentes.add(v[0])
+            huellas[v[0]] = h
+
     cur.close()
     conn.close()
 
-    print(f"Importación finalizada. OK: {filas_ok}, con error: {filas_err}")
+    total = time.perf_counter() - t0
+    print(
+        f"Importación finalizada en {total:.2f}s. "
+        f"Insertados: {insertadas}, actualizados: {actualizadas}, "
+        f"sin cambios: {len(sin_cambios)}, con error: {filas_err}"
+    )
 
 
 if __name__ == "__main__":
-    importar_clientes_desde_excel(str(EXCEL_FILE))
+    importar_clientes_desde_excel(
+        str(EXCEL_FILE),
+        completo="--completo" in sys.argv[1:],
+        streaming="--streaming" in sys.argv[1:],
+        usar_cache="--sin-cache" not in sys.argv[1:],
+    )
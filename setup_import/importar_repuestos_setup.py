@@ -1,8 +1,14 @@
 
+import sys
+import time
+
+import numpy as np
 import pandas as pd
 import mysql.connector
 from pathlib import Path
 
+from lector_excel import en_segundo_plano, leer_excel_cacheado, leer_excel_por_bloques
+
 # -------------------------
 # CONFIGURACIÓN DE LA BD
 # -------------------------
@@ -20,6 +26,35 @@ BASE_DIR = Path(__file__).resolve().parent
 EXCEL_FILE = BASE_DIR / "articulos.xlsx"
 SHEET_NAME = 0  # primera hoja
 
+# Filas por INSERT multi-fila (se puede pasar otro valor por línea de comandos)
+TAMANO_LOTE = 1000
+
+# Columnas del Excel, en el orden exacto que nos diste (no tiene encabezados)
+COLUMNAS = [
+    "CODIGO",
+    "DESCRIP",
+    "UNIDAD",
+    "COSTO",
+    "COSTO1",
+    "COSTO2",
+    "EXIST",
+    "EXIST_MIN",
+    "COD_MAR",
+    "ABRE_MAR",
+    "FEC_COMPR",
+    "IVA",
+    "COD_BARRA",
+    "COD_PROVE",
+    "TILDE",
+    "ORDEN",
+    "CAN_SELECT",
+    "OBSERVA",
+    "IMP_INT",
+    "POR_GAN",
+    "FEC_MODIF",
+    "COD_BAR",
+]
+
 
 # -------------------------
 # FUNCIONES AUXILIARES
@@ -58,143 +93,217 @@ def s_int(val):
             return None
 
 
+# -------------------------
+# VERSIONES VECTORIZADAS (columna entera de una vez)
+# Dan lo mismo que s / s_float / s_int aplicadas fila por fila.
+# -------------------------
+def _con_none(col: pd.Series, vacio: pd.Series) -> pd.Series:
+    # where(..., None) deja NaN en columnas numéricas/string; a la DB tiene que ir None
+    out = col.astype(object)
+    out[vacio] = None
+    return out
+
+
+def col_s(col: pd.Series) -> pd.Series:
+    """s() sobre toda la columna: str sin espacios, o None."""
+    # astype(object) primero para que fechas/números se conviertan con str() como en s()
+    obj = col.astype(object)
+    texto = obj.astype(str).str.strip()
+    return _con_none(texto, col.isna() | texto.eq(""))
+
+
+def col_float(col: pd.Series) -> pd.Series:
+    """s_float() sobre toda la columna (acepta coma decimal)."""
+    num = pd.to_numeric(col, errors="coerce")
+    con_coma = num.isna() & col.notna()
+    if con_coma.any():
+        num[con_coma] = pd.to_numeric(
+            col[con_coma].astype(str).str.strip().str.replace(",", ".", regex=False),
+            errors="coerce",
+        )
+    return _con_none(num, num.isna())
+
+
+def col_int(col: pd.Series) -> pd.Series:
+    """s_int() sobre toda la columna (trunca decimales como int(float(x)))."""
+    num = pd.to_numeric(col, errors="coerce")
+    out = pd.Series([None] * len(col), index=col.index, dtype=object)
+    ok = num.notna() & np.isfinite(num)
+    out[ok] = [int(x) for x in np.trunc(num[ok])]
+    return out
+
+
+def _con_etiqueta(col: pd.Series, antes: str, despues: str = "") -> pd.Series:
+    """'Etiqueta: valor' donde hay valor, '' donde no."""
+    return (antes + col.fillna("").astype(str) + despues).where(col.notna(), "")
+
+
+def _unir_partes(partes) -> pd.Series:
+    """Une columnas de texto con ' | ', salteando las vacías (como ' | '.join(desc_partes))."""
+    acc = partes[0]
+    for p in partes[1:]:
+        sep = pd.Series("", index=acc.index).where(~(acc.ne("") & p.ne("")), " | ")
+        acc = acc + sep + p
+    return _con_none(acc, acc.eq(""))
+
+
+def transformar_repuestos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Arma (id, nombre, descripcion, costo) para cada fila del Excel,
+    con operaciones de columna en vez de iterrows().
+    """
+    c = {col: col_s(df[col]) for col in (
+        "DESCRIP", "UNIDAD", "ABRE_MAR", "COD_MAR", "COD_BARRA", "COD_BAR", "COD_PROVE",
+        "EXIST", "EXIST_MIN", "IVA", "IMP_INT", "POR_GAN", "OBSERVA", "FEC_COMPR", "FEC_MODIF",
+    )}
+
+    marca = c["ABRE_MAR"].fillna(c["COD_MAR"])
+    cod_barra = c["COD_BARRA"].fillna(c["COD_BAR"])
+
+    hay_stock = c["EXIST"].notna() | c["EXIST_MIN"].notna()
+    stock = (
+        "Stock: " + c["EXIST"].fillna("-").astype(str)
+        + " / Mínimo: " + c["EXIST_MIN"].fillna("-").astype(str)
+    ).where(hay_stock, "")
+
+    descripcion = _unir_partes([
+        _con_etiqueta(c["UNIDAD"], "Unidad: "),
+        _con_etiqueta(marca, "Marca: "),
+        _con_etiqueta(cod_barra, "Código de barras: "),
+        _con_etiqueta(c["COD_PROVE"], "Cód. proveedor: "),
+        stock,
+        _con_etiqueta(c["IVA"], "IVA: "),
+        _con_etiqueta(c["IMP_INT"], "Imp. interno: "),
+        _con_etiqueta(c["POR_GAN"], "Ganancia: ", "%"),
+        _con_etiqueta(c["OBSERVA"], "Obs: "),
+        _con_etiqueta(c["FEC_COMPR"], "Última compra: "),
+        _con_etiqueta(c["FEC_MODIF"], "Última modificación: "),
+    ])
+
+    return pd.DataFrame({
+        "id": col_int(df["CODIGO"]),
+        "nombre": c["DESCRIP"],
+        "descripcion": descripcion,
+        "costo": col_float(df["COSTO"]),
+    })
+
+
 # -------------------------
 # IMPORTAR REPUESTOS
 # -------------------------
-def importar_repuestos_desde_excel(ruta_excel: str):
+SQL_UPSERT = """
+    INSERT INTO repuestos (id, nombre, descripcion, costo)
+    VALUES {valores}
+    ON DUPLICATE KEY UPDATE
+        nombre = VALUES(nombre),
+        descripcion = VALUES(descripcion),
+        costo = VALUES(costo)
+"""
+
+
+def _upsert_lote(cur, filas):
+    sql = SQL_UPSERT.format(valores=", ".join(["(%s, %s, %s, %s)"] * len(filas)))
+    cur.execute(sql, [v for fila in filas for v in fila])
+
+
+def _importar_bloque(conn, cur, df: pd.DataFrame, tamano_lote: int):
+    """Transforma y escribe un bloque de filas del Excel. Devuelve (ok, con error)."""
+    datos = transformar_repuestos(df)
+
+    # Sin DESCRIP no se importa
+    sin_nombre = datos["nombre"].isna()
+    for idx in datos.index[sin_nombre]:
+        print(f"[Fila {idx + 1}] Error importando repuesto: Repuesto sin DESCRIP, se omite.")
+    datos = datos[~sin_nombre]
+
+    filas_ok = 0
+    filas_err = int(sin_nombre.sum())
+
+    # Si no hay código, MySQL autoasigna id (None); si CODIGO viene, coincide con el otro sistema.
+    filas = list(datos.itertuples(index=False, name=None))
+    indices = list(datos.index)
+
+    for desde in range(0, len(filas), tamano_lote):
+        lote = filas[desde:desde + tamano_lote]
+        try:
+            _upsert_lote(cur, lote)
+            conn.commit()
+            filas_ok += len(lote)
+        except mysql.connector.Error as e:
+            # el lote falló entero: se reintenta fila por fila para saber cuál es
+            conn.rollback()
+            print(f"Lote desde fila {indices[desde] + 1} con error ({e}), reintentando de a una...")
+            for idx, fila in zip(indices[desde:desde + tamano_lote], lote):
+                try:
+                    _upsert_lote(cur, [fila])
+                    conn.commit()
+                    filas_ok += 1
+                except mysql.connector.Error as e2:
+                    conn.rollback()
+                    filas_err += 1
+                    print(f"[Fila {idx + 1}] Error importando repuesto: {e2}")
+
+    return filas_ok, filas_err
+
+
+def importar_repuestos_desde_excel(
+    ruta_excel: str,
+    tamano_lote: int = TAMANO_LOTE,
+    streaming: bool = False,
+    usar_cache: bool = True,
+):
+    """
+    streaming=True: lee el Excel de a bloques (lector_excel) y escribe cada
+    bloque mientras se lee el siguiente; la memoria no depende del tamaño
+    del archivo. El resultado en la DB es el mismo.
+    usar_cache=False: vuelve a parsear el Excel aunque no haya cambiado.
+    """
     print(f"Leyendo archivo Excel: {ruta_excel} ...")
+    t0 = time.perf_counter()
 
-    # El Excel NO tiene encabezados -> header=None
-    df = pd.read_excel(ruta_excel, sheet_name=SHEET_NAME, header=None)
-
-    # Asignar nombres de columna manualmente, en el orden exacto que nos diste
-    df.columns = [
-        "CODIGO",
-        "DESCRIP",
-        "UNIDAD",
-        "COSTO",
-        "COSTO1",
-        "COSTO2",
-        "EXIST",
-        "EXIST_MIN",
-        "COD_MAR",
-        "ABRE_MAR",
-        "FEC_COMPR",
-        "IVA",
-        "COD_BARRA",
-        "COD_PROVE",
-        "TILDE",
-        "ORDEN",
-        "CAN_SELECT",
-        "OBSERVA",
-        "IMP_INT",
-        "POR_GAN",
-        "FEC_MODIF",
-        "COD_BAR",
-    ]
+    if streaming:
+        bloques = en_segundo_plano(leer_excel_por_bloques(ruta_excel, COLUMNAS, hoja=SHEET_NAME))
+    else:
+        # El Excel NO tiene encabezados -> header=None; columnas en el orden exacto que nos diste.
+        # Si el archivo no cambió desde la última corrida se lee del cache (sin parsear el Excel).
+        df = leer_excel_cacheado(ruta_excel, COLUMNAS, hoja=SHEET_NAME, usar_cache=usar_cache)
+        bloques = [df]
 
     print("Columnas asignadas al DataFrame:")
-    print(list(df.columns))
+    print(COLUMNAS)
 
     conn = mysql.connector.connect(**DB_CONFIG)
     cur = conn.cursor()
 
     filas_ok = 0
     filas_err = 0
+    t_escritura = 0.0
+
+    for df in bloques:
+        t_bloque = time.perf_counter()
+        ok, err = _importar_bloque(conn, cur, df, tamano_lote)
+        filas_ok += ok
+        filas_err += err
+        t_escritura += time.perf_counter() - t_bloque
 
-    for idx, row in df.iterrows():
-        try:
-            # ----- Mapear columnas del Excel a los campos de la tabla repuestos -----
-            codigo = s_int(row["CODIGO"])        # id del repuesto
-            nombre = s(row["DESCRIP"])           # descripción corta / nombre
-            if not nombre:
-                raise ValueError("Repuesto sin DESCRIP, se omite.")
-
-            # costo base: usamos COSTO (podés cambiar a COSTO1 o COSTO2 si querés)
-            costo = s_float(row["COSTO"])
-
-            # Armar descripción larga con otros datos útiles
-            desc_partes = []
-
-            unidad = s(row["UNIDAD"])
-            if unidad:
-                desc_partes.append(f"Unidad: {unidad}")
-
-            marca = s(row["ABRE_MAR"]) or s(row["COD_MAR"])
-            if marca:
-                desc_partes.append(f"Marca: {marca}")
-
-            cod_barra = s(row["COD_BARRA"]) or s(row["COD_BAR"])
-            if cod_barra:
-                desc_partes.append(f"Código de barras: {cod_barra}")
-
-            cod_prove = s(row["COD_PROVE"])
-            if cod_prove:
-                desc_partes.append(f"Cód. proveedor: {cod_prove}")
-
-            exist = s(row["EXIST"])
-            exist_min = s(row["EXIST_MIN"])
-            if exist or exist_min:
-                desc_partes.append(f"Stock: {exist or '-'} / Mínimo: {exist_min or '-'}")
-
-            iva = s(row["IVA"])
-            if iva:
-                desc_partes.append(f"IVA: {iva}")
-
-            imp_int = s(row["IMP_INT"])
-            if imp_int:
-                desc_partes.append(f"Imp. interno: {imp_int}")
-
-            por_gan = s(row["POR_GAN"])
-            if por_gan:
-                desc_partes.append(f"Ganancia: {por_gan}%")
-
-            obs = s(row["OBSERVA"])
-            if obs:
-                desc_partes.append(f"Obs: {obs}")
-
-            fec_compr = s(row["FEC_COMPR"])
-            if fec_compr:
-                desc_partes.append(f"Última compra: {fec_compr}")
-
-            fec_modif = s(row["FEC_MODIF"])
-            if fec_modif:
-                desc_partes.append(f"Última modificación: {fec_modif}")
-
-            descripcion = " | ".join(desc_partes) if desc_partes else None
-
-            # Si no hay código, podemos dejar que MySQL autoasigne id (None)
-            # pero si tu tabla repuestos usa PK AUTO_INCREMENT, está bien.
-            # Igual, si CODIGO viene siempre, lo usamos para que coincida con el otro sistema.
-
-            # ----- INSERT / UPDATE en la tabla repuestos -----
-            cur.execute(
-                """
-                INSERT INTO repuestos (id, nombre, descripcion, costo)
-                VALUES (%s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    nombre = VALUES(nombre),
-                    descripcion = VALUES(descripcion),
-                    costo = VALUES(costo)
-                """,
-                (
-                    codigo,
-                    nombre,
-                    descripcion,
-                    costo,
-                ),
-            )
-            filas_ok += 1
-        except Exception as e:
-            filas_err += 1
-            print(f"[Fila {idx + 1}] Error importando repuesto: {e}")
-
-    conn.commit()
     cur.close()
     conn.close()
 
+    total = time.perf_counter() - t0
     print(f"Importación de repuestos finalizada. OK: {filas_ok}, con error: {filas_err}")
+    print(
+        f"Tiempos: transformación+escritura {t_escritura:.2f}s, total {total:.2f}s "
+        f"({(filas_ok + filas_err) / total if total else 0:.0f} filas/s)"
+    )
 
 
 if __name__ == "__main__":
-    importar_repuestos_desde_excel(str(EXCEL_FILE))
\ No newline at end of file
+    # uso: python importar_repuestos_setup.py [tamaño_lote] [--streaming] [--sin-cache]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    lote = int(args[0]) if args else TAMANO_LOTE
+    importar_repuestos_desde_excel(
+        str(EXCEL_FILE),
+        tamano_lote=lote,
+        streaming="--streaming" in sys.argv[1:],
+        usar_cache="--sin-cache" not in sys.argv[1:],
+    )
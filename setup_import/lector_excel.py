@@ -0,0 +1,170 @@
+
+import hashlib
+import queue
+import threading
+from glob import escape as glob_escape
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+from pandas.io.parsers import TextParser
+
+# Filas por bloque al leer en modo streaming
+TAMANO_BLOQUE = 2000
+
+# Bloques ya leídos que pueden esperar a ser escritos (acota la memoria)
+BLOQUES_EN_COLA = 2
+
+
+def leer_excel_por_bloques(ruta_excel, columnas, hoja=0, tamano=TAMANO_BLOQUE):
+    """
+    Lee el Excel (sin encabezados) de a bloques de `tamano` filas, con openpyxl
+    en modo read_only: en memoria hay un bloque a la vez, no todo el libro.
+    Cada bloque es un DataFrame con las columnas indicadas y con el índice
+    = número de fila - 1 (igual que pd.read_excel(..., header=None)).
+    Las filas totalmente vacías se saltean.
+    Los tipos se infieren por bloque: con bloques muy chicos, una columna de
+    texto donde algunas celdas parecen números puede leerse distinto que con
+    el archivo entero.
+    """
+    def bloque(filas, indices):
+        # TextParser es lo que usa pd.read_excel: infiere tipos igual
+        # (p. ej. el texto "291.00" de una celda pasa a 291.0)
+        df = TextParser(filas, header=None, names=columnas).read()
+        df.index = indices
+        return df
+
+    n = len(columnas)
+    wb = load_workbook(ruta_excel, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[hoja] if isinstance(hoja, int) else wb[hoja]
+        filas, indices = [], []
+        for i, fila in enumerate(ws.iter_rows(values_only=True)):
+            fila = tuple(fila[:n]) + (None,) * (n - len(fila))
+            if all(v is None or v == "" for v in fila):
+                continue
+            filas.append(fila)
+            indices.append(i)
+            if len(filas) >= tamano:
+                yield bloque(filas, indices)
+                filas, indices = [], []
+        if filas:
+            yield bloque(filas, indices)
+    finally:
+        wb.close()
+
+
+def en_segundo_plano(bloques, max_en_cola=BLOQUES_EN_COLA):
+    """
+    Consume el iterador `bloques` en otro hilo y los va entregando por una cola
+    acotada: mientras se escribe un bloque en la DB ya se está leyendo el
+    siguiente. Si la lectura falla, la excepción se relanza acá.
+    """
+    cola = queue.Queue(maxsize=max_en_cola)
+    fin = object()
+    cancelado = threading.Event()
+
+    def leer():
+        try:
+            for b in bloques:
+                while not cancelado.is_set():
+                    try:
+                        cola.put(b, timeout=0.5)
+                        break
+                    except queue.Full:
+                        pass
+                if cancelado.is_set():
+                    return
+            cola.put(fin)
+        except BaseException as e:  # se relanza en el hilo que consume
+            cola.put(e)
+
+    hilo = threading.Thread(target=leer, name="lector-excel", daemon=True)
+    hilo.start()
+    try:
+        while True:
+            b = cola.get()
+            if b is fin:
+                return
+            if isinstance(b, BaseException):
+                raise b
+            yield b
+    finally:
+        cancelado.set()
+
+
+# -------------------------
+# CACHE DEL EXCEL YA PARSEADO
+# -------------------------
+# Carpeta del cache (al lado de los importadores)
+CACHE_DIR = Path(__file__).resolve().parent / ".cache_excel"
+
+# Cambiar si cambia la forma de leer el Excel, para invalidar lo guardado
+_VERSION_CACHE = 1
+
+
+def _clave_cache(ruta: Path, columnas, hoja) -> str:
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(1 << 20), b""):
+            h.update(trozo)
+    h.update(f"|{ruta.stat().st_mtime_ns}|{hoja}|{','.join(columnas)}|{_VERSION_CACHE}".encode("utf-8"))
+    return h.hexdigest()[:20]
+
+
+def _guardar_cache(df, nombre: str):
+    # parquet (columnar) si está pyarrow y las columnas tienen tipos que entiende;
+    # si no, pickle de pandas (también conserva los tipos exactos)
+    parquet = CACHE_DIR / f"{nombre}.parquet"
+    try:
+        df.to_parquet(parquet)
+        return parquet
+    except ImportError:
+        pass
+    except Exception as e:  # pyarrow.ArrowException: columnas con tipos mezclados, etc.
+        print(f"Cache: no se pudo guardar en parquet ({e}), se usa pickle.")
+        parquet.unlink(missing_ok=True)
+    pkl = CACHE_DIR / f"{nombre}.pkl"
+    df.to_pickle(pkl)
+    return pkl
+
+
+def leer_excel_cacheado(ruta_excel, columnas, hoja=0, usar_cache=True):
+    """
+    Igual que pd.read_excel(ruta, sheet_name=hoja, header=None) con las
+    columnas renombradas, pero guarda la tabla ya parseada en CACHE_DIR.
+    La clave es el hash del contenido + mtime del archivo: si el Excel no
+    cambió, la próxima corrida no lo vuelve a parsear.
+    """
+    ruta = Path(ruta_excel)
+    if not usar_cache:
+        df = pd.read_excel(ruta, sheet_name=hoja, header=None)
+        df.columns = columnas
+        return df
+
+    # armado a mano y no con with_suffix: el nombre puede tener puntos
+    # ("clientes.2024.xlsx") y with_suffix se comería el hash
+    nombre = f"{ruta.stem}-{_clave_cache(ruta, columnas, hoja)}"
+    for sufijo, leer in ((".parquet", pd.read_parquet), (".pkl", pd.read_pickle)):
+        archivo = CACHE_DIR / f"{nombre}{sufijo}"
+        if archivo.exists():
+            try:
+                df = leer(archivo)
+                print(f"Cache: usando {archivo.name} (el Excel no cambió)")
+                return df
+            except Exception as e:
+                print(f"Cache: no se pudo leer {archivo.name} ({e}), se vuelve a parsear.")
+
+    df = pd.read_excel(ruta, sheet_name=hoja, header=None)
+    df.columns = columnas
+
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        # las versiones anteriores del mismo Excel ya no sirven
+        for viejo in CACHE_DIR.glob(f"{glob_escape(ruta.stem)}-*"):
+            viejo.unlink(missing_ok=True)
+        guardado = _guardar_cache(df, nombre)
+        print(f"Cache: guardado {guardado.name}")
+    except OSError as e:
+        print(f"Cache: no se pudo guardar ({e})")
+    return df
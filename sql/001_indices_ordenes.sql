@@ -0,0 +1,16 @@
+-- Índices para la lista paginada de órdenes (/api/ordenes).
+-- La paginación es keyset sobre ordenes.id DESC, por eso cada índice termina en id.
+-- cliente_id y equipo_id ya tienen índice por sus FOREIGN KEY
+-- (en InnoDB el índice secundario incluye la PK, o sea que ya es (cliente_id, id)).
+
+CREATE INDEX idx_ordenes_estado_id ON ordenes (estado, id);
+CREATE INDEX idx_ordenes_fecha_id  ON ordenes (fecha, id);
+
+-- Con varios estados (grupo EN PROCESO) app.py arma un UNION ALL de una
+-- consulta por estado (_sql_pagina_ordenes): un IN sobre (estado, id) no da
+-- el orden por id y ordenaría todas las coincidencias.
+-- desde/hasta solos no tienen índice que dé el orden por id: MySQL recorre la
+-- PK hacia atrás filtrando fecha o usa (fecha, id) y ordena el rango entero.
+-- Comprobar con EXPLAIN en la base real, p. ej.:
+--   EXPLAIN SELECT id FROM ordenes WHERE fecha BETWEEN '2023-01-01' AND '2023-06-30'
+--   ORDER BY id DESC LIMIT 101;
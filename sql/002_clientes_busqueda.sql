@@ -0,0 +1,18 @@
+-- Búsqueda de clientes (/api/clientes/buscar).
+-- clientes.busqueda = nombre + teléfono + celular + CUIT + email + dirección + localidad
+-- normalizados, y las terminaciones de teléfono y celular para buscarlo por los últimos
+-- dígitos (ver normalizar.texto_busqueda_cliente). La mantienen app.py y el importador.
+
+ALTER TABLE clientes ADD COLUMN busqueda VARCHAR(512) NULL;
+
+-- sin stopwords: "de", "la", "com"... tienen que poder buscarse
+SET SESSION innodb_ft_enable_stopword = OFF;
+CREATE FULLTEXT INDEX ft_clientes_busqueda ON clientes (busqueda);
+
+-- prefijo para búsquedas de 1-2 letras (más cortas que innodb_ft_min_token_size).
+-- /api/clientes/buscar ahora también las busca en medio del texto ('% ab%'),
+-- así que no siempre lo usa.
+CREATE INDEX idx_clientes_busqueda ON clientes (busqueda(32));
+
+-- Después de aplicar este script, llenar la columna para los clientes existentes:
+--   flask --app app reindexar-clientes
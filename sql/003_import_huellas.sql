@@ -0,0 +1,12 @@
+-- Huellas de la última importación desde el sistema viejo.
+-- importar_clientes_setup.py guarda acá un hash por CODIGO de lo que mandó
+-- a la tabla clientes; en la próxima corrida solo escribe las filas nuevas
+-- o cuyo hash cambió.
+
+CREATE TABLE IF NOT EXISTS import_huellas (
+    origen VARCHAR(32) NOT NULL,          -- 'clientes', ...
+    codigo INT NOT NULL,
+    huella CHAR(40) NOT NULL,             -- sha1 de la fila ya mapeada
+    importado DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (origen, codigo)
+);
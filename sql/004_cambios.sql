@@ -0,0 +1,54 @@
+-- Registro de cambios para sincronizar el front por versión
+-- (/api/ordenes?since=, /api/clientes?since=, /api/equipos?since=).
+-- Cada INSERT/UPDATE/DELETE en ordenes, clientes y equipos deja una fila;
+-- cambios.version es el número de versión (monotónico).
+-- Ojo: la versión se asigna al escribir y se ve al commitear, así que puede
+-- aparecer una menor después de una mayor; app.py solo entrega versiones
+-- firmes (version_cambios: mira INNODB_TRX, necesita permiso PROCESS).
+-- Se llena con triggers, así también quedan registrados los cambios que
+-- no pasan por app.py (importadores, ediciones a mano).
+
+CREATE TABLE IF NOT EXISTS cambios (
+    version BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    tabla VARCHAR(16) NOT NULL,           -- 'ordenes' | 'clientes' | 'equipos'
+    fila_id INT NOT NULL,
+    borrado TINYINT(1) NOT NULL DEFAULT 0,
+    fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_cambios_tabla_version (tabla, version),
+    KEY idx_cambios_fecha (fecha)
+);
+
+DELIMITER //
+
+CREATE TRIGGER trg_ordenes_ins AFTER INSERT ON ordenes FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('ordenes', NEW.id)//
+CREATE TRIGGER trg_ordenes_upd AFTER UPDATE ON ordenes FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('ordenes', NEW.id)//
+CREATE TRIGGER trg_ordenes_del AFTER DELETE ON ordenes FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id, borrado) VALUES ('ordenes', OLD.id, 1)//
+
+CREATE TRIGGER trg_clientes_ins AFTER INSERT ON clientes FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('clientes', NEW.id)//
+CREATE TRIGGER trg_clientes_upd AFTER UPDATE ON clientes FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('clientes', NEW.id)//
+CREATE TRIGGER trg_clientes_del AFTER DELETE ON clientes FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id, borrado) VALUES ('clientes', OLD.id, 1)//
+
+CREATE TRIGGER trg_equipos_ins AFTER INSERT ON equipos FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('equipos', NEW.id)//
+CREATE TRIGGER trg_equipos_upd AFTER UPDATE ON equipos FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('equipos', NEW.id)//
+CREATE TRIGGER trg_equipos_del AFTER DELETE ON equipos FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id, borrado) VALUES ('equipos', OLD.id, 1)//
+
+-- /api/equipos trae el cliente vinculado: un cambio de vínculo cambia el equipo
+CREATE TRIGGER trg_equipo_cliente_ins AFTER INSERT ON equipo_cliente FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('equipos', NEW.equipo_id)//
+CREATE TRIGGER trg_equipo_cliente_upd AFTER UPDATE ON equipo_cliente FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('equipos', NEW.equipo_id)//
+CREATE TRIGGER trg_equipo_cliente_del AFTER DELETE ON equipo_cliente FOR EACH ROW
+    INSERT INTO cambios (tabla, fila_id) VALUES ('equipos', OLD.equipo_id)//
+
+DELIMITER ;
+
+-- El registro se poda con:  flask --app app purgar-cambios
@@ -0,0 +1,26 @@
+-- Propietario actual de cada equipo, precalculado.
+-- /api/equipos antes hacía GROUP BY sobre equipos + equipo_cliente + clientes
+-- en cada pedido; ahora lee esta tabla por PK. La mantienen
+-- propietarios.py (vincular_equipo_cliente, cambios de nombre de clientes,
+-- importador de clientes).
+
+CREATE TABLE IF NOT EXISTS equipo_propietario (
+    equipo_id INT NOT NULL PRIMARY KEY,
+    cliente_id INT NULL,                  -- vínculo activo en equipo_cliente
+    clientes VARCHAR(1024) NULL,          -- nombres de los clientes vinculados, separados por ", "
+    KEY idx_equipo_propietario_cliente (cliente_id)
+);
+
+-- carga inicial (también: flask --app app reconstruir-propietarios)
+INSERT INTO equipo_propietario (equipo_id, cliente_id, clientes)
+SELECT
+    e.id,
+    MIN(ec.cliente_id),
+    GROUP_CONCAT(c.nombre SEPARATOR ', ')
+FROM equipos e
+LEFT JOIN equipo_cliente ec ON ec.equipo_id = e.id AND ec.activo = 1
+LEFT JOIN clientes c ON c.id = ec.cliente_id
+GROUP BY e.id
+ON DUPLICATE KEY UPDATE
+    cliente_id = VALUES(cliente_id),
+    clientes = VALUES(clientes);
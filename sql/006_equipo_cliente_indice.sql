@@ -0,0 +1,3 @@
+-- Equipos activos de un cliente (/api/clientes/<id>/equipos, formulario de orden).
+-- equipo_id al final: el índice alcanza solo para encontrar los equipos.
+CREATE INDEX idx_equipo_cliente_cliente_activo ON equipo_cliente (cliente_id, activo, equipo_id);
@@ -0,0 +1,13 @@
+-- Índices para leer orden_historial (/api/ordenes/<id>/historial, /api/historial).
+-- La paginación es keyset sobre orden_historial.id DESC, por eso cada índice termina en id:
+-- el historial de una orden sale del índice sin recorrer la tabla.
+
+-- Fecha de cada registro (filtros desde/hasta). historial.py la escribe con
+-- la hora del evento; el DEFAULT cubre lo que se inserte por otro lado.
+-- Si la tabla ya tiene la columna fecha, saltear este ALTER.
+ALTER TABLE orden_historial ADD COLUMN fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX idx_orden_historial_orden_id ON orden_historial (orden_id, id);
+CREATE INDEX idx_orden_historial_usuario_id ON orden_historial (usuario, id);
+CREATE INDEX idx_orden_historial_accion_id ON orden_historial (accion, id);
+CREATE INDEX idx_orden_historial_fecha ON orden_historial (fecha);
@@ -0,0 +1,75 @@
+-- Estadísticas por día para los reportes (/api/estadisticas), sin recorrer ordenes.
+-- Cada orden suma en tres días, con su estado actual:
+--   fecha        -> recibidas
+--   fecha_salida -> terminadas
+--   fecha_retiro -> retiradas e importe_retiradas
+-- Se mantiene en el momento con triggers (igual que cambios, 004): cada alta,
+-- cambio o baja en ordenes resta lo que sumaba la fila vieja y suma la nueva,
+-- en la misma transacción. Así cuentan crear/actualizar, las transiciones,
+-- los lotes y lo que se edite a mano.
+
+CREATE TABLE IF NOT EXISTS estadisticas_diarias (
+    dia DATE NOT NULL,
+    estado VARCHAR(32) NOT NULL,
+    recibidas INT NOT NULL DEFAULT 0,
+    terminadas INT NOT NULL DEFAULT 0,
+    retiradas INT NOT NULL DEFAULT 0,
+    importe_retiradas DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, estado)
+);
+
+DELIMITER //
+
+CREATE PROCEDURE estadisticas_sumar(
+    p_fecha DATE, p_salida DATE, p_retiro DATE,
+    p_estado VARCHAR(32), p_importe DECIMAL(14, 2), p_signo INT
+)
+BEGIN
+    DECLARE v_estado VARCHAR(32) DEFAULT COALESCE(p_estado, '');
+    IF p_fecha IS NOT NULL THEN
+        INSERT INTO estadisticas_diarias (dia, estado, recibidas) VALUES (p_fecha, v_estado, p_signo)
+        ON DUPLICATE KEY UPDATE recibidas = recibidas + VALUES(recibidas);
+    END IF;
+    IF p_salida IS NOT NULL THEN
+        INSERT INTO estadisticas_diarias (dia, estado, terminadas) VALUES (p_salida, v_estado, p_signo)
+        ON DUPLICATE KEY UPDATE terminadas = terminadas + VALUES(terminadas);
+    END IF;
+    IF p_retiro IS NOT NULL THEN
+        INSERT INTO estadisticas_diarias (dia, estado, retiradas, importe_retiradas)
+        VALUES (p_retiro, v_estado, p_signo, p_signo * COALESCE(p_importe, 0))
+        ON DUPLICATE KEY UPDATE
+            retiradas = retiradas + VALUES(retiradas),
+            importe_retiradas = importe_retiradas + VALUES(importe_retiradas);
+    END IF;
+END//
+
+CREATE TRIGGER trg_ordenes_estadisticas_ins AFTER INSERT ON ordenes FOR EACH ROW
+    CALL estadisticas_sumar(NEW.fecha, NEW.fecha_salida, NEW.fecha_retiro, NEW.estado, NEW.importe, 1)//
+
+CREATE TRIGGER trg_ordenes_estadisticas_upd AFTER UPDATE ON ordenes FOR EACH ROW
+BEGIN
+    -- la mayoría de los UPDATE no tocan estas columnas (textos, etc.)
+    IF NOT (OLD.fecha <=> NEW.fecha AND OLD.fecha_salida <=> NEW.fecha_salida
+            AND OLD.fecha_retiro <=> NEW.fecha_retiro AND OLD.estado <=> NEW.estado
+            AND OLD.importe <=> NEW.importe) THEN
+        CALL estadisticas_sumar(OLD.fecha, OLD.fecha_salida, OLD.fecha_retiro, OLD.estado, OLD.importe, -1);
+        CALL estadisticas_sumar(NEW.fecha, NEW.fecha_salida, NEW.fecha_retiro, NEW.estado, NEW.importe, 1);
+    END IF;
+END//
+
+CREATE TRIGGER trg_ordenes_estadisticas_del AFTER DELETE ON ordenes FOR EACH ROW
+    CALL estadisticas_sumar(OLD.fecha, OLD.fecha_salida, OLD.fecha_retiro, OLD.estado, OLD.importe, -1)//
+
+DELIMITER ;
+
+-- Carga inicial (lo mismo hace: flask --app app reconstruir-estadisticas)
+INSERT INTO estadisticas_diarias (dia, estado, recibidas, terminadas, retiradas, importe_retiradas)
+SELECT
+    CASE t.k WHEN 1 THEN o.fecha WHEN 2 THEN o.fecha_salida ELSE o.fecha_retiro END AS dia,
+    COALESCE(o.estado, '') AS estado,
+    SUM(t.k = 1), SUM(t.k = 2), SUM(t.k = 3),
+    SUM(IF(t.k = 3, COALESCE(o.importe, 0), 0))
+FROM ordenes o
+JOIN (SELECT 1 AS k UNION ALL SELECT 2 UNION ALL SELECT 3) t
+WHERE CASE t.k WHEN 1 THEN o.fecha WHEN 2 THEN o.fecha_salida ELSE o.fecha_retiro END IS NOT NULL
+GROUP BY 1, 2;   -- por posición: "estado" también es columna de ordenes
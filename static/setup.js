@@ -14,8 +14,17 @@ let retiroFecha = "";
 let retiroHora  = "";
 
 let listaOrdenes  = [];
+let ordenesCursor = null; // keyset: next_cursor de la última página (null = no hay más)
+const ORDENES_POR_PAGINA = 100;
 let listaClientes = [];
-let listaEquipos  = [];
+let listaEquipos  = [];   // tab equipos (se carga al abrir el tab)
+let equiposCliente = [];  // form de orden: equipos activos del cliente elegido
+
+// versión de cambios de cada lista (header X-Version); después de guardar se
+// piden solo los cambios desde ahí (?since=) en vez de recargar todo
+let versionOrdenes  = null;
+let versionClientes = null;
+let versionEquipos  = null;
 
 let mapaRepuestos = {}; // nombre -> costo
 
@@ -223,6 +232,8 @@ const tabPanes   = document.querySelectorAll(".tab-pane");
 function cambiarTab(id) {
   tabButtons.forEach(b => b.classList.toggle("active", b.dataset.tab === id));
   tabPanes.forEach(p => p.classList.toggle("active", p.id === id));
+  // la lista completa de equipos solo la usa su tab
+  if (id === "equipos") asegurarListaEquipos();
 }
 tabButtons.forEach(btn => btn.addEventListener("click", () => cambiarTab(btn.dataset.tab)));
 function irATabFormulario() { cambiarTab("form"); }
@@ -698,7 +709,7 @@ function validarClienteYEquipo() {
   const clienteId = document.getElementById("cliente_select_form")?.value;
   const equipoId  = document.getElementById("equipo_select_form")?.value;
 
-  const equipoObj = listaEquipos.find(e => String(e.id) === String(equipoId));
+  const equipoObj = equiposCliente.find(e => String(e.id) === String(equipoId));
 
   if (!clienteId) { showToast("Debes seleccionar un cliente existente.", "error"); return false; }
   if (!equipoId || !equipoObj) { showToast("Debes seleccionar un equipo existente.", "error"); return false; }
@@ -741,7 +752,7 @@ function limpiarFormularioOrden() {
   actualizarAccionesOrdenUI();
 }
 
-function escribirFormulario(o) {
+async function escribirFormulario(o) {
   const imp = document.getElementById("importe");
   if (imp) imp.dataset.base = "";
 
@@ -750,12 +761,12 @@ function escribirFormulario(o) {
 
   // cliente/equipo
   const selCliente = document.getElementById("cliente_select_form");
-  if (selCliente) selCliente.value = (o.cliente_id != null) ? String(o.cliente_id) : "";
-
-  refrescarEquiposDeCliente();
+  if (selCliente) {
+    asegurarOpcionCliente(selCliente, o.cliente_id, o.nombre_contacto);
+    selCliente.value = (o.cliente_id != null) ? String(o.cliente_id) : "";
+  }
 
-  const selEquipo = document.getElementById("equipo_select_form");
-  if (selEquipo) selEquipo.value = (o.equipo_id != null) ? String(o.equipo_id) : "";
+  await refrescarEquiposDeCliente(o.equipo_id != null ? String(o.equipo_id) : "");
 
   document.getElementById("serie") && (document.getElementById("serie").value = o.serie_texto || o.serie || "");
 
@@ -848,24 +859,19 @@ function escribirFormularioEquipo(e) {
   document.getElementById("equipo_tipo").value        = e.tipo || "";
   document.getElementById("equipo_marca").value       = e.marca || "";
   document.getElementById("equipo_modelo").value      = e.modelo || "";
-  document.getElementById("equipo_cliente_select").value = e.cliente_id || "";
+  const selCli = document.getElementById("equipo_cliente_select");
+  asegurarOpcionCliente(selCli, e.cliente_id, e.clientes);
+  selCli.value = e.cliente_id || "";
 }
 
 // ---------- RENDER TABLAS ----------
 function renderizarTablaClientes() {
   const tbody = document.querySelector("#tablaClientes tbody");
   if (!tbody) return;
-  const q = document.getElementById("cliente_filtro")?.value || "";
   tbody.innerHTML = "";
 
+  // listaClientes ya viene filtrada por el servidor (ver cargarClientes)
   listaClientes
-    .filter(c => {
-      const text = [
-        c.id, c.nombre, c.telefono, c.celular, c.email, c.cuit, c.contacto,
-        c.direccion, c.localidad, c.provincia, c.cp, c.giro_empresa, c.observaciones
-      ].join(" | ");
-      return matchQuery(text, q);
-    })
     .forEach(c => {
       const tr = document.createElement("tr");
       tr.dataset.id = c.id;
@@ -909,6 +915,48 @@ function renderizarTablaEquipos() {
     });
 }
 
+function textoOrden(o) {
+  return [
+    o.id,
+    o.fecha, o.hora_ingreso,
+    o.nombre_contacto, o.telefono_contacto,
+    o.equipo_texto, o.serie_texto,
+    o.estado,
+    o.falla, o.reparacion, o.repuestos,
+    o.observaciones, o.accesorios,
+    o.importe,
+    o.fecha_salida, o.hora_salida,
+    o.fecha_regreso, o.hora_regreso
+  ].join(" | ");
+}
+
+function filaOrden(o) {
+  const tr = document.createElement("tr");
+  tr.dataset.id = o.id;
+
+  tr.innerHTML = `
+    <td>${o.id}</td>
+    <td>${(o.fecha || "").slice(0,10)}</td>
+    <td>${(o.hora_ingreso || "").slice(0,5)}</td>
+    <td>${o.nombre_contacto || ""}</td>
+    <td>${o.telefono_contacto || ""}</td>
+    <td>${o.equipo_texto || ""}</td>
+    <td>${o.serie_texto || ""}</td>
+    <td>${o.falla || ""}</td>
+    <td>${o.observaciones || ""}</td>
+    <td>${o.accesorios || ""}</td>
+    <td>${o.reparacion || ""}</td>
+    <td>${o.repuestos || ""}</td>
+    <td>${o.importe ?? ""}</td>
+    <td>${o.estado || ""}</td>
+    <td>${(o.fecha_salida || "").slice(0,10)}</td>
+    <td>${(o.hora_salida || "").slice(0,5)}</td>
+    <td>${(o.fecha_regreso || "").slice(0,10)}</td>
+    <td>${(o.hora_regreso || "").slice(0,5)}</td>
+  `;
+  return tr;
+}
+
 function renderizarListaOrdenes() {
   const tbody = document.querySelector("#tablaOrdenes tbody");
   if (!tbody) return;
@@ -916,106 +964,299 @@ function renderizarListaOrdenes() {
   const q = document.getElementById("filtro_texto")?.value || "";
   tbody.innerHTML = "";
 
-  listaOrdenes
-    .filter(o => {
-      const text = [
-        o.id,
-        o.fecha, o.hora_ingreso,
-        o.nombre_contacto, o.telefono_contacto,
-        o.equipo_texto, o.serie_texto,
-        o.estado,
-        o.falla, o.reparacion, o.repuestos,
-        o.observaciones, o.accesorios,
-        o.importe,
-        o.fecha_salida, o.hora_salida,
-        o.fecha_regreso, o.hora_regreso
-      ].join(" | ");
-      return matchQuery(text, q);
-    })
-    .forEach(o => {
-      const tr = document.createElement("tr");
-      tr.dataset.id = o.id;
+  const visibles = listaOrdenes.filter(o => matchQuery(textoOrden(o), q));
+  visibles.forEach(o => tbody.appendChild(filaOrden(o)));
+  avisarFiltroTexto(q, visibles.length);
+}
 
-      tr.innerHTML = `
-        <td>${o.id}</td>
-        <td>${(o.fecha || "").slice(0,10)}</td>
-        <td>${(o.hora_ingreso || "").slice(0,5)}</td>
-        <td>${o.nombre_contacto || ""}</td>
-        <td>${o.telefono_contacto || ""}</td>
-        <td>${o.equipo_texto || ""}</td>
-        <td>${o.serie_texto || ""}</td>
-        <td>${o.falla || ""}</td>
-        <td>${o.observaciones || ""}</td>
-        <td>${o.accesorios || ""}</td>
-        <td>${o.reparacion || ""}</td>
-        <td>${o.repuestos || ""}</td>
-        <td>${o.importe ?? ""}</td>
-        <td>${o.estado || ""}</td>
-        <td>${(o.fecha_salida || "").slice(0,10)}</td>
-        <td>${(o.hora_salida || "").slice(0,5)}</td>
-        <td>${(o.fecha_regreso || "").slice(0,10)}</td>
-        <td>${(o.hora_regreso || "").slice(0,5)}</td>
-      `;
+// el filtro de texto es local: busca solo en las páginas ya traídas
+function avisarFiltroTexto(q, encontradas) {
+  const aviso = document.getElementById("avisoFiltroTexto");
+  if (!aviso) return;
+  if (!q.trim() || ordenesCursor == null) {
+    aviso.style.display = "none";
+    return;
+  }
+  aviso.textContent =
+    `"${q.trim()}": ${encontradas} de las ${listaOrdenes.length} órdenes cargadas. ` +
+    `Hay más órdenes sin cargar: usá "Cargar más" o acotá por estado/fechas.`;
+  aviso.style.display = "";
+}
 
-      tbody.appendChild(tr);
-    });
+/**
+ * actualizarFilasOrdenes(ids)
+ * - re-dibuja solo las filas de esas órdenes según listaOrdenes
+ *   (reemplaza, inserta en su lugar o quita), sin tocar el resto de la tabla
+ */
+function actualizarFilasOrdenes(ids) {
+  const tbody = document.querySelector("#tablaOrdenes tbody");
+  if (!tbody) return;
+  const q = document.getElementById("filtro_texto")?.value || "";
+  const porId = new Map(listaOrdenes.map(o => [String(o.id), o]));
+
+  ids.forEach(id => {
+    const k = String(id);
+    const actual = tbody.querySelector(`tr[data-id="${k}"]`);
+    const o = porId.get(k);
+
+    if (!o || !matchQuery(textoOrden(o), q)) {
+      actual?.remove();
+      return;
+    }
+    const tr = filaOrden(o);
+    if (actual) {
+      if (actual.classList.contains("selected")) tr.classList.add("selected");
+      actual.replaceWith(tr);
+      return;
+    }
+    // lista ordenada por id DESC: va antes de la primera fila con id menor
+    const siguiente = Array.from(tbody.rows).find(r => Number(r.dataset.id) < Number(o.id));
+    tbody.insertBefore(tr, siguiente || null);
+  });
 }
 
 
 // ---------- CARGAS ----------
-async function cargarClientes() {
-  const resp = await fetch("/api/clientes");
-  if (!resp.ok) return;
-  listaClientes = await resp.json();
+const CLIENTES_POR_BUSQUEDA = 50;
+
+// búsqueda en el servidor (/api/clientes/buscar); q vacío => últimos clientes
+// devuelve { clientes, version } o null
+async function buscarClientes(q, limit = CLIENTES_POR_BUSQUEDA) {
+  const p = new URLSearchParams({ q: q || "", limit });
+  const resp = await fetch(`/api/clientes/buscar?${p}`);
+  if (!resp.ok) return null;
+  return { clientes: await resp.json(), version: leerVersion(resp) };
+}
 
-  // select del formulario de orden
-  const selForm = document.getElementById("cliente_select_form");
-  if (selForm) {
-    selForm.innerHTML = '<option value="">-- Seleccionar cliente --</option>';
-    listaClientes.forEach(c => {
-      const opt = document.createElement("option");
-      opt.value = c.id;
-      const tel = c.telefono || c.celular || "";
-      opt.textContent = tel ? `${c.nombre} (${tel})` : c.nombre;
-      selForm.appendChild(opt);
-    });
-    selForm.__allOptions = Array.from(selForm.options).map(o => ({ value: o.value, text: o.textContent }));
-  }
+function etiquetaCliente(c) {
+  const tel = c.telefono || c.celular || "";
+  return tel ? `${c.nombre} (${tel})` : (c.nombre || "");
+}
 
-  // select de equipos (tab equipos)
-  const selEq = document.getElementById("equipo_cliente_select");
-  if (selEq) {
-    selEq.innerHTML = '<option value="">-- Seleccionar cliente --</option>';
-    listaClientes.forEach(c => {
-      const opt = document.createElement("option");
-      opt.value = c.id;
-      const tel = c.telefono || c.celular || "";
-      opt.textContent = tel ? `${c.nombre} (${tel})` : c.nombre;
-      selEq.appendChild(opt);
-    });
-    selEq.__allOptions = Array.from(selEq.options).map(o => ({ value: o.value, text: o.textContent }));
-  }
+/**
+ * llenarSelectClientes(sel, clientes)
+ * - reemplaza las opciones por los resultados de la búsqueda
+ * - conserva la opción seleccionada aunque no esté entre los resultados
+ */
+function llenarSelectClientes(sel, clientes) {
+  if (!sel) return;
+  const actual = sel.value;
+  const actualTxt = sel.selectedOptions[0]?.textContent || "";
+
+  sel.innerHTML = '<option value="">-- Seleccionar cliente --</option>';
+  clientes.forEach(c => {
+    const opt = document.createElement("option");
+    opt.value = c.id;
+    opt.textContent = etiquetaCliente(c);
+    sel.appendChild(opt);
+  });
+  if (actual) asegurarOpcionCliente(sel, actual, actualTxt);
+  sel.value = actual;
+}
+
+// agrega la opción del cliente si la búsqueda actual no la trajo (ej: al cargar una orden)
+function asegurarOpcionCliente(sel, id, texto) {
+  if (!sel || id == null || id === "") return;
+  const val = String(id);
+  if (Array.from(sel.options).some(o => o.value === val)) return;
+  const opt = document.createElement("option");
+  opt.value = val;
+  opt.textContent = texto || `Cliente #${val}`;
+  sel.appendChild(opt);
+}
+
+function makeClienteSearch(inputId, selectId) {
+  const inp = document.getElementById(inputId);
+  const sel = document.getElementById(selectId);
+  if (!inp || !sel) return;
+
+  inp.addEventListener("input", debounce(async () => {
+    const r = await buscarClientes(inp.value);
+    if (r) llenarSelectClientes(sel, r.clientes);
+  }, 200));
+}
+
+async function cargarClientes() {
+  const q = document.getElementById("cliente_filtro")?.value || "";
+  const r = await buscarClientes(q);
+  if (!r) return;
+  listaClientes = r.clientes;
+  versionClientes = r.version;
+  mostrarClientes();
+}
+
+function mostrarClientes() {
+  // select del formulario de orden / select de equipos (tab equipos)
+  llenarSelectClientes(document.getElementById("cliente_select_form"), listaClientes);
+  llenarSelectClientes(document.getElementById("equipo_cliente_select"), listaClientes);
 
   renderizarTablaClientes();
 }
 
 async function cargarEquipos() {
-  const resp = await fetch("/api/equipos");
-  if (!resp.ok) return;
+  // lista completa: el server la manda mientras la lee (no la junta en memoria)
+  const resp = await fetch("/api/equipos?stream=1");
+  if (!resp.ok) return false;
   listaEquipos = await resp.json();
+  versionEquipos = leerVersion(resp);
   renderizarTablaEquipos();
-  refrescarEquiposDeCliente();
+  return true;
+}
+
+// la lista completa se pide una sola vez, al abrir el tab Equipos (el form de
+// orden no la usa); si falló, se reintenta al volver al tab
+let cargaEquipos = null;
+function asegurarListaEquipos() {
+  if (!cargaEquipos) {
+    cargaEquipos = cargarEquipos().then(ok => { if (!ok) cargaEquipos = null; });
+  }
+  return cargaEquipos;
+}
+
+// ---------- SINCRONIZACIÓN POR VERSIÓN (?since=) ----------
+function leerVersion(resp) {
+  const v = resp.headers.get("X-Version");
+  return (v == null || v === "") ? null : Number(v);
+}
+
+/**
+ * pedirDelta(path, params, version)
+ * - trae { version, items, borrados } con los cambios desde `version`
+ * - null => no hay versión o el servidor pide recargar todo (completo)
+ */
+async function pedirDelta(path, params, version) {
+  if (version == null) return null;
+  const p = new URLSearchParams(params);
+  p.set("since", version);
+  const resp = await fetch(`${path}?${p}`);
+  if (!resp.ok) return null;
+  const delta = await resp.json();
+  return delta.completo ? null : delta;
+}
+
+/**
+ * mergeDelta(lista, delta, admitir)
+ * - saca los borrados, reemplaza los que cambiaron
+ * - agrega los que no estaban si admitir(item)
+ * - deja la lista ordenada por id DESC (como la manda el servidor)
+ */
+function mergeDelta(lista, delta, admitir = () => true) {
+  const fuera = new Set((delta.borrados || []).map(String));
+  const cambiados = new Map((delta.items || []).map(x => [String(x.id), x]));
+  const out = [];
+  lista.forEach(x => {
+    const k = String(x.id);
+    if (fuera.has(k)) return;
+    out.push(cambiados.get(k) || x);
+    cambiados.delete(k);
+  });
+  cambiados.forEach(x => { if (admitir(x)) out.push(x); });
+  return out.sort((a, b) => b.id - a.id);
+}
+
+async function sincronizarOrdenes({ limpiarSeleccion = true } = {}) {
+  const delta = await pedirDelta("/api/ordenes", paramsFiltroOrdenes(), versionOrdenes);
+  if (!delta) return cargarListaOrdenes();
+  versionOrdenes = delta.version;
+  // las que caen más allá de las páginas cargadas las trae "cargar más"
+  listaOrdenes = mergeDelta(listaOrdenes, delta, o => ordenesCursor == null || o.id > ordenesCursor);
+  actualizarFilasOrdenes([...(delta.items || []).map(o => o.id), ...(delta.borrados || [])]);
+  actualizarBotonesLista({ limpiarSeleccion });
+}
+
+// ---------- EVENTOS EN VIVO (cambios hechos desde otras PCs) ----------
+// /api/eventos avisa qué orden cambió; se traen solo los cambios (?since=)
+// y se re-dibujan esas filas. Si la conexión se corta, EventSource reconecta
+// solo y al volver se sincroniza lo que pasó mientras tanto.
+const sincronizarOrdenesPorEvento = debounce(() => sincronizarOrdenes({ limpiarSeleccion: false }), 300);
+
+function escucharEventos() {
+  if (!window.EventSource) return;
+  const es = new EventSource("/api/eventos");
+  let cortado = false;
+
+  es.addEventListener("orden", () => sincronizarOrdenesPorEvento());
+  es.addEventListener("error", () => { cortado = true; });
+  es.addEventListener("open", () => {
+    if (cortado) { cortado = false; sincronizarOrdenesPorEvento(); }
+  });
 }
 
-async function cargarListaOrdenes() {
-  const resp = await fetch("/api/ordenes");
+async function sincronizarClientes() {
+  const delta = await pedirDelta("/api/clientes", {}, versionClientes);
+  if (!delta) return cargarClientes();
+  versionClientes = delta.version;
+  // listaClientes es el resultado de la búsqueda: los nuevos entran solo si no hay texto buscado
+  const sinFiltro = !(document.getElementById("cliente_filtro")?.value || "").trim();
+  listaClientes = mergeDelta(listaClientes, delta, () => sinFiltro).slice(0, CLIENTES_POR_BUSQUEDA);
+  mostrarClientes();
+}
+
+async function sincronizarEquipos() {
+  // la lista completa solo existe si se abrió el tab Equipos; se sincroniza por delta
+  if (versionEquipos != null) {
+    const delta = await pedirDelta("/api/equipos", {}, versionEquipos);
+    if (!delta) {
+      await cargarEquipos();
+    } else {
+      versionEquipos = delta.version;
+      listaEquipos = mergeDelta(listaEquipos, delta);
+      renderizarTablaEquipos();
+    }
+  }
+  await refrescarEquiposDeCliente();
+}
+
+// después de guardar: al crear una orden se puede crear el cliente, etc.
+async function sincronizarTodo() {
+  await Promise.all([sincronizarOrdenes(), sincronizarClientes(), sincronizarEquipos()]);
+}
+
+function paramsFiltroOrdenes() {
+  const p = new URLSearchParams();
+  const estado = document.getElementById("filtro_estado")?.value || "";
+  const desde  = document.getElementById("filtro_desde")?.value || "";
+  const hasta  = document.getElementById("filtro_hasta")?.value || "";
+  if (estado) p.set("estado", estado);
+  if (desde)  p.set("desde", desde);
+  if (hasta)  p.set("hasta", hasta);
+  return p;
+}
+
+function urlListaOrdenes(cursor) {
+  const p = paramsFiltroOrdenes();
+  p.set("limit", ORDENES_POR_PAGINA);
+  if (cursor != null) p.set("cursor", cursor);
+  return `/api/ordenes?${p}`;
+}
+
+/**
+ * cargarListaOrdenes({ append })
+ * - append=false: trae la primera página (con los filtros actuales) y reemplaza la lista
+ * - append=true : trae la página siguiente (keyset) y la agrega al final
+ */
+async function cargarListaOrdenes({ append = false } = {}) {
+  if (append && ordenesCursor == null) return;
+
+  const resp = await fetch(urlListaOrdenes(append ? ordenesCursor : null));
   if (!resp.ok) {
     showToast("Error al cargar órdenes", "error");
     return;
   }
 
-  listaOrdenes = await resp.json();
+  const pagina = await resp.json();
+  const items = pagina.items || [];
+  listaOrdenes = append ? listaOrdenes.concat(items) : items;
+  ordenesCursor = pagina.next_cursor ?? null;
+  // al agregar una página se sigue desde la versión de la primera (la más vieja)
+  if (!append) versionOrdenes = leerVersion(resp);
   renderizarListaOrdenes();
+  actualizarBotonesLista();
+}
+
+function actualizarBotonesLista({ limpiarSeleccion = true } = {}) {
+  const btnMas = document.getElementById("btnCargarMasOrdenes");
+  if (btnMas) btnMas.style.display = (ordenesCursor != null) ? "" : "none";
 
   // ===== MINIPARCHE: botones duplicar/reabrir =====
   const btnDup = document.getElementById("btnDuplicarDesdeLista");
@@ -1027,6 +1268,9 @@ async function cargarListaOrdenes() {
   if (btnDup) btnDup.disabled = !hayOrdenes;
   if (btnRea) btnRea.disabled = !hayOrdenes;
 
+  // cambios que llegan de otras PCs no interrumpen lo que se está haciendo
+  if (!limpiarSeleccion) return;
+
   // Limpia selección y modo al refrescar (evita que quede “modo activo” sin querer)
   modoAccionLista = null;
   ordenSeleccionadaLista = null;
@@ -1038,27 +1282,47 @@ async function cargarListaOrdenes() {
 
 
 // ---------- EQUIPOS POR CLIENTE (FORM ORDEN) ----------
-function refrescarEquiposDeCliente() {
+let pedidoEquiposCliente = 0;
+
+// Trae de /api/clientes/<id>/equipos los equipos activos del cliente elegido.
+// Sin cliente elegido el select queda vacío: no se baja la lista completa.
+// seleccionar: equipo a dejar elegido (al abrir una orden); si no se pasa,
+// se mantiene el actual si sigue estando.
+async function refrescarEquiposDeCliente(seleccionar) {
   const clienteId = document.getElementById("cliente_select_form")?.value || "";
   const selEqForm = document.getElementById("equipo_select_form");
   if (!selEqForm) return;
 
-  const valorActual = selEqForm.value;
-  selEqForm.innerHTML = '<option value="">-- Seleccionar equipo --</option>';
+  // si el usuario cambia de cliente antes de que llegue la respuesta, gana el último pedido
+  const pedido = ++pedidoEquiposCliente;
+  let equipos = [];
+  if (clienteId) {
+    try {
+      const resp = await fetch(`/api/clientes/${encodeURIComponent(clienteId)}/equipos`);
+      if (resp.ok) equipos = await resp.json();
+    } catch (e) {
+      console.error(e);
+    }
+  }
+  if (pedido !== pedidoEquiposCliente) return;
+  equiposCliente = equipos;
 
-  listaEquipos
-    .filter(e => !clienteId || String(e.cliente_id) === String(clienteId))
-    .forEach(e => {
-      const opt = document.createElement("option");
-      opt.value = e.id;
-      const desc  = e.descripcion || "";
-      const serie = e.serie || "";
-      const marca = e.marca || "";
-      const modelo= e.modelo || "";
-      const label = `${desc} ${marca} ${modelo}`.trim();
-      opt.textContent = serie ? `${label} (${serie})` : label;
-      selEqForm.appendChild(opt);
-    });
+  const valorActual = (seleccionar !== undefined) ? seleccionar : selEqForm.value;
+  selEqForm.innerHTML = clienteId
+    ? '<option value="">-- Seleccionar equipo --</option>'
+    : '<option value="">-- Elegí primero un cliente --</option>';
+
+  equiposCliente.forEach(e => {
+    const opt = document.createElement("option");
+    opt.value = e.id;
+    const desc  = e.descripcion || "";
+    const serie = e.serie || "";
+    const marca = e.marca || "";
+    const modelo= e.modelo || "";
+    const label = `${desc} ${marca} ${modelo}`.trim();
+    opt.textContent = serie ? `${label} (${serie})` : label;
+    selEqForm.appendChild(opt);
+  });
 
   selEqForm.__allOptions = Array.from(selEqForm.options).map(o => ({ value: o.value, text: o.textContent }));
 
@@ -1066,8 +1330,11 @@ function refrescarEquiposDeCliente() {
     selEqForm.value = valorActual;
   } else {
     selEqForm.value = "";
-    const serie = document.getElementById("serie");
-    if (serie) serie.value = "";
+    // al abrir una orden la serie es la de la orden
+    if (seleccionar === undefined) {
+      const serie = document.getElementById("serie");
+      if (serie) serie.value = "";
+    }
   }
 }
 
@@ -1111,17 +1378,18 @@ document.addEventListener("DOMContentLoaded", async () => {
 // ----- Cargas -----
   await Promise.all([
     cargarClientes(),
-    cargarEquipos(),
     cargarListaOrdenes(),
     cargarTablasCatalogos(),
     cargarListasAuxiliares()
   ]);
 
+  escucharEventos();
+
   // ----- Buscadores de selects -----
   makeSelectSearch("falla_search", "falla_select");
   makeSelectSearch("reparacion_search", "reparacion_select");
   makeSelectSearch("repuesto_search", "repuesto_select");
-  makeSelectSearch("cliente_form_search", "cliente_select_form");
+  makeClienteSearch("cliente_form_search", "cliente_select_form");
   makeSelectSearch("equipo_form_search", "equipo_select_form");
 
   habilitarAppendDesdeSelect("falla_select", "falla_comentario");
@@ -1129,19 +1397,14 @@ document.addEventListener("DOMContentLoaded", async () => {
 
   // equipos por cliente
   refrescarEquiposDeCliente();
-  document.getElementById("cliente_select_form")?.addEventListener("change", refrescarEquiposDeCliente);
+  document.getElementById("cliente_select_form")?.addEventListener("change", () => refrescarEquiposDeCliente());
 
-  // cuando cambia equipo => set serie + cliente
+  // cuando cambia equipo => set serie (la lista ya es solo del cliente elegido)
   document.getElementById("equipo_select_form")?.addEventListener("change", () => {
     const id = document.getElementById("equipo_select_form")?.value;
-    const eq = listaEquipos.find(e => String(e.id) === String(id));
+    const eq = equiposCliente.find(e => String(e.id) === String(id));
     const inpSerie = document.getElementById("serie");
-    if (!eq) { if (inpSerie) inpSerie.value = ""; return; }
-    if (inpSerie) inpSerie.value = eq.serie || "";
-    const selCliente = document.getElementById("cliente_select_form");
-    if (selCliente) selCliente.value = (eq.cliente_id != null) ? String(eq.cliente_id) : "";
-    refrescarEquiposDeCliente();
-    document.getElementById("equipo_select_form").value = id;
+    if (inpSerie) inpSerie.value = eq ? (eq.serie || "") : "";
   });
 
   // repuestos => importe
@@ -1173,9 +1436,24 @@ document.addEventListener("DOMContentLoaded", async () => {
 
   // filtros tablas
   document.getElementById("filtro_texto")?.addEventListener("input", debounce(renderizarListaOrdenes, 120));
-  document.getElementById("cliente_filtro")?.addEventListener("input", debounce(renderizarTablaClientes, 120));
+  document.getElementById("cliente_filtro")?.addEventListener("input", debounce(cargarClientes, 200));
   document.getElementById("equipo_filtro")?.addEventListener("input", debounce(renderizarTablaEquipos, 120));
-  btnRefrescarLista?.addEventListener("click", cargarListaOrdenes);
+  btnRefrescarLista?.addEventListener("click", () => cargarListaOrdenes());
+  ["filtro_estado", "filtro_desde", "filtro_hasta"].forEach(id =>
+    document.getElementById(id)?.addEventListener("change", () => cargarListaOrdenes())
+  );
+  document.getElementById("btnCargarMasOrdenes")
+    ?.addEventListener("click", () => cargarListaOrdenes({ append: true }));
+
+  // exportar Word de las órdenes filtradas (zip armado en el servidor)
+  document.getElementById("btnExportarZip")?.addEventListener("click", () => {
+    const p = paramsFiltroOrdenes();
+    if (![...p.keys()].length) {
+      showToast("Elegí un estado o un rango de fechas para exportar", "error");
+      return;
+    }
+    window.location.href = `/api/ordenes/docx/zip?${p}`;
+  });
 
   // click orden => cargar en formulario
  document.querySelector("#tablaOrdenes tbody")?.addEventListener("click", async (e) => {
@@ -1209,7 +1487,7 @@ document.addEventListener("DOMContentLoaded", async () => {
     }
 
     showToast(`Orden duplicada (#${r.id})`, "ok");
-    await cargarListaOrdenes();
+    await sincronizarTodo();
     return;
   }
 
@@ -1239,7 +1517,7 @@ document.addEventListener("DOMContentLoaded", async () => {
     }
 
     showToast(`Orden #${orden.id} reabierta`, "ok");
-    await cargarListaOrdenes();
+    await sincronizarTodo();
     return;
   }
 
@@ -1247,7 +1525,7 @@ document.addEventListener("DOMContentLoaded", async () => {
   const imp = document.getElementById("importe");
   if (imp) imp.dataset.base = "";
 
-  escribirFormulario(orden);
+  await escribirFormulario(orden);
   document.getElementById("buscar_nro") &&
     (document.getElementById("buscar_nro").value = orden.id);
 
@@ -1284,7 +1562,7 @@ document.addEventListener("DOMContentLoaded", async () => {
     const data = await resp.json();
     const imp = document.getElementById("importe");
     if (imp) imp.dataset.base = "";
-    escribirFormulario(data);
+    await escribirFormulario(data);
     irATabFormulario();
     actualizarAccionesOrdenUI();
   });
@@ -1308,7 +1586,7 @@ document.addEventListener("DOMContentLoaded", async () => {
         document.getElementById("buscar_nro").value = r.id;
       }
 
-      await cargarListaOrdenes();
+      await sincronizarTodo();
       actualizarAccionesOrdenUI();
     } catch (err) {
       showToast(err.message || "Error al crear orden", "error");
@@ -1331,7 +1609,7 @@ document.addEventListener("DOMContentLoaded", async () => {
         body: JSON.stringify(datos)
       });
       showToast("Orden modificada", "ok");
-      await cargarListaOrdenes();
+      await sincronizarTodo();
       actualizarAccionesOrdenUI();
     } catch (err) {
       showToast(err.message || "Error al modificar orden", "error");
@@ -1387,7 +1665,7 @@ document.addEventListener("DOMContentLoaded", async () => {
   }
 
   showToast("Salida registrada", "ok");
-  await cargarListaOrdenes();
+  await sincronizarTodo();
 });
 
 document.getElementById("btnMarcarTerminada")?.addEventListener("click", async () => {
@@ -1410,7 +1688,7 @@ document.getElementById("btnMarcarTerminada")?.addEventListener("click", async (
   }
 
   showToast("Orden terminada", "ok");
-  await cargarListaOrdenes();
+  await sincronizarTodo();
   actualizarAccionesOrdenUI();
 });
 document.getElementById("btnMarcarRetirada")?.addEventListener("click", async () => {
@@ -1434,7 +1712,7 @@ document.getElementById("btnMarcarRetirada")?.addEventListener("click", async ()
   }
 
   showToast("Orden retirada", "ok");
-  await cargarListaOrdenes();
+  await sincronizarTodo();
   actualizarAccionesOrdenUI();
 });
 
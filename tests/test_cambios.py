@@ -0,0 +1,116 @@
+# tests/test_cambios.py
+"""
+Versión firme de cambios (app.version_cambios / app.cambios_desde) con dos
+transacciones intercaladas. Necesita un MySQL como el de DB_CONFIG; usa la
+base SETUP_TEST_DB (por defecto setup_db_test), que se crea si no existe.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector  # noqa: E402
+
+import app  # noqa: E402
+
+BASE_TEST = os.environ.get("SETUP_TEST_DB", "setup_db_test")
+
+
+def _tabla_cambios():
+    # el CREATE TABLE de sql/004_cambios.sql (sin los triggers)
+    ruta = os.path.join(os.path.dirname(app.__file__), "sql", "004_cambios.sql")
+    sql = open(ruta, encoding="utf-8").read()
+    ini = sql.index("CREATE TABLE")
+    return sql[ini:sql.index(";", ini)]
+
+
+@pytest.fixture
+def conectar():
+    config = {k: v for k, v in app.DB_CONFIG.items() if k != "database"}
+    try:
+        admin = mysql.connector.connect(**config)
+    except mysql.connector.Error as e:
+        pytest.skip(f"sin MySQL: {e}")
+    cur = admin.cursor()
+    cur.execute(f"CREATE DATABASE IF NOT EXISTS `{BASE_TEST}`")
+    cur.execute(f"USE `{BASE_TEST}`")
+    cur.execute("DROP TABLE IF EXISTS cambios")
+    cur.execute(_tabla_cambios())
+    cur.close()
+
+    abiertas = [admin]
+
+    def nueva():
+        conn = mysql.connector.connect(**config, database=BASE_TEST)
+        abiertas.append(conn)
+        return conn
+
+    yield nueva
+    for conn in abiertas:
+        conn.close()
+
+
+def _anotar(conn, fila_id):
+    cur = conn.cursor()
+    cur.execute("INSERT INTO cambios (tabla, fila_id) VALUES ('ordenes', %s)", (fila_id,))
+    version = cur.lastrowid
+    cur.close()
+    return version
+
+
+def _leer(conn, fn, *args):
+    # como un request: una transacción nueva por lectura
+    conn.rollback()
+    cur = conn.cursor()
+    try:
+        return fn(cur, *args)
+    finally:
+        cur.close()
+        conn.rollback()
+
+
+def test_transaccion_larga_no_se_pierde(conectar, monkeypatch):
+    monkeypatch.setattr(app, "CAMBIOS_MARGEN", 0)
+    larga, corta, front = conectar(), conectar(), conectar()
+
+    # la larga toma la versión primero y no commitea
+    v_larga = _anotar(larga, 1)
+    time.sleep(1.2)   # fecha es TIMESTAMP (segundos) e INNODB_TRX se refresca cada 0,1 s
+    v_corta = _anotar(corta, 2)
+    corta.commit()
+    assert v_corta > v_larga
+    time.sleep(1.2)
+
+    # el front sincroniza con la larga abierta: no puede recibir v_corta
+    version = _leer(front, app.version_cambios)
+    assert version < v_larga
+
+    larga.commit()
+
+    # el delta siguiente trae la fila de la transacción larga
+    delta = _leer(front, app.cambios_desde, "ordenes", version)
+    assert delta is not None
+    version2, cambiados, borrados = delta
+    assert cambiados == [1, 2]
+    assert borrados == []
+
+    # con las dos commiteadas, la versión avanza hasta la última
+    assert _leer(front, app.version_cambios) == v_corta
+    assert version2 >= version
+
+
+def test_sin_transacciones_abiertas_avanza(conectar, monkeypatch):
+    monkeypatch.setattr(app, "CAMBIOS_MARGEN", 0)
+    conn, front = conectar(), conectar()
+    assert _leer(front, app.version_cambios) == 0
+
+    v = _anotar(conn, 7)
+    conn.commit()
+    time.sleep(1.2)
+    assert _leer(front, app.version_cambios) == v
+    assert _leer(front, app.cambios_desde, "ordenes", v) == (v, [], [])
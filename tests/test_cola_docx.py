@@ -0,0 +1,86 @@
+# tests/test_cola_docx.py
+"""
+cola_docx.ColaRender con un render de prueba (no necesita MySQL ni python-docx).
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cola_docx import ERROR, LISTO, ColaRender  # noqa: E402
+
+
+def test_genera_y_avisa():
+    hechas = []
+    cola = ColaRender(hechas.append)
+    cola.encolar(7)
+    assert cola.esperar(7, 2) == LISTO
+    assert hechas == [7]
+    assert cola.estado(7)["terminado"] is not None
+    assert cola.esperar(8, 0) is None and cola.estado(8) is None
+    cola.cerrar()
+
+
+def test_error_queda_en_el_estado():
+    def falla(orden_id):
+        raise RuntimeError("sin plantilla")
+
+    cola = ColaRender(falla)
+    cola.encolar(1)
+    assert cola.esperar(1, 2) == ERROR
+    assert cola.estado(1)["error"] == "sin plantilla"
+    cola.cerrar()
+
+
+def test_cambio_mientras_genera_se_repite_una_vez():
+    empezo, seguir = threading.Event(), threading.Event()
+    hechas = []
+
+    def render(orden_id):
+        hechas.append(orden_id)
+        empezo.set()
+        seguir.wait(2)
+
+    cola = ColaRender(render, max_workers=1)
+    cola.encolar(5)
+    assert empezo.wait(2)
+    # tres cambios mientras se genera: una sola vuelta más
+    cola.encolar(5)
+    cola.encolar(5)
+    cola.encolar(5)
+    seguir.set()
+    assert cola.esperar(5, 2) == LISTO
+    cola.cerrar()
+    assert hechas == [5, 5]
+
+
+def test_pendiente_no_se_duplica():
+    seguir = threading.Event()
+    hechas = []
+
+    def render(orden_id):
+        if orden_id == 1:
+            seguir.wait(2)   # ocupa el único worker
+        hechas.append(orden_id)
+
+    cola = ColaRender(render, max_workers=1)
+    cola.encolar(1)
+    cola.encolar(2)
+    cola.encolar(2)   # sigue pendiente: no se encola otra vez
+    seguir.set()
+    assert cola.esperar(2, 2) == LISTO
+    cola.cerrar()
+    assert hechas == [1, 2]
+
+
+def test_olvida_los_terminados_mas_viejos():
+    cola = ColaRender(lambda orden_id: None, historial=2)
+    for i in range(4):
+        cola.encolar(i)
+        cola.esperar(i, 2)
+    cola.cerrar()
+    assert cola.estado(0) is None and cola.estado(1) is None
+    assert cola.estado(3)["estado"] == LISTO
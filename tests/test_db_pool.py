@@ -0,0 +1,146 @@
+# tests/test_db_pool.py
+"""
+db_pool.PoolMySQL con conexiones falsas (no necesita MySQL).
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.connector import Error  # noqa: E402
+
+from db_pool import PoolAgotadoError, PoolMySQL  # noqa: E402
+
+
+class Cruda:
+    """Hace de conexión de mysql.connector."""
+
+    def __init__(self):
+        self.viva = True
+        self.cerrada = False
+        self.rollbacks = 0
+        self.unread_result = False
+
+    def is_connected(self):
+        return self.viva
+
+    def consume_results(self):
+        self.unread_result = False
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def cursor(self):
+        return "cursor"
+
+    def close(self):
+        self.cerrada = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    creadas = []
+
+    def nueva(self):
+        raw = Cruda()
+        creadas.append(raw)
+        self._sumar("creadas")
+        return raw
+
+    monkeypatch.setattr(PoolMySQL, "_nueva", nueva)
+
+    def crear(**kw):
+        p = PoolMySQL({}, **kw)
+        p.creadas = creadas
+        return p
+
+    return crear
+
+
+def test_devuelve_y_reutiliza(pool):
+    p = pool(max_size=2)
+    conn = p.get()
+    assert conn.cursor() == "cursor"   # se usa como la conexión de adentro
+    raw = p.creadas[0]
+    raw.unread_result = True
+    conn.close()
+    conn.close()   # idempotente
+
+    assert conn.devuelta
+    assert raw.rollbacks == 1 and not raw.unread_result
+    with pytest.raises(Error):
+        conn.cursor()
+
+    conn2 = p.get()
+    st = p.stats()
+    assert st["creadas"] == 1 and st["reutilizadas"] == 1
+    assert st["en_uso"] == 1 and st["libres"] == 0
+    conn2.close()
+    assert p.stats()["en_uso"] == 0
+
+
+def test_conexion_muerta_no_se_entrega(pool):
+    p = pool(max_size=1)
+    p.get().close()
+    p.creadas[0].viva = False
+
+    p.get().close()
+    assert p.creadas[0].cerrada
+    st = p.stats()
+    assert st["creadas"] == 2 and st["descartadas"] == 1
+
+
+def test_timeout_sin_conexiones_libres(pool):
+    p = pool(max_size=1, timeout=0.05)
+    conn = p.get()
+    with pytest.raises(PoolAgotadoError):
+        p.get()
+    st = p.stats()
+    assert st["esperas"] == 1 and st["timeouts"] == 1
+
+    conn.close()
+    p.get().close()
+
+
+def test_espera_a_que_devuelvan(pool):
+    p = pool(max_size=1, timeout=2)
+    conn = p.get()
+    threading.Timer(0.05, conn.close).start()
+    p.get().close()
+    st = p.stats()
+    assert st["esperas"] == 1 and st["timeouts"] == 0 and st["creadas"] == 1
+
+
+def test_descartar_cierra_y_libera_el_cupo(pool):
+    p = pool(max_size=1, timeout=0.05)
+    conn = p.get()
+    conn.descartar()
+    conn.close()   # ya no hace nada
+
+    raw = p.creadas[0]
+    assert raw.cerrada and raw.rollbacks == 0
+    st = p.stats()
+    assert st["descartadas"] == 1 and st["libres"] == 0 and st["en_uso"] == 0
+
+    p.get().close()   # el cupo quedó libre: abre una nueva
+    assert p.stats()["creadas"] == 2
+
+
+def test_error_al_devolver_descarta(pool):
+    p = pool(max_size=1)
+    conn = p.get()
+    raw = p.creadas[0]
+
+    def rota():
+        raise Error("2013 Lost connection")
+
+    raw.rollback = rota
+    conn.close()
+    assert raw.cerrada
+    st = p.stats()
+    assert st["descartadas"] == 1 and st["libres"] == 0 and st["en_uso"] == 0
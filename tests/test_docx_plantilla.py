@@ -0,0 +1,59 @@
+# tests/test_docx_plantilla.py
+"""
+orden_docx_plantilla.generar_docx_orden_rapido contra orden_docx.generar_docx_orden:
+mismo texto en párrafos y tablas. No necesita MySQL.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document  # noqa: E402
+
+import orden_docx_plantilla  # noqa: E402
+from orden_docx import generar_docx_orden  # noqa: E402
+from orden_docx_plantilla import generar_docx_orden_rapido  # noqa: E402
+
+ORDEN = {
+    "id": 1234,
+    "estado": "TERMINADA",
+    "fecha": date(2024, 5, 2),
+    "hora_ingreso": timedelta(hours=9, minutes=30),
+    "nombre_contacto": "Pérez & Hijos <SRL>",
+    "telefono_contacto": "11 4444-5555",
+    "equipo_texto": "Taladro Bosch GSB 13",
+    "serie_texto": "A-001",
+    "fecha_salida": date(2024, 5, 3),
+    "importe": "15000",
+    "accesorios": "maletín\tmecha",
+    "falla": "no enciende\nhace ruido",
+    "reparacion": "cambio de carbones",
+    "repuestos": "",
+    "observaciones": "  con espacios  ",
+}
+
+
+def _texto(path):
+    doc = Document(path)
+    parrafos = [p.text for p in doc.paragraphs if not p.text.startswith("Generado")]
+    tablas = [[[c.text for c in fila.cells] for fila in t.rows] for t in doc.tables]
+    return parrafos, tablas, doc.core_properties.title
+
+
+@pytest.mark.parametrize("retiro", [None, {"fecha_retiro": date(2024, 5, 10), "hora_retiro": timedelta(hours=17)}])
+def test_rapido_igual_a_python_docx(tmp_path, monkeypatch, retiro):
+    # sin plantilla en disco: se arma con orden_docx.armar_documento
+    monkeypatch.setattr(orden_docx_plantilla, "PLANTILLA_PATH", str(tmp_path / "no_existe.docx"))
+    monkeypatch.setattr(orden_docx_plantilla, "_plantilla_cache", None)
+    orden = dict(ORDEN, **(retiro or {}))
+
+    lento = generar_docx_orden(orden, str(tmp_path), "lento.docx")
+    rapido = generar_docx_orden_rapido(orden, str(tmp_path), "rapido.docx")
+
+    assert _texto(rapido) == _texto(lento)
+    assert ("Retiro" in _texto(rapido)[0]) == bool(retiro)
@@ -0,0 +1,164 @@
+# tests/test_historial.py
+"""
+historial.EscritorHistorial con una conexión falsa (no necesita MySQL).
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from historial import EscritorHistorial  # noqa: E402
+
+
+class CaidaError(Exception):
+    """Hace de error de conexión (InterfaceError/OperationalError)."""
+
+
+class Base:
+    """orden_historial en memoria: valida las columnas del INSERT como MySQL."""
+
+    def __init__(self, columnas=("orden_id", "usuario", "accion", "nota", "fecha")):
+        self.columnas = columnas
+        self.filas = []
+        self.caida = False
+        self.lotes = []   # filas por INSERT escrito
+
+
+class Cursor:
+    def __init__(self, base):
+        self.base = base
+
+    def execute(self, sql, params):
+        if self.base.caida:
+            raise CaidaError("2013 Lost connection")
+        cols = sql.split("(", 1)[1].split(")", 1)[0].split(",")
+        cols = [c.strip() for c in cols]
+        for c in cols:
+            if c not in self.base.columnas:
+                raise RuntimeError(f"1054 Unknown column '{c}'")
+        filas = [dict(zip(cols, params[i:i + len(cols)])) for i in range(0, len(params), len(cols))]
+        if any(f["accion"] == "MALA" for f in filas):
+            raise RuntimeError("1406 Data too long")   # el INSERT entero no entra
+        self.base.lotes.append(len(filas))
+        self.base.filas.extend(filas)
+
+    def close(self):
+        pass
+
+
+class Conexion:
+    def __init__(self, base):
+        self.base = base
+
+    def cursor(self):
+        return Cursor(self.base)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _escritor(base, **kw):
+    kw.setdefault("intervalo", 0.01)
+    return EscritorHistorial(
+        lambda: Conexion(base),
+        reintentables=(CaidaError,),
+        espera_min=0.01,
+        espera_max=0.05,
+        **kw,
+    )
+
+
+def _esperar(condicion, timeout=2.0):
+    limite = time.monotonic() + timeout
+    while not condicion():
+        assert time.monotonic() < limite, "timeout"
+        time.sleep(0.005)
+
+
+def test_sin_columna_fecha_se_escribe_igual():
+    base = Base(columnas=("orden_id", "usuario", "accion", "nota"))
+    h = _escritor(base, con_fecha=lambda: False)
+    h.registrar(1, "ana", "CREATE")
+    h.registrar(2, "ana", "REOPEN", "motivo")
+    h.cerrar()
+
+    assert [f["orden_id"] for f in base.filas] == [1, 2]
+    assert all("fecha" not in f for f in base.filas)
+    st = h.stats()
+    assert st["escritos"] == 2 and st["perdidos"] == 0
+
+
+def test_con_columna_fecha_guarda_la_hora_del_evento():
+    base = Base()
+    h = _escritor(base, con_fecha=lambda: True)
+    h.registrar(1, "ana", "CREATE")
+    h.cerrar()
+
+    assert len(base.filas) == 1
+    assert base.filas[0]["fecha"] is not None
+
+
+def test_junta_de_a_lote():
+    base = Base()
+    h = _escritor(base, lote=3, intervalo=5)
+    for i in range(7):
+        h.registrar(i, "ana", "UPDATE")
+    h.cerrar()
+
+    assert base.lotes == [3, 3, 1]
+    assert [f["orden_id"] for f in base.filas] == list(range(7))
+    assert h.stats()["lotes"] == 3
+
+
+def test_sin_conexion_reintenta_el_mismo_lote():
+    base = Base()
+    base.caida = True
+    h = _escritor(base)
+    h.registrar(1, "ana", "CREATE")
+    h.registrar(2, "ana", "UPDATE")
+    _esperar(lambda: h.stats()["reintentos"] >= 2)
+    assert base.filas == []
+
+    base.caida = False
+    _esperar(lambda: h.stats()["escritos"] == 2)
+    h.cerrar()
+
+    assert [f["orden_id"] for f in base.filas] == [1, 2]
+    st = h.stats()
+    assert st["perdidos"] == 0 and st["pendientes"] == 0
+
+
+def test_una_fila_mala_no_se_lleva_el_lote():
+    base = Base()
+    h = _escritor(base, intervalo=5)
+    h.registrar(1, "ana", "CREATE")
+    h.registrar(2, "ana", "MALA")
+    h.registrar(3, "ana", "UPDATE")
+    h.cerrar()
+
+    assert [f["orden_id"] for f in base.filas] == [1, 3]
+    st = h.stats()
+    assert st["escritos"] == 2 and st["perdidos"] == 1
+
+
+def test_cerrar_con_la_base_caida_cuenta_perdidos():
+    base = Base()
+    base.caida = True
+    h = _escritor(base)
+    h.registrar(1, "ana", "CREATE")
+    _esperar(lambda: h.stats()["reintentos"] >= 1)
+    h.registrar(2, "ana", "UPDATE")
+    h.cerrar()
+
+    st = h.stats()
+    assert base.filas == []
+    assert st["perdidos"] == 2 and st["escritos"] == 0
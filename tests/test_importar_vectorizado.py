@@ -0,0 +1,102 @@
+# tests/test_importar_vectorizado.py
+"""
+col_s / col_float / col_int / _unir_partes (setup_import) contra s / s_float /
+s_int fila por fila, sobre una planilla de muestra. No necesita MySQL.
+
+    python -m pytest -q tests
+"""
+import math
+import os
+import sys
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, "setup_import"))
+
+import importar_repuestos_setup as rep  # noqa: E402
+
+
+def _planilla():
+    n = 6
+    df = pd.DataFrame({col: [None] * n for col in rep.COLUMNAS})
+    df["CODIGO"] = [1001, 1002.0, "1003", " 1004 ", None, 1006.7]
+    df["DESCRIP"] = ["  Filtro aceite ", "Correa", "", None, "Bujía", "Junta"]
+    df["COSTO"] = [12.5, "3,75", "", None, "abc", 7]
+    df["UNIDAD"] = ["UN", None, "  ", "KG", None, "UN"]
+    df["ABRE_MAR"] = [None, "BOSCH", None, None, "NGK", None]
+    df["COD_MAR"] = [15, None, 22.0, None, None, None]
+    df["COD_BARRA"] = [None, None, "779123", None, None, None]
+    df["COD_BAR"] = ["779000", None, None, None, 779555.0, None]
+    df["EXIST"] = [3, None, 0, None, 2.5, None]
+    df["EXIST_MIN"] = [None, 1, None, None, 1, None]
+    df["IVA"] = [21, 10.5, None, None, 21, None]
+    df["POR_GAN"] = [30, None, None, None, 45.5, None]
+    df["OBSERVA"] = ["ok", None, None, None, " ", None]
+    df["FEC_COMPR"] = [pd.Timestamp("2024-03-01"), None, None, None, None, None]
+    return df
+
+
+def _descripcion_fila(row):
+    # el armado original (iterrows + s()) de importar_repuestos_setup
+    s = rep.s
+    partes = []
+    if s(row["UNIDAD"]):
+        partes.append(f"Unidad: {s(row['UNIDAD'])}")
+    marca = s(row["ABRE_MAR"]) or s(row["COD_MAR"])
+    if marca:
+        partes.append(f"Marca: {marca}")
+    cod_barra = s(row["COD_BARRA"]) or s(row["COD_BAR"])
+    if cod_barra:
+        partes.append(f"Código de barras: {cod_barra}")
+    if s(row["COD_PROVE"]):
+        partes.append(f"Cód. proveedor: {s(row['COD_PROVE'])}")
+    exist, exist_min = s(row["EXIST"]), s(row["EXIST_MIN"])
+    if exist or exist_min:
+        partes.append(f"Stock: {exist or '-'} / Mínimo: {exist_min or '-'}")
+    if s(row["IVA"]):
+        partes.append(f"IVA: {s(row['IVA'])}")
+    if s(row["IMP_INT"]):
+        partes.append(f"Imp. interno: {s(row['IMP_INT'])}")
+    if s(row["POR_GAN"]):
+        partes.append(f"Ganancia: {s(row['POR_GAN'])}%")
+    if s(row["OBSERVA"]):
+        partes.append(f"Obs: {s(row['OBSERVA'])}")
+    if s(row["FEC_COMPR"]):
+        partes.append(f"Última compra: {s(row['FEC_COMPR'])}")
+    if s(row["FEC_MODIF"]):
+        partes.append(f"Última modificación: {s(row['FEC_MODIF'])}")
+    return " | ".join(partes) if partes else None
+
+
+def _igual(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b)
+    return a == b and type(a) is type(b)
+
+
+def test_columnas_iguales_a_fila_por_fila():
+    df = _planilla()
+    for col in df.columns:
+        assert list(rep.col_s(df[col])) == [rep.s(v) for v in df[col]], col
+    for vec, fila in zip(rep.col_float(df["COSTO"]), map(rep.s_float, df["COSTO"])):
+        assert _igual(vec, fila)
+    for vec, fila in zip(rep.col_int(df["CODIGO"]), map(rep.s_int, df["CODIGO"])):
+        assert _igual(vec, fila)
+
+
+def test_columna_float_con_vacios():
+    # pandas pasa a float las columnas numéricas con celdas vacías
+    col = pd.Series([1001, None, 7], dtype="float64")
+    assert list(rep.col_s(col)) == [rep.s(v) for v in col]
+    assert list(rep.col_int(col)) == [rep.s_int(v) for v in col]
+
+
+def test_transformar_igual_a_iterrows():
+    df = _planilla()
+    out = rep.transformar_repuestos(df)
+    for i, row in df.iterrows():
+        assert out.at[i, "nombre"] == rep.s(row["DESCRIP"])
+        assert out.at[i, "descripcion"] == _descripcion_fila(row)
+        assert _igual(out.at[i, "id"], rep.s_int(row["CODIGO"]))
+        assert _igual(out.at[i, "costo"], rep.s_float(row["COSTO"]))
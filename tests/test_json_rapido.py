@@ -0,0 +1,122 @@
+# tests/test_json_rapido.py
+"""
+json_rapido (JSON y gzip de las listas) y la ETag con gzip de los catálogos
+de app.py, con una conexión falsa (no necesita MySQL).
+
+    python -m pytest -q tests
+"""
+import gzip
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_rapido  # noqa: E402
+
+COLUMNAS = ("id", "fecha", "hora", "costo", "nota")
+TUPLAS = [
+    (1, date(2024, 5, 2), timedelta(hours=9, minutes=5), Decimal("12.50"), "ñandú"),
+    (2, datetime(2024, 5, 3, 17, 0), timedelta(hours=27, seconds=3), None, None),
+]
+
+
+def test_dumps_como_normalize_row():
+    obj = json.loads(json_rapido.dumps(json_rapido.filas(COLUMNAS, TUPLAS)))
+    assert obj == [
+        {"id": 1, "fecha": "2024-05-02", "hora": "09:05:00", "costo": "12.50", "nota": "ñandú"},
+        {"id": 2, "fecha": "2024-05-03T17:00:00", "hora": "27:00:03", "costo": None, "nota": None},
+    ]
+
+
+def test_sin_orjson_da_lo_mismo(monkeypatch):
+    con = json.loads(json_rapido.dumps(json_rapido.filas(COLUMNAS, TUPLAS)))
+    monkeypatch.setattr(json_rapido, "orjson", None)
+    assert json.loads(json_rapido.dumps(json_rapido.filas(COLUMNAS, TUPLAS))) == con
+
+
+def test_partes_lista_igual_a_dumps():
+    completo = json_rapido.dumps(json_rapido.filas(COLUMNAS, TUPLAS))
+    partes = json_rapido.partes_lista(COLUMNAS, [TUPLAS[:1], [], TUPLAS[1:]])
+    assert json.loads(b"".join(partes)) == json.loads(completo)
+    assert b"".join(json_rapido.partes_lista(COLUMNAS, [])) == b"[]"
+
+
+def test_gzip_ida_y_vuelta():
+    body = json_rapido.dumps([{"id": i, "texto": "x" * 50} for i in range(200)])
+    assert gzip.decompress(json_rapido.comprimir(body)) == body
+
+    partes = json_rapido.partes_lista(COLUMNAS, [TUPLAS] * 100)
+    gz = b"".join(json_rapido.comprimir_por_partes(partes))
+    assert json.loads(gzip.decompress(gz)) == json.loads(json_rapido.dumps(json_rapido.filas(COLUMNAS, TUPLAS * 100)))
+
+
+def test_comprimir_por_partes_cierra_el_generador():
+    cerrado = []
+
+    def partes():
+        try:
+            yield b"[" + b"1," * 5000
+            yield b"1]"
+        finally:
+            cerrado.append(True)
+
+    gen = json_rapido.comprimir_por_partes(partes())
+    next(gen)
+    gen.close()   # el cliente cortó la descarga
+    assert cerrado == [True]
+
+
+# ---------- ETag con gzip (app._respuesta_catalogo) ----------
+class Cursor:
+    column_names = ("id", "descripcion")
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return [(i, f"Falla número {i}") for i in range(100)]
+
+    def close(self):
+        pass
+
+
+class Conexion:
+    def cursor(self, dictionary=False):
+        return Cursor()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    import app
+    monkeypatch.setattr(app, "get_db", lambda: Conexion())
+    monkeypatch.setattr(app, "_catalogos_cache", {})
+    return app.app.test_client()
+
+
+def test_etag_distinta_con_gzip(cliente):
+    plano = cliente.get("/api/fallas")
+    comprimido = cliente.get("/api/fallas", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plano.headers
+    assert comprimido.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(comprimido.data) == plano.data
+    assert "Accept-Encoding" in comprimido.headers["Vary"]
+
+    etag_plano, etag_gz = plano.headers["ETag"], comprimido.headers["ETag"]
+    assert etag_plano != etag_gz
+
+    # cada ETag revalida solo su propia versión
+    r = cliente.get("/api/fallas", headers={"Accept-Encoding": "gzip", "If-None-Match": etag_gz})
+    assert r.status_code == 304
+    r = cliente.get("/api/fallas", headers={"If-None-Match": etag_gz})
+    assert r.status_code == 200 and r.data == plano.data
+    r = cliente.get("/api/fallas", headers={"If-None-Match": etag_plano})
+    assert r.status_code == 304
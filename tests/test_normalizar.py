@@ -0,0 +1,48 @@
+# tests/test_normalizar.py
+"""
+normalizar: texto de clientes.busqueda y tokens de /api/clientes/buscar.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalizar import texto_busqueda_cliente, tokens_busqueda  # noqa: E402
+
+
+def _encuentra(texto, q):
+    # lo que pide api_clientes_buscar: cada token es prefijo de alguna palabra
+    palabras = texto.split()
+    return all(any(p.startswith(t) for p in palabras) for t in tokens_busqueda(q))
+
+
+def test_celular_en_busqueda():
+    texto = texto_busqueda_cliente("Pérez Juan", "11-4444 5555", celular="15 6666-7777")
+    assert _encuentra(texto, "1566667777")
+    assert _encuentra(texto, "7777")      # últimos dígitos del celular
+    assert _encuentra(texto, "44445555")  # últimos dígitos del teléfono
+    assert _encuentra(texto, "perez 6667777")
+
+
+def test_celular_igual_al_telefono_no_se_repite():
+    texto = texto_busqueda_cliente("Ana", "1144445555", celular="11 4444 5555")
+    assert texto == texto_busqueda_cliente("Ana", "1144445555")
+
+
+def test_tokens_normalizados():
+    assert tokens_busqueda("  José  PÉREZ-García ") == ["jose", "perez", "garcia"]
+    assert tokens_busqueda("11-4444 5555") == ["114444", "5555"]
+    assert tokens_busqueda("j@x.com") == ["j", "x", "com"]
+    assert tokens_busqueda("") == [] and tokens_busqueda(None) == []
+
+
+def test_tokens_como_los_guarda_busqueda():
+    texto = texto_busqueda_cliente("José Pérez", "11-4444-5555", "20-12345678-9", "jp@mail.com",
+                                   "Av. Mitre 123", "Quilmes")
+    assert _encuentra(texto, "JOSE perez")
+    assert _encuentra(texto, "20123456789")
+    assert _encuentra(texto, "mitre quil")
+    assert _encuentra(texto, "jp mail")
+    assert not _encuentra(texto, "gomez")
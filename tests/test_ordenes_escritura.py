@@ -0,0 +1,119 @@
+# tests/test_ordenes_escritura.py
+"""
+POST/PUT /api/ordenes con un pool falso (no necesita MySQL): la conexión
+vuelve sola al terminar el request y los errores van a app.logger.
+
+    python -m pytest -q tests
+"""
+import logging
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.connector import Error  # noqa: E402
+
+import app  # noqa: E402
+
+
+class Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.lastrowid = None
+
+    def execute(self, sql, params=None):
+        if self.conn.falla:
+            raise Error("1205 Lock wait timeout exceeded")
+        self.conn.sqls.append(sql.split()[0])
+        if sql.lstrip().startswith("INSERT"):
+            self.lastrowid = 10
+
+    def fetchone(self):
+        return self.conn.orden
+
+    def close(self):
+        pass
+
+
+class Conexion:
+    def __init__(self):
+        self.falla = False
+        self.orden = None
+        self.sqls = []
+        self.commits = self.rollbacks = 0
+        self.devuelta = False
+
+    def cursor(self, dictionary=False):
+        return Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.devuelta = True
+
+
+@pytest.fixture
+def db(monkeypatch):
+    conn = Conexion()
+
+    class Pool:
+        def get(self):
+            return conn
+
+    monkeypatch.setattr(app, "db_pool", Pool())
+    monkeypatch.setattr(app.cola_docx, "encolar", lambda orden_id: None)
+    monkeypatch.setattr(app, "publicar_orden", lambda *a, **kw: None)
+    return conn
+
+
+def test_crear_devuelve_la_conexion(db):
+    r = app.app.test_client().post("/api/ordenes", json={"cliente_id": 1, "equipo_id": 2})
+    assert r.get_json() == {"ok": True, "id": 10}
+    assert db.commits == 1 and db.devuelta
+
+
+def test_crear_con_error_loguea(db, caplog):
+    db.falla = True
+    with caplog.at_level(logging.ERROR):
+        r = app.app.test_client().post("/api/ordenes", json={"cliente_id": 1, "equipo_id": 2})
+    assert r.status_code == 500 and r.get_json()["ok"] is False
+    assert db.rollbacks == 1 and db.devuelta
+    assert any(rec.exc_info and "crear_orden" in rec.getMessage() for rec in caplog.records)
+
+
+def test_actualizar_no_encontrada(db):
+    r = app.app.test_client().put("/api/ordenes/5", json={"falla": "x"})
+    assert r.status_code == 404 and db.devuelta
+
+
+def test_actualizar_retirar_sin_terminar(db):
+    db.orden = {
+        "id": 5, "cliente_id": 1, "equipo_id": 2, "estado": "EN REPARACION",
+        "fecha_salida": None, "hora_salida": None, "fecha_regreso": None,
+        "hora_regreso": None, "fecha_retiro": None, "hora_retiro": None,
+    }
+    c = app.app.test_client()
+    r = c.put("/api/ordenes/5", json={"estado": "RETIRADA"})
+    assert r.status_code == 400 and db.devuelta
+    assert db.sqls == ["SELECT"]
+
+    db.devuelta = False
+    r = c.put("/api/ordenes/5", json={"estado": "TERMINADA", "fecha_salida": date(2024, 5, 2).isoformat()})
+    assert r.get_json() == {"ok": True}
+    assert db.sqls == ["SELECT", "SELECT", "UPDATE"] and db.commits == 1 and db.devuelta
+
+
+def test_actualizar_con_error_loguea(db, caplog):
+    db.falla = True
+    with caplog.at_level(logging.ERROR):
+        r = app.app.test_client().put("/api/ordenes/5", json={})
+    assert r.status_code == 500
+    assert db.rollbacks == 1 and db.devuelta
+    assert any(rec.exc_info and "actualizar_orden" in rec.getMessage() for rec in caplog.records)
@@ -0,0 +1,81 @@
+# tests/test_transicion_lote.py
+"""
+POST /api/ordenes/lote/<accion> con una conexión falsa (no necesita MySQL).
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+class Cursor:
+    def __init__(self, estados):
+        self.estados = estados
+        self.filas = []
+
+    def execute(self, sql, params=None):
+        if sql.lstrip().startswith("SELECT"):
+            self.filas = [{"id": i, "estado": self.estados[i]} for i in params if i in self.estados]
+
+    def fetchall(self):
+        return self.filas
+
+    def close(self):
+        pass
+
+
+class Conexion:
+    def __init__(self, estados):
+        self.estados = estados
+        self.commits = 0
+
+    def cursor(self, dictionary=False):
+        return Cursor(self.estados)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    estados = {1: "EN REPARACION", 2: "TERMINADA", 3: "RETIRADA"}
+    encoladas, eventos = [], []
+    monkeypatch.setattr(app, "get_db", lambda: Conexion(estados))
+    monkeypatch.setattr(app.cola_docx, "encolar", encoladas.append)
+    monkeypatch.setattr(app, "publicar_orden", lambda accion, orden_id, **extra: eventos.append((accion, orden_id)))
+    return app.app.test_client(), encoladas, eventos
+
+
+def test_lote_encola_docx_y_publica_las_que_cambian(cliente):
+    c, encoladas, eventos = cliente
+    r = c.post("/api/ordenes/lote/terminar", json={"ids": [1, 2, 3, 99]})
+    assert r.status_code == 200
+    res = {x["id"]: x["ok"] for x in r.get_json()["resultados"]}
+    assert res == {1: True, 2: True, 3: False, 99: False}
+    assert encoladas == [1, 2]
+    assert eventos == [("terminada", 1), ("terminada", 2)]
+
+
+@pytest.mark.parametrize("ids", ["123", {"1": 1}, 5, ["x"], []])
+def test_ids_invalidos(cliente, ids):
+    c, encoladas, _ = cliente
+    assert c.post("/api/ordenes/lote/retirar", json={"ids": ids}).status_code == 400
+    assert encoladas == []
+
+
+def test_lote_demasiado_grande(cliente):
+    c, _, _ = cliente
+    r = c.post("/api/ordenes/lote/salida", json={"ids": list(range(1, app.LOTE_MAX + 2))})
+    assert r.status_code == 400